@@ -3,8 +3,15 @@ import os
 import platform
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 PROJECT_DIRECTORY = os.path.realpath(os.path.curdir)
+# Wheels of requirements are built once in this directory, shared by all generated projects
+WHEELHOUSE = os.path.expanduser(os.environ.get("ACTION_WHEELHOUSE") or
+                                os.path.join("~", ".cache", "github-action-template", "wheelhouse"))
+# Install from the wheelhouse only, without network
+OFFLINE = os.environ.get("ACTION_WHEELHOUSE_OFFLINE", "").lower() in ("1", "true", "yes")
 
 
 def remove_file(filepath):
@@ -20,11 +27,71 @@ def venv_path(*paths):
 def virtualenv_vars():
     env_with_venv = os.environ.copy()
     env_with_venv["PYTHONHOME"] = ""
-    env_with_venv["PATH"] = venv_path() + ":" + env_with_venv.get("PATH", "")
+    env_with_venv["PATH"] = venv_path() + os.pathsep + env_with_venv.get("PATH", "")
     env_with_venv["VIRTUAL_ENV"] = os.path.join(PROJECT_DIRECTORY, "{{ cookiecutter.optional_venv_dir_name }}")
     return env_with_venv
 
 
+def run_step(name, command, output=None, env=None):
+    """Run a command and print how long it took, or its output if it fails. Return whether it succeeded."""
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(command, cwd=PROJECT_DIRECTORY, env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        print(f"ERROR: {name}: cannot run {command[0]}.")
+        return False
+    elapsed = time.perf_counter() - start
+    if completed.returncode:
+        print(f"ERROR: {name} failed after {elapsed:.1f}s:")
+        print(completed.stdout.decode(errors="replace") + completed.stderr.decode(errors="replace"))
+        return False
+    if output:
+        with open(os.path.join(PROJECT_DIRECTORY, output), "wb") as output_file:
+            output_file.write(completed.stdout)
+    print(f"{name} done in {elapsed:.1f}s")
+    return True
+
+
+def fill_wheelhouse(python):
+    """Build or download missing wheels of requirements into the wheelhouse."""
+    if OFFLINE:
+        print(f"Installing offline from wheelhouse {WHEELHOUSE}")
+        return True
+    os.makedirs(WHEELHOUSE, exist_ok=True)
+    return run_step(f"Filling wheelhouse {WHEELHOUSE}", [
+        python, "-m", "pip", "wheel",
+        "--wheel-dir", WHEELHOUSE,
+        "--find-links", WHEELHOUSE,
+        "pip",
+        "-r", "requirements.txt",
+        "-r", "requirements-dev.txt",
+        ])
+
+
+def create_venv(python):
+    """Create the venv and upgrade its pip."""
+    if not run_step("Creating venv", [python, "-m", "venv", "--clear", "{{ cookiecutter.optional_venv_dir_name }}"]):
+        return False
+    # pip is upgraded from the index, while the wheelhouse may still be filled, unless installing offline
+    offline_options = ["--no-index", "--find-links", WHEELHOUSE] if OFFLINE else []
+    return run_step("Upgrading pip",
+                    [venv_path("python"), "-m", "pip", "install", "--upgrade", *offline_options, "pip"],
+                    env=virtualenv_vars())
+
+
+def install_requirements():
+    """Install requirements from the wheelhouse, and lock runtime requirements used to build the Docker image."""
+    pip = [venv_path("python"), "-m", "pip"]
+    wheelhouse_options = ["--no-index", "--find-links", WHEELHOUSE]
+    return (run_step("Installing requirements", [*pip, "install", *wheelhouse_options, "-r", "requirements.txt"],
+                     env=virtualenv_vars()) and
+            run_step("Locking requirements", [*pip, "freeze"], output="requirements.lock", env=virtualenv_vars()) and
+            run_step("Installing development requirements", [
+                *pip, "install", *wheelhouse_options, "-r", "requirements-dev.txt", "-c", "requirements.lock",
+                ], env=virtualenv_vars()))
+
+
 if __name__ == "__main__":
     # Remove files
     if not "{{ cookiecutter.optional_sonar_projectKey }}":
@@ -32,42 +99,14 @@ if __name__ == "__main__":
 
     # Create virtualenv
     if "create" in "{{ cookiecutter.virtualenv }}" and "{{ cookiecutter.optional_python_location_to_create_venv }}":
-        print("Creating venv...")
-        try:
-            completed = subprocess.run([
-                "{{ cookiecutter.optional_python_location_to_create_venv }}",
-                "-m", "venv",
-                "--clear",
-                "{{ cookiecutter.optional_venv_dir_name }}"
-                ],
-                cwd=PROJECT_DIRECTORY)
-            if completed.returncode:
-                print("ERROR: venv command failed; aborting.")
-                sys.exit(1)
-        except FileNotFoundError:
-            print("ERROR: Cannot run venv with {{cookiecutter.optional_python_location_to_create_venv}}.")
+        setup_start = time.perf_counter()
+        python_location = "{{ cookiecutter.optional_python_location_to_create_venv }}"
+        # The venv and the wheelhouse do not depend on each other
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            wheelhouse_filled = executor.submit(fill_wheelhouse, python_location)
+            venv_created = executor.submit(create_venv, python_location)
+            ready = venv_created.result() and wheelhouse_filled.result()
+        if not ready or not install_requirements():
+            print("ERROR: venv setup failed; aborting.")
             sys.exit(1)
-
-        subprocess.run([venv_path("python"), "-m", "pip", "install", "--upgrade", "pip", ],
-                       cwd=PROJECT_DIRECTORY,
-                       env=virtualenv_vars()
-                       )
-
-        print("Installing requirements...")
-        completed = subprocess.run([
-            venv_path("pip"), "install",
-            "-r", "requirements.txt",
-            "-r", "requirements-dev.txt"
-            ],
-            cwd=PROJECT_DIRECTORY,
-            env=virtualenv_vars()
-            )
-        if completed.returncode:
-            print("ERROR: virtualenv command failed; aborting.")
-            sys.exit(1)
-
-        subprocess.run([venv_path("pip"), "freeze", "pip", ">", os.path.join(PROJECT_DIRECTORY, "requirements.lock")],
-                       cwd=PROJECT_DIRECTORY,
-                       env=virtualenv_vars(),
-                       shell=True
-                       )
+        print(f"venv setup done in {time.perf_counter() - setup_start:.1f}s")
@@ -0,0 +1,118 @@
+"""
+Build the Docker image of this action, then report its size and the cold start time of its containers.
+
+Run from the project root, with Docker available:
+
+    python scripts/measure_image.py [--dockerfile Dockerfile] [--runs 5] [--env NAME=VALUE]... [--output image.json]
+
+The cold start time is the wall time of `docker run` of the action on a minimal push event, from container creation to
+exit: it includes container start, interpreter start, imports and the run of the action. Pass another Dockerfile to
+compare images, for instance a single-stage one.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_DIRECTORY = Path(__file__).resolve().parent.parent
+#: environment of measured runs, like the one of the runner, completed by --env options
+RUN_ENV = {
+    "GITHUB_ACTIONS": "true",
+    "GITHUB_WORKFLOW": "Measure image",
+    "GITHUB_RUN_ID": "1",
+    "GITHUB_RUN_NUMBER": "1",
+    "GITHUB_ACTION": "measure",
+    "GITHUB_ACTOR": "octocat",
+    "GITHUB_REPOSITORY": "octocat/hello-world",
+    "GITHUB_EVENT_NAME": "push",
+    "GITHUB_EVENT_PATH": "/github/workflow/event.json",
+    "GITHUB_WORKSPACE": "/github/workspace",
+    "GITHUB_SHA": "6113728f27ae82c7b1a177c8d03f9e96e0adf246",
+    "GITHUB_REF": "refs/heads/main",
+    "GITHUB_SERVER_URL": "https://github.com",
+    "GITHUB_API_URL": "https://api.github.com",
+    "GITHUB_GRAPHQL_URL": "https://api.github.com/graphql",
+    "INPUT_WHO-TO-GREET": "World",
+    }
+EVENT = {"ref": "refs/heads/main", "repository": {"name": "hello-world", "owner": {"login": "octocat"}}}
+
+
+def build(tag: str, dockerfile: Path) -> float:
+    """Build the image, and return the build duration in seconds."""
+    start = time.perf_counter()
+    subprocess.run(["docker", "build", "--quiet", "--tag", tag, "--file", str(dockerfile), str(PROJECT_DIRECTORY)],
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def image_size(tag: str) -> Dict[str, int]:
+    """Return the size in bytes of the image and its number of layers."""
+    completed = subprocess.run(["docker", "image", "inspect", tag], check=True, stdout=subprocess.PIPE)
+    image = json.loads(completed.stdout)[0]
+    return {"size": image["Size"], "layers": len(image["RootFS"]["Layers"])}
+
+
+def cold_starts(tag: str, env: Dict[str, str], runs: int) -> List[float]:
+    """Run the action in new containers, and return the duration of each run in seconds."""
+    timings = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        workflow_dir = Path(work_dir, "workflow")
+        workspace_dir = Path(work_dir, "workspace")
+        workflow_dir.mkdir()
+        workspace_dir.mkdir()
+        (workflow_dir / "event.json").write_text(json.dumps(EVENT), encoding="utf-8")
+        command = ["docker", "run", "--rm", "--volume", f"{workflow_dir}:/github/workflow",
+                   "--volume", f"{workspace_dir}:/github/workspace", "--workdir", "/github/workspace"]
+        for name, value in env.items():
+            command += ["--env", f"{name}={value}"]
+        for _ in range(runs):
+            start = time.perf_counter()
+            completed = subprocess.run([*command, tag], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            timings.append(time.perf_counter() - start)
+            if completed.returncode:
+                sys.stdout.write(completed.stdout.decode("utf-8", "replace"))
+                raise RuntimeError(f"Action exited with code {completed.returncode}")
+    return timings
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report the image size and container cold start time of this action.")
+    parser.add_argument("--dockerfile", type=Path, default=PROJECT_DIRECTORY / "Dockerfile",
+                        help="Dockerfile of the measured image")
+    parser.add_argument("--tag", default=f"{PROJECT_DIRECTORY.name.lower()}:measure", help="tag of the built image")
+    parser.add_argument("--no-build", action="store_true", help="measure the existing image with this tag")
+    parser.add_argument("--runs", type=int, default=5, help="number of measured container runs")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="environment variable of measured runs, the action inputs for instance")
+    parser.add_argument("--output", type=Path, help="JSON file to save results to")
+    args = parser.parse_args(argv)
+
+    env = dict(RUN_ENV)
+    env.update(variable.split("=", 1) for variable in args.env)
+    results = {"dockerfile": str(args.dockerfile), "tag": args.tag}
+    if not args.no_build:
+        results["build_seconds"] = build(args.tag, args.dockerfile)
+    results.update(image_size(args.tag))
+    # The first run also measures loading image layers from disk, it is reported apart
+    timings = cold_starts(args.tag, env, args.runs + 1)
+    results.update(first_run_seconds=timings[0], cold_start_min_seconds=min(timings[1:]),
+                   cold_start_median_seconds=statistics.median(timings[1:]), runs=args.runs)
+
+    print(f"Image {args.tag}: {results['size'] / 1024 / 1024:.1f} MiB in {results['layers']} layer(s)")
+    if "build_seconds" in results:
+        print(f"Build: {results['build_seconds']:.1f}s")
+    print(f"Cold start: first run {results['first_run_seconds']:.3f}s, then min "
+          f"{results['cold_start_min_seconds']:.3f}s and median {results['cold_start_median_seconds']:.3f}s "
+          f"over {args.runs} runs")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,16 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
 from {{cookiecutter.package_name}}.action import {{cookiecutter.action_class_name}}
 from github_action_template.framework import GitHubEnvironment
 
+PROJECT_DIRECTORY = Path(__file__).resolve().parent.parent
+
 
 @patch("github_action_template.framework.GitHub")
 def test_action_simple(mock_github):
@@ -30,3 +38,23 @@ def test_action_pull_request(mock_github):
         call("pull_request/number"),
         ])
     mock_github.return_value.pull_request.assert_called_with("owner", "repo_name", "number")
+
+
+def test_action_runs_in_measure_image_environment(tmp_path):
+    """Run the action like scripts/measure_image.py does in containers, so that its environment remains sufficient."""
+    spec = importlib.util.spec_from_file_location("measure_image", PROJECT_DIRECTORY / "scripts" / "measure_image.py")
+    measure_image = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(measure_image)
+    event_path = tmp_path / "event.json"
+    event_path.write_text(json.dumps(measure_image.EVENT), encoding="utf-8")
+    # Variables of the workflow running these tests, if any, must not leak into the action
+    env = {name: value for name, value in os.environ.items() if not name.startswith(("GITHUB_", "INPUT_", "ACTION_"))}
+    env.update(measure_image.RUN_ENV, GITHUB_EVENT_PATH=str(event_path), GITHUB_WORKSPACE=str(tmp_path))
+
+    completed = subprocess.run([sys.executable, "-m", "github_action_template.entrypoint",
+                                "{{cookiecutter.package_name}}.action.{{cookiecutter.action_class_name}}"],
+                               cwd=PROJECT_DIRECTORY, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    output = completed.stdout.decode("utf-8", "replace")
+    assert completed.returncode == 0, output
+    assert "Hello, World!" in output
@@ -13,23 +13,24 @@ class {{cookiecutter.action_class_name}}(GitHubAction):
         """Perform the action."""
 
         with self.without_commands():
-            print(f"Hello, {self.get_input('who-to-greet')}!")
+            self.log(f"Hello, {self.get_input('who-to-greet')}!")
             now = datetime.now().isoformat()
-            print(f"It is now {now}.")
-            print("------------------------------------------------------------")
+            self.log(f"It is now {now}.")
+            self.log("------------------------------------------------------------")
         self.set_output("time", now)
 
         # Hello world! done. Additional sample actions below are not part of hello world!
 
         with self.without_commands():
-            print(f"I am {self.github_env.action} started by {self.github_env.actor}.")
-            print(f"I was run with args: {pformat(args)} and here is my payload:\n" +
-                  pformat(self.github_env.event_payload))
-
-            if self.github_env.event_name == EVENT_PULL_REQUEST:
-                owner = self.github_env.event_payload_find("repository/owner/login")
-                repo_name = self.github_env.event_payload_find("repository/name")
-                number = self.github_env.event_payload_find("pull_request/number")
-
-                pull_request = self.github_api.pull_request(owner, repo_name, number)
-                print(f"Pull request was {pull_request}:\n{pformat(pull_request.__dict__)}")
+            self.log(f"I am {self.github_env.action} started by {self.github_env.actor}.")
+            self.log(f"I was run with args: {pformat(args)}")
+        # Large payloads are truncated in the log, pass path="payload.json" to save them in the workspace instead
+        self.log_dump("Event payload", self.github_env.event_payload)
+
+        if self.github_env.event_name == EVENT_PULL_REQUEST:
+            owner = self.github_env.event_payload_find("repository/owner/login")
+            repo_name = self.github_env.event_payload_find("repository/name")
+            number = self.github_env.event_payload_find("pull_request/number")
+
+            pull_request = self.github_api.pull_request(owner, repo_name, number)
+            self.log_dump(f"Pull request {pull_request}", pull_request.as_dict())
@@ -0,0 +1 @@
+"""Benchmarks of the framework hot paths, see run_benchmarks module."""
@@ -0,0 +1,9 @@
+"""Define actions used by benchmarks, in a module importing nothing else so as not to bias start times."""
+from github_action_template.framework import GitHubAction
+
+
+class NoopAction(GitHubAction):
+    """An action doing nothing, to measure the cost of the entrypoint itself."""
+
+    def run(self, args):
+        pass
@@ -0,0 +1,474 @@
+"""
+Measure the framework hot paths, and save results as JSON so that runs can be compared for regressions.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output results.json [--compare baseline.json] [--quick] [--filter NAME]
+
+Timings are in seconds: each benchmark is repeated and its minimum, median and mean duration are recorded. Memory
+results are peak sizes in bytes of Python allocations, traced with tracemalloc.
+"""
+import argparse
+import asyncio
+import fnmatch
+import hashlib
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from github_action_template.changedfiles import ChangedFile, ChangedFiles
+from github_action_template.commands import CommandWriter, MemoryCommandWriter
+from github_action_template.fakegithub import FakeGitHub
+from github_action_template.framework import GitHubAction, GitHubEnvironment, json_find
+from github_action_template.masking import MaskRegistry
+from github_action_template.memo import memoize
+from github_action_template.ratelimit import RateLimiter
+from github_action_template.summary import MAX_SUMMARY_BYTES, StepSummary
+
+ROOT = Path(__file__).parent.parent
+#: payload sizes in bytes of the full suite, and of the quick one
+PAYLOAD_SIZES = [1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 50 * 1024 * 1024]
+QUICK_PAYLOAD_SIZES = [1024, 100 * 1024]
+#: number of lines of logged messages
+MESSAGE_LINES = 5000
+#: numbers of registered secrets of the full suite, and of the quick one
+SECRET_COUNTS = [10, 1000, 10000]
+QUICK_SECRET_COUNTS = [10, 1000]
+#: number of rows of job summary tables
+SUMMARY_ROWS = 100000
+#: number of files of a monorepo pull request, the most GitHub API lists
+CHANGED_FILES = 3000
+#: size in bytes of the file given to memoized methods
+MEMO_FILE_SIZE = 1024 * 1024
+#: ratio of a duration to its baseline from which it is reported as a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+class Suite:
+    """Runs benchmarks and collects their results."""
+
+    def __init__(self, work_dir: Path, *, quick: bool = False, name_filter: Optional[str] = None):
+        """
+        :param work_dir: where to write payloads and other files used by benchmarks
+        :param quick: whether to run fewer and smaller benchmarks, to check the suite itself
+        :param name_filter: only run benchmarks whose name contains this string
+        """
+        self.work_dir = work_dir
+        self.quick = quick
+        self.name_filter = name_filter
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def selected(self, name: str) -> bool:
+        """Tell whether a benchmark is selected by the name filter."""
+        return not self.name_filter or self.name_filter in name
+
+    def any_selected(self, *names: str) -> bool:
+        """Tell whether one of some benchmarks is selected, to skip their setup otherwise."""
+        return any(self.selected(name) for name in names)
+
+    def measure(self, name: str, function: Callable[[], Any], *, repeat: int = 5, number: int = 1, **params):
+        """
+        Record durations of a function.
+
+        :param name: name of the benchmark
+        :param function: what to measure
+        :param repeat: number of measures
+        :param number: number of calls per measure, for functions too fast to be measured alone
+        :param params: parameters of the benchmark, saved with its result
+        """
+        if not self.selected(name):
+            return
+        if self.quick:
+            repeat = min(repeat, 2)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            timings.append((time.perf_counter() - start) / number)
+        self.results[name] = {"unit": "s", "min": min(timings), "median": statistics.median(timings),
+                              "mean": statistics.mean(timings), "repeat": repeat, "number": number,
+                              "params": params}
+        print(f"{name}: {statistics.median(timings) * 1000:.3f} ms")
+
+    def record(self, name: str, value: float, unit: str, **params):
+        """Record a single value, like a memory size."""
+        if not self.selected(name):
+            return
+        self.results[name] = {"unit": unit, "value": value, "params": params}
+        print(f"{name}: {value} {unit}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return results and the context they were measured in."""
+        return {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "quick": self.quick,
+            "results": self.results,
+            }
+
+
+def size_label(size: int) -> str:
+    """Return a short label for a size in bytes, like 100KB."""
+    if size >= 1024 * 1024:
+        return f"{size // (1024 * 1024)}MB"
+    return f"{size // 1024}KB"
+
+
+def write_payload(path: Path, size: int) -> Path:
+    """
+    Write a synthetic pull request event payload of about the given size.
+
+    A long list of commits comes first, so that values searched in the pull request are at the end of the file.
+    """
+    commit = {"id": "6113728f27ae82c7b1a177c8d03f9e96e0adf246", "message": "Update README.md\n\nWith more details",
+              "author": {"name": "Monalisa Octocat", "email": "monalisa@example.com", "username": "monalisa"},
+              "added": ["docs/new.md"], "removed": [], "modified": ["README.md"]}
+    event = {
+        "action": "synchronize",
+        "commits": [],
+        "pull_request": {"number": 42, "title": "Update README", "state": "open", "draft": False,
+                         "created_at": "2021-01-01T10:00:00Z", "user": {"login": "monalisa"},
+                         "head": {"ref": "feature", "sha": "6113728f27ae82c7b1a177c8d03f9e96e0adf246"},
+                         "base": {"ref": "main", "sha": "a10867b14bb761a232cd80139fbd4c0d33264240"}},
+        "repository": {"name": "hello-world", "full_name": "octocat/hello-world", "owner": {"login": "octocat"}},
+        }
+    count = max(0, (size - len(json.dumps(event))) // (len(json.dumps(commit)) + 2))
+    event["commits"] = [commit] * count
+    path.write_text(json.dumps(event), encoding="utf-8")
+    return path
+
+
+def _payloads(suite: Suite, *prefixes: str) -> Iterator[Path]:
+    """Yield payloads of the sizes of the suite, only writing those having a benchmark selected among prefixes."""
+    for size in QUICK_PAYLOAD_SIZES if suite.quick else PAYLOAD_SIZES:
+        label = size_label(size)
+        if suite.any_selected(*(f"{prefix}/{label}" for prefix in prefixes)):
+            yield write_payload(suite.work_dir / f"event-{label}.json", size)
+
+
+def bench_payload_find(suite: Suite):
+    """json_find on a loaded payload, and event_payload_find on a payload file read for this single value."""
+    for path in _payloads(suite, "json_find", "event_payload_find"):
+        label = path.stem.split("-")[1]
+        env = {"GITHUB_EVENT_PATH": str(path)}
+        if suite.selected(f"json_find/{label}"):
+            tree = GitHubEnvironment(env).event_payload
+            suite.measure(f"json_find/{label}", lambda: json_find(tree, "pull_request/head/sha"), number=1000,
+                          size=path.stat().st_size)
+        suite.measure(f"event_payload_find/{label}",
+                      lambda: GitHubEnvironment(env).event_payload_find("pull_request/head/sha"),
+                      size=path.stat().st_size)
+
+
+def bench_payload_load(suite: Suite):
+    """event_payload load time and peak memory."""
+    for path in _payloads(suite, "event_payload", "event_payload_peak_memory"):
+        label = path.stem.split("-")[1]
+        env = {"GITHUB_EVENT_PATH": str(path)}
+        suite.measure(f"event_payload/{label}", lambda: GitHubEnvironment(env).event_payload, repeat=3,
+                      size=path.stat().st_size)
+        name = f"event_payload_peak_memory/{label}"
+        if suite.selected(name):
+            tracemalloc.start()
+            GitHubEnvironment(env).event_payload  # pylint: disable=W0106
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            suite.record(name, peak, "bytes", size=path.stat().st_size)
+
+
+def bench_log_messages(suite: Suite):
+    """Throughput of debug, warning and error on multi-line messages, written to /dev/null."""
+    message = "\n".join(f"Line {index} of a long message, like a command output" for index in range(MESSAGE_LINES))
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        action = GitHubAction(GitHubEnvironment({}), CommandWriter(devnull))
+        for method in (action.debug, action.warning, action.error):
+            def log(method=method):
+                method(message)
+                action.flush_commands()
+            suite.measure(f"log_lines/{method.__name__}", log, repeat=10, lines=MESSAGE_LINES)
+
+
+def bench_log_dump(suite: Suite):
+    """log_dump of a loaded payload with default budgets, whose cost should not grow with the payload size."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for path in _payloads(suite, "log_dump"):
+            label = path.stem.split("-")[1]
+            action = GitHubAction(GitHubEnvironment({"GITHUB_EVENT_PATH": str(path)}), CommandWriter(devnull))
+            payload = action.github_env.event_payload
+
+            def dump():
+                action.log_dump("Payload", payload)
+                action.flush_commands()
+            suite.measure(f"log_dump/{label}", dump, repeat=5, size=path.stat().st_size)
+
+
+def bench_summary(suite: Suite):
+    """Job summary table of 100k rows streamed to a file, without and with the default size budget, and peak memory."""
+    path = suite.work_dir / "summary.md"
+
+    def write_table(max_bytes: int):
+        with path.open("w", encoding="utf-8") as summary_file:
+            summary = StepSummary(CommandWriter(summary_file), max_bytes=max_bytes)
+            with summary.table(["File", "Line", "Message"]) as table:
+                table.add_rows((f"src/module{index % 100}.py", index, "Line too long (125 > 120 characters)")
+                               for index in range(SUMMARY_ROWS))
+            summary.flush()
+    suite.measure("summary_table/100k_rows", lambda: write_table(10 ** 9), repeat=3, rows=SUMMARY_ROWS)
+    suite.measure("summary_table/100k_rows_budget", lambda: write_table(MAX_SUMMARY_BYTES), repeat=3,
+                  rows=SUMMARY_ROWS)
+    name = "summary_table_peak_memory/100k_rows"
+    if suite.selected(name):
+        tracemalloc.start()
+        write_table(10 ** 9)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        suite.record(name, peak, "bytes", rows=SUMMARY_ROWS, size=path.stat().st_size)
+
+
+class _IndexAction(GitHubAction):
+    @memoize(by_commit=False)
+    def index_lines(self, path: Path) -> Dict[str, List[int]]:
+        """Index lines of a file by first word, standing for an expensive analysis of a file."""
+        index: Dict[str, List[int]] = {}
+        with path.open(encoding="utf-8") as lines:
+            for number, line in enumerate(lines, 1):
+                index.setdefault(line.split(" ", 1)[0], []).append(number)
+        return index
+
+
+def bench_memo(suite: Suite):
+    """Memoized analysis of a 1 MiB file: computed and stored in a new cache, then read back from the cache."""
+    if not suite.any_selected("memo/miss", "memo/hit"):
+        return
+    path = suite.work_dir / "memo-input.txt"
+    line = "word{} of a line of text, long enough to look like source code\n"
+    with path.open("w", encoding="utf-8") as memo_input:
+        for index in range(MEMO_FILE_SIZE // len(line.format(0))):
+            memo_input.write(line.format(index % 1000))
+    runs = iter(range(10 ** 6))
+
+    def miss():
+        action = _IndexAction(GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": str(suite.work_dir / f"memo{next(runs)}")}))
+        action.index_lines(path)
+    hit_env = GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": str(suite.work_dir / "memo")})
+    _IndexAction(hit_env).index_lines(path)
+    suite.measure("memo/miss", miss, repeat=5, size=MEMO_FILE_SIZE)
+    suite.measure("memo/hit", lambda: _IndexAction(hit_env).index_lines(path), repeat=5, size=MEMO_FILE_SIZE)
+
+
+def bench_changed_files(suite: Suite):
+    """
+    Index of the files of a monorepo pull request, and path filters of 50 components against it.
+
+    Each component selects its directory and excludes its tests; scanning all files with fnmatch for each pattern is
+    measured too, as a reference.
+    """
+    if not suite.any_selected("changed_files/index", "changed_files/filter", "changed_files_scan/filter"):
+        return
+    paths = [f"services/service{index % 50}/{kind}/module{index}.{'py' if index % 3 else 'md'}"
+             for index, kind in zip(range(CHANGED_FILES), ["src", "tests", "docs/api"] * CHANGED_FILES)]
+    filters = [[f"services/service{component}/**", "!**/tests/**"] for component in range(50)]
+    suite.measure("changed_files/index", lambda: ChangedFiles(ChangedFile(path) for path in paths), repeat=5,
+                  files=CHANGED_FILES)
+    changed_files = ChangedFiles(ChangedFile(path) for path in paths)
+    suite.measure("changed_files/filter", lambda: [changed_files.filter(patterns) for patterns in filters],
+                  repeat=5, files=CHANGED_FILES, filters=len(filters))
+
+    def scan():
+        for include, exclude in filters:
+            excluded = exclude[1:]
+            [path for path in paths if fnmatch.fnmatchcase(path, include) and not fnmatch.fnmatchcase(path, excluded)]
+    suite.measure("changed_files_scan/filter", scan, repeat=5, files=CHANGED_FILES, filters=len(filters))
+
+
+def bench_without_commands(suite: Suite):
+    """Overhead of entering and exiting without_commands, with a generated token or a given one."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        action = GitHubAction(GitHubEnvironment({}), CommandWriter(devnull))
+
+        def generated_token():
+            with action.without_commands():
+                pass
+
+        def given_token():
+            with action.without_commands("token"):
+                pass
+        suite.measure("without_commands/generated_token", generated_token, number=1000)
+        suite.measure("without_commands/given_token", given_token, number=1000)
+
+
+def bench_masking(suite: Suite):
+    """
+    Registration of secrets, at once or one by one between log messages, and scrubbing of a long message with one
+    secret every 10 lines.
+
+    Scrubbing with a plain alternation of all secrets is measured too up to 1,000 secrets, as a reference growing with
+    the number of secrets.
+    """
+    for count in QUICK_SECRET_COUNTS if suite.quick else SECRET_COUNTS:
+        if not suite.any_selected(*(f"{prefix}/{count}" for prefix in (
+                "mask_register", "mask_register_one_by_one", "mask_scrub", "mask_scrub_alternation"))):
+            continue
+        secrets = [hashlib.sha1(str(index).encode()).hexdigest() for index in range(count)]
+        lines = [f"Line {index} of a long message, like a command output" for index in range(MESSAGE_LINES)]
+        lines[::10] = [f"Line {index} of a long message with {secrets[index % count]}"
+                       for index in range(0, MESSAGE_LINES, 10)]
+        message = "\n".join(lines)
+
+        def register():
+            # Measure compilation, not the cache of the re module
+            re.purge()
+            masks = MaskRegistry()
+            masks.add(secrets)
+            masks.scrub("")
+
+        def register_one_by_one():
+            re.purge()
+            masks = MaskRegistry()
+            for secret in secrets:
+                masks.add([secret])
+                masks.scrub("Registered a secret")
+        suite.measure(f"mask_register/{count}", register, repeat=3, secrets=count)
+        suite.measure(f"mask_register_one_by_one/{count}", register_one_by_one, repeat=1, secrets=count)
+        masks = MaskRegistry()
+        masks.add(secrets)
+        suite.measure(f"mask_scrub/{count}", lambda: masks.scrub(message), repeat=5, secrets=count,
+                      lines=MESSAGE_LINES)
+        if count <= 1000:
+            alternation = re.compile("|".join(map(re.escape, secrets)))
+            suite.measure(f"mask_scrub_alternation/{count}", lambda: alternation.sub("***", message), repeat=3,
+                          secrets=count, lines=MESSAGE_LINES)
+
+
+def bench_cold_start(suite: Suite):
+    """Duration of a whole action-entrypoint process running an action doing nothing, and of a bare interpreter."""
+    if not suite.any_selected("cold_start/interpreter", "cold_start/entrypoint"):
+        return
+    env = {key: value for key, value in os.environ.items() if key != "ACTION_SERVER_SOCKET"}
+    env["GITHUB_EVENT_PATH"] = str(write_payload(suite.work_dir / "event-cold-start.json", 1024))
+
+    def run(*args: str):
+        subprocess.run([sys.executable, *args], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    suite.measure("cold_start/interpreter", lambda: run("-c", "pass"), repeat=10)
+    suite.measure("cold_start/entrypoint", lambda: run("-m", "github_action_template.entrypoint",
+                                                       "benchmarks.actions.NoopAction"), repeat=10)
+
+
+def _fake_github() -> FakeGitHub:
+    """Return a fake GitHub API answering the requests sent by API benchmarks."""
+    fake = FakeGitHub(page_size=100)
+    fake.add("GET", "/repos/o/r/pulls/42", {"number": 42, "title": "Update README", "body": "x" * 2000},
+             headers={"ETag": '"benchmark"'})
+    fake.add("GET", "/items", list(range(500)))
+    connection = {"totalCount": 1, "pageInfo": {"hasNextPage": False, "endCursor": None}}
+    pull_request = {
+        "number": 42, "title": "Update README",
+        "files": {**connection, "nodes": [{"path": "README.md", "additions": 1, "deletions": 0}]},
+        "reviews": {**connection, "nodes": []}, "labels": {**connection, "nodes": [{"name": "docs"}]},
+        "commits": {"nodes": [{"commit": {"oid": "6113728f", "statusCheckRollup": None}}]},
+        }
+    fake.add("POST", "/graphql", {"data": {"repository": {"pullRequest": pull_request}}})
+    return fake
+
+
+def bench_api(suite: Suite):
+    """github_api requests with and without response cache, GraphQL context query and async pagination."""
+    if not suite.any_selected("api/rest_get", "api/rest_get_revalidated", "api/graphql_pull_request_context",
+                              "api/async_paginate"):
+        return
+    event_path = write_payload(suite.work_dir / "event-api.json", 1024)
+    with _fake_github() as fake:
+        url = fake.url
+        env = {"GITHUB_TOKEN": "token", "GITHUB_EVENT_NAME": "pull_request", "GITHUB_EVENT_PATH": str(event_path),
+               "ACTION_API_CACHE_DIR": "", **fake.env()}
+        action = _api_action(env)
+        suite.measure("api/rest_get", lambda: action.github_api.session.get(f"{url}/repos/o/r/pulls/42").json(),
+                      number=50)
+        cached_action = _api_action({**env, "ACTION_API_CACHE_DIR": str(suite.work_dir / "api-cache")})
+        suite.measure("api/rest_get_revalidated",
+                      lambda: cached_action.github_api.session.get(f"{url}/repos/o/r/pulls/42").json(), number=50)
+        suite.measure("api/graphql_pull_request_context", action.get_pull_request_context, number=50)
+        if suite.selected("api/async_paginate"):
+            try:
+                import aiohttp  # noqa: F401 pylint: disable=C0415,W0611
+            except ImportError:
+                print("api/async_paginate: skipped, aiohttp is not installed")
+            else:
+                suite.measure("api/async_paginate", lambda: asyncio.run(_paginate(_api_action(env))), number=5,
+                              pages=5)
+
+
+def _api_action(env: Dict[str, str]) -> GitHubAction:
+    action = GitHubAction(GitHubEnvironment(env), MemoryCommandWriter())
+    # Measure the API helpers, not the pacing of requests
+    action.rate_limiter = RateLimiter(rate=1e9, burst=10 ** 9)
+    return action
+
+
+async def _paginate(action: GitHubAction) -> List[Any]:
+    async def collect():
+        return [item async for item in action.async_github_api.paginate("/items")]
+    return await action.run_coroutine(collect())
+
+
+BENCHMARKS = [bench_payload_find, bench_payload_load, bench_log_messages, bench_log_dump, bench_summary, bench_memo,
+              bench_changed_files, bench_without_commands, bench_masking, bench_cold_start, bench_api]
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare results with baseline ones.
+
+    :return: a description of each result worse than its baseline by at least the threshold ratio
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if not base or base["unit"] != result["unit"]:
+            continue
+        key = "median" if "median" in result else "value"
+        if base[key] and result[key] / base[key] >= threshold:
+            regressions.append(f"{name}: {result[key]:.6g} {result['unit']} vs {base[key]:.6g} "
+                               f"({result[key] / base[key]:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run benchmarks, then save results and compare them with a baseline if requested."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, help="JSON file to save results to")
+    parser.add_argument("--compare", type=Path, help="JSON file of baseline results to compare with")
+    parser.add_argument("--quick", action="store_true", help="run fewer and smaller benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        suite = Suite(Path(work_dir), quick=args.quick, name_filter=args.filter)
+        for benchmark in BENCHMARKS:
+            benchmark(suite)
+    results = suite.as_dict()
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Define transport adapters for requests sessions used to call GitHub API, such as github3 sessions."""
+import time
+from typing import Callable, Optional
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from requests.utils import get_encoding_from_headers
+
+from github_action_template.httpcache import CacheEntry, ResponseCache
+from github_action_template.metrics import Metrics
+from github_action_template.ratelimit import RATE_LIMIT_STATUSES, RateLimiter
+
+
+#: headers describing the transfer of a body rather than the body itself, that cannot be replayed from cache
+_TRANSFER_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+
+class GitHubAdapter(HTTPAdapter):
+    """
+    A transport adapter pacing and retrying requests according to GitHub rate limits.
+
+    It may also cache GET responses and revalidate them with conditional requests, and record request metrics.
+    """
+
+    #: connection pools used by all adapters instead of their own ones, see share_connections
+    shared_pool_manager: Optional[PoolManager] = None
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, *, cache: Optional[ResponseCache] = None,
+                 metrics: Optional[Metrics] = None, sleep: Callable[[float], None] = time.sleep, **kwargs):
+        """
+        :param rate_limiter: the scheduler of requests, or None to send them right away
+        :param cache: where to cache responses, or None to disable caching
+        :param metrics: where to record the count, status and latency of requests, retries included, or None
+        :param sleep: waits for a given number of seconds
+        :param kwargs: see HTTPAdapter
+        """
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self._sleep = sleep
+
+    @classmethod
+    def share_connections(cls, **pool_kwargs) -> PoolManager:
+        """
+        Make all adapters created from now on use the same connection pools.
+
+        Long-lived processes running many actions, like the action server, keep connections to GitHub open from an
+        action to the next one this way. Pools carry no credentials, which are sent in headers of each request.
+        :param pool_kwargs: see PoolManager
+        """
+        if cls.shared_pool_manager is None:
+            cls.shared_pool_manager = PoolManager(**pool_kwargs)
+        return cls.shared_pool_manager
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        if self.shared_pool_manager is not None:
+            self.poolmanager = self.shared_pool_manager
+
+    def close(self):
+        if self.poolmanager is not self.shared_pool_manager:
+            self.poolmanager.clear()
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:  # pylint: disable=W0221
+        if self.metrics is None:
+            return self._send_cached(request, **kwargs)
+        start = time.perf_counter()
+        response = self._send_cached(request, **kwargs)
+        self.metrics.record_request(request.method, response.status_code, time.perf_counter() - start,
+                                    from_cache=getattr(response, "from_cache", False))
+        return response
+
+    def _send_cached(self, request: PreparedRequest, **kwargs) -> Response:
+        """Send a request, or revalidate its cached response if any."""
+        if self.cache is None or request.method != "GET" or kwargs.get("stream"):
+            return self._send(request, **kwargs)
+
+        vary = request.headers.get("Accept", "")
+        entry = self.cache.lookup(request.method, request.url, vary)
+        if entry:
+            request.headers.update(entry.conditional_headers())
+        response = self._send(request, **kwargs)
+        if entry and response.status_code == 304:
+            self.cache.touch(entry)
+            return _cached_response(request, response, entry)
+        if response.status_code == 200:
+            headers = {name: value for name, value in response.headers.items()
+                       if name.lower() not in _TRANSFER_HEADERS}
+            self.cache.store(request.method, request.url, response.status_code, headers, response.content, vary)
+        return response
+
+    def _send(self, request: PreparedRequest, **kwargs) -> Response:
+        """Send a request, paced and retried by the rate limiter if any."""
+        if self.rate_limiter is None:
+            return super().send(request, **kwargs)
+        attempt = 0
+        while True:
+            self._wait(self.rate_limiter.reserve())
+            response = super().send(request, **kwargs)
+            body = response.text if response.status_code in RATE_LIMIT_STATUSES else ""
+            delay = self.rate_limiter.update(response.status_code, response.headers, body, attempt)
+            if delay is None:
+                return response
+            response.close()
+            self._wait(delay)
+            attempt += 1
+
+    def _wait(self, delay: float):
+        if delay > 0:
+            self._sleep(delay)
+
+    def mount_on(self, session: Session):
+        """Use this adapter for all HTTP and HTTPS requests of the given session."""
+        session.mount("https://", self)
+        session.mount("http://", self)
+
+
+def _cached_response(request: PreparedRequest, not_modified: Response, entry: CacheEntry) -> Response:
+    """Build a response from a cache entry revalidated by a 304 Not Modified response."""
+    response = Response()
+    response.status_code = entry.status
+    response.reason = "OK"
+    response.headers.update(entry.headers)
+    # Rate limit, date and other headers of the actual response are more recent
+    response.headers.update({name: value for name, value in not_modified.headers.items()
+                             if name.lower() not in _TRANSFER_HEADERS})
+    response._content = entry.body  # pylint: disable=W0212
+    response.url = request.url
+    response.request = request
+    response.connection = getattr(not_modified, "connection", None)
+    response.elapsed = not_modified.elapsed
+    response.encoding = get_encoding_from_headers(response.headers)
+    # Tells that the response content comes from cache, like CacheControl does
+    response.from_cache = True
+    return response
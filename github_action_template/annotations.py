@@ -0,0 +1,190 @@
+"""Define a collector of file annotations, and their upload to a check run with GitHub Checks API."""
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Session
+
+#: annotation levels of Checks API, from the most to the least severe
+LEVELS = ("failure", "warning", "notice")
+#: workflow command logging an annotation of each level
+COMMANDS = {"failure": "error", "warning": "warning", "notice": "notice"}
+#: maximum number of annotations per Checks API request
+CHECKS_BATCH_SIZE = 50
+
+
+class Annotation:
+    """A message about a range of lines of a file."""
+
+    __slots__ = ("path", "start_line", "end_line", "level", "message", "title", "column")
+
+    def __init__(self, path: str, start_line: int, message: str, *, level: str = "warning",
+                 end_line: Optional[int] = None, title: Optional[str] = None, column: int = 0):
+        """
+        :param path: the file path, relative to the repository root
+        :param start_line: the first line, starting at 1
+        :param message: what the annotation says
+        :param level: failure, warning or notice
+        :param end_line: the last line, start_line by default
+        :param title: a short title of the annotation, if any
+        :param column: the column of start_line, starting at 1, or 0 for the whole line
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown annotation level {level}, expecting one of {', '.join(LEVELS)}")
+        self.path = path
+        self.start_line = start_line
+        self.end_line = start_line if end_line is None else end_line
+        self.level = level
+        self.message = message
+        self.title = title
+        self.column = column
+
+    def key(self) -> Tuple[Any, ...]:
+        """Return what identifies this annotation, ordered by file, line and severity."""
+        return (self.path, self.start_line, self.column, self.end_line, LEVELS.index(self.level), self.message,
+                self.title or "")
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Annotation) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __lt__(self, other: "Annotation") -> bool:
+        return self.key() < other.key()
+
+    def __repr__(self) -> str:
+        return f"Annotation({self.path}:{self.start_line}, {self.level}, {self.message!r})"
+
+    def as_check_annotation(self) -> Dict[str, Any]:
+        """Return this annotation as a JSON object of Checks API."""
+        annotation = {"path": self.path, "start_line": self.start_line, "end_line": self.end_line,
+                      "annotation_level": self.level, "message": self.message}
+        if self.title:
+            annotation["title"] = self.title
+        # Checks API only accepts columns on single line annotations
+        if self.column and self.end_line == self.start_line:
+            annotation["start_column"] = annotation["end_column"] = self.column
+        return annotation
+
+
+class AnnotationCollector:
+    """Collects annotations once each, to log the most important ones or upload all of them. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._annotations: Dict[Annotation, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._annotations)
+
+    def add(self, annotation: Annotation) -> bool:
+        """Collect an annotation, and return whether it was not collected yet."""
+        with self._lock:
+            if annotation in self._annotations:
+                return False
+            self._annotations[annotation] = None
+            return True
+
+    def sorted(self) -> List[Annotation]:
+        """Return collected annotations sorted by file and line."""
+        with self._lock:
+            return sorted(self._annotations)
+
+    def top(self, limit: int) -> Tuple[List[Annotation], int]:
+        """
+        Return at most limit annotations of each level, the first ones by file and line, and the number of others.
+
+        The runner only shows a few annotations of each level per step.
+        """
+        selected = []
+        counts = dict.fromkeys(LEVELS, 0)
+        for annotation in self.sorted():
+            counts[annotation.level] += 1
+            if counts[annotation.level] <= limit:
+                selected.append(annotation)
+        return selected, len(self) - len(selected)
+
+
+class CheckRunUpload:
+    """
+    Uploads annotations to a new check run, in batches of CHECKS_BATCH_SIZE annotations.
+
+    The check run is created with the first batch and completed with the last one. If a request fails, its error is
+    raised and the upload can be resumed by calling run again: batches already sent are not sent again.
+    """
+
+    def __init__(self, session: "Session", check_runs_url: str, name: str, head_sha: str,
+                 annotations: List[Annotation], *, title: Optional[str] = None, summary: Optional[str] = None,
+                 conclusion: Optional[str] = None, batch_size: int = CHECKS_BATCH_SIZE):
+        """
+        :param session: the GitHub API session sending requests
+        :param check_runs_url: URL of check runs of the repository
+        :param name: the name of the check run
+        :param head_sha: the commit SHA of the check run
+        :param annotations: the annotations to upload
+        :param title: the title of the check run output, name by default
+        :param summary: the summary of the check run output, counting annotations of each level by default
+        :param conclusion: the conclusion of the check run: failure if there is any failure annotation by default,
+            neutral if there is any other annotation, success otherwise
+        :param batch_size: the number of annotations per request
+        """
+        self.session = session
+        self.check_runs_url = check_runs_url
+        self.name = name
+        self.head_sha = head_sha
+        self.title = title or name
+        self.summary = summary or _summary(annotations)
+        self.conclusion = conclusion or _conclusion(annotations)
+        self.batches = [annotations[start:start + batch_size] for start in range(0, len(annotations), batch_size)]
+        if not self.batches:
+            self.batches.append([])
+        #: the id of the check run, once created
+        self.check_run_id: Optional[int] = None
+        #: the number of batches sent
+        self.sent = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether all batches were sent."""
+        return self.sent == len(self.batches)
+
+    def run(self) -> int:
+        """
+        Send remaining batches, and return the id of the check run.
+
+        :raises OSError: if a request fails, requests errors being OSError
+        """
+        while not self.done:
+            last = self.sent == len(self.batches) - 1
+            body: Dict[str, Any] = {"output": {
+                "title": self.title,
+                "summary": self.summary,
+                "annotations": [annotation.as_check_annotation() for annotation in self.batches[self.sent]],
+                }}
+            if last:
+                body.update(status="completed", conclusion=self.conclusion)
+            if self.check_run_id is None:
+                body.update(name=self.name, head_sha=self.head_sha)
+                body.setdefault("status", "in_progress")
+                response = self.session.post(self.check_runs_url, json=body)
+            else:
+                response = self.session.patch(f"{self.check_runs_url}/{self.check_run_id}", json=body)
+            response.raise_for_status()
+            if self.check_run_id is None:
+                self.check_run_id = response.json()["id"]
+            self.sent += 1
+        return self.check_run_id
+
+
+def _summary(annotations: List[Annotation]) -> str:
+    counts = dict.fromkeys(LEVELS, 0)
+    for annotation in annotations:
+        counts[annotation.level] += 1
+    return ", ".join(f"{count} {level}{'' if count == 1 else 's'}" for level, count in counts.items())
+
+
+def _conclusion(annotations: List[Annotation]) -> str:
+    if any(annotation.level == "failure" for annotation in annotations):
+        return "failure"
+    return "neutral" if annotations else "success"
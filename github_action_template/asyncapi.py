@@ -0,0 +1,188 @@
+"""Define an asyncio client for GitHub REST API, to run many API calls concurrently."""
+import asyncio
+import re
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+
+from github_action_template.framework import ActionError
+from github_action_template.ratelimit import RateLimiter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+class APIError(ActionError):
+    """Raised when a GitHub API call fails."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        #: HTTP status of the failed response, or None if no response was received
+        self.status = status
+
+
+class APIResponse:
+    """The status, headers and decoded body of a GitHub API response."""
+
+    __slots__ = ("status", "headers", "data")
+
+    def __init__(self, status: int, headers: Mapping[str, str], data: Any):
+        self.status = status
+        #: headers with case-insensitive names
+        self.headers = headers
+        #: decoded JSON body, or text body if the response is not JSON, or None if there is no body
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"APIResponse(status={self.status})"
+
+
+class AsyncGitHubAPI:
+    """
+    Asynchronous GitHub REST API client, with a connection pool shared by all requests.
+
+    At most `concurrency` requests are in progress at the same time, others wait for their turn. The client must be
+    used by a single event loop and closed when done, for instance with `async with`.
+    Requires aiohttp, see the 'async' extra of this package.
+    """
+
+    def __init__(self, api_url: str, token: Optional[str] = None, *, concurrency: int = 10, timeout: float = 30,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        :param api_url: the GitHub API URL, see GitHubEnvironment.api_url
+        :param token: a token to authenticate with, see GitHubEnvironment.secret_token
+        :param concurrency: maximum number of requests in progress at the same time
+        :param timeout: maximum duration of a request in seconds
+        :param rate_limiter: the scheduler of requests, or None to send them right away
+        """
+        if aiohttp is None:
+            raise ActionError("aiohttp must be installed to use asynchronous GitHub API, see 'async' extra")
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self._headers = {"Accept": "application/vnd.github.v3+json", "User-Agent": "github-action-template"}
+        if token:
+            self._headers["Authorization"] = f"token {token}"
+        # Created on first request, as they are bound to the running event loop
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncGitHubAPI":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def url(self, path: str) -> str:
+        """Return the full URL for an API path like /repos/octocat/Hello-World, or the given URL if already full."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(headers=self._headers, connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def request(self, method: str, path: str, *, params: Optional[Dict[str, Any]] = None,
+                      json: Optional[Any] = None, headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        """
+        Send a request to GitHub API.
+
+        :param method: HTTP method like GET or POST
+        :param path: an API path like /repos/octocat/Hello-World, or a full URL
+        :param params: query parameters
+        :param json: a body to send as JSON
+        :param headers: additional request headers
+        :return: the response, if successful
+        :raises APIError: if the request cannot be sent or the response status is not successful
+        """
+        session = self._get_session()
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await _wait(self.rate_limiter.reserve())
+            async with self._semaphore:
+                try:
+                    async with session.request(method, self.url(path), params=params, json=json,
+                                               headers=headers) as response:
+                        data = await _read_body(response)
+                        api_response = APIResponse(response.status, response.headers.copy(), data)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                    raise APIError(f"{method} {path} failed: {error.__class__.__name__}: {error}") from error
+            message = data.get("message") if isinstance(data, dict) else data
+            delay = self.rate_limiter.update(api_response.status, api_response.headers, str(message or ""),
+                                             attempt) if self.rate_limiter else None
+            if delay is None:
+                break
+            await _wait(delay)
+            attempt += 1
+        if api_response.status >= 400:
+            raise APIError(f"{method} {path} failed with status {api_response.status}: {message}",
+                           api_response.status)
+        return api_response
+
+    async def get(self, path: str, **kwargs) -> Any:
+        """Send a GET request and return the decoded response body."""
+        return (await self.request("GET", path, **kwargs)).data
+
+    async def post(self, path: str, **kwargs) -> Any:
+        """Send a POST request and return the decoded response body."""
+        return (await self.request("POST", path, **kwargs)).data
+
+    async def patch(self, path: str, **kwargs) -> Any:
+        """Send a PATCH request and return the decoded response body."""
+        return (await self.request("PATCH", path, **kwargs)).data
+
+    async def put(self, path: str, **kwargs) -> Any:
+        """Send a PUT request and return the decoded response body."""
+        return (await self.request("PUT", path, **kwargs)).data
+
+    async def delete(self, path: str, **kwargs) -> Any:
+        """Send a DELETE request and return the decoded response body."""
+        return (await self.request("DELETE", path, **kwargs)).data
+
+    async def paginate(self, path: str, *, params: Optional[Dict[str, Any]] = None,
+                       per_page: int = 100) -> AsyncIterator[Any]:
+        """
+        Yield all items of a paginated list, following the next links of responses.
+
+        :param path: an API path returning a list, like /repos/octocat/Hello-World/pulls
+        :param params: query parameters for the first page
+        :param per_page: number of items per page
+        """
+        url: Optional[str] = path
+        params = {**(params or {}), "per_page": per_page}
+        while url:
+            response = await self.request("GET", url, params=params)
+            for item in response.data or ():
+                yield item
+            match = _NEXT_LINK.search(response.headers.get("Link", ""))
+            # Next links already contain all query parameters
+            url, params = (match.group(1), None) if match else (None, None)
+
+    async def close(self):
+        """Close all connections; the client can still be used afterwards, with new connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def _wait(delay: float):
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def _read_body(response: "aiohttp.ClientResponse") -> Any:
+    """Decode a response body as JSON if possible, or else as text."""
+    if response.status == 204:
+        return None
+    if response.content_type == "application/json":
+        return await response.json()
+    return await response.text() or None
@@ -0,0 +1,112 @@
+"""Define the storage shared by persistent caches: a directory of entry files, evicted by age and total size."""
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+
+class CacheDirectory:
+    """
+    Stores cache entries as files of a directory, one file per entry named with the suffix of the subclass.
+
+    Files are written atomically and not tied to the process writing them, so the directory can be shared by
+    concurrent processes and persisted between workflow runs, for instance with actions/cache. The modification time
+    of an entry is the last time it was stored or used: least recently used entries are removed when the directory
+    exceeds max_size, and entries not used for max_age are removed too.
+    """
+
+    #: file name suffix of entries, so that other files of the directory are left alone
+    suffix = ".entry"
+
+    def __init__(self, directory: Path, *, max_size: int, max_age: float, clock: Callable[[], float] = time.time):
+        """
+        :param directory: where to store entries, created on first store
+        :param max_size: maximum total size in bytes of entries
+        :param max_age: maximum time in seconds since an entry was last stored or used
+        :param clock: returns current time in seconds since epoch
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self._clock = clock
+        # Size of the directory, computed on first store then kept up to date
+        self._size: Optional[int] = None
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _expired(self, path: Path) -> bool:
+        """
+        Return whether an entry was not used for max_age.
+
+        :raises OSError: if the entry cannot be read, FileNotFoundError if it does not exist
+        """
+        return self._clock() - path.stat().st_mtime > self.max_age
+
+    def _touch(self, path: Path):
+        """Record that an entry has just been used, so that it is evicted after less recently used ones."""
+        try:
+            now = self._clock()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def _write(self, path: Path, data: bytes) -> bool:
+        """Write an entry atomically, prune the directory if it gets too large, and return whether it was written."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            old_size = path.stat().st_size if path.exists() else 0
+            file_descriptor, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "wb") as temp_file:
+                    temp_file.write(data)
+                os.replace(temp_name, path)
+            except OSError:
+                # Temporary files are not entries, prune would never remove them
+                _remove(Path(temp_name))
+                raise
+        except OSError:
+            return False
+        self._touch(path)
+        self._size += len(data) - old_size
+        if self._size > self.max_size:
+            self.prune()
+        return True
+
+    def _remove(self, path: Path):
+        """Remove an entry, if it still exists."""
+        _remove(path)
+
+    def _entries(self) -> Iterator[Path]:
+        return self.directory.glob(f"*{self.suffix}")
+
+    def prune(self):
+        """Remove entries not used for max_age, then least recently used entries until size is below max_size."""
+        now = self._clock()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                _remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_size:
+                break
+            _remove(path)
+            self._size -= size
+
+
+def _remove(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
@@ -0,0 +1,264 @@
+"""Define an index of the files changed by a pull request, answering glob and directory queries without a scan."""
+import asyncio
+import functools
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from github_action_template.asyncapi import AsyncGitHubAPI
+
+#: maximum number of files of a pull request listed by GitHub REST API
+MAX_FILES = 3000
+#: maximum number of files per page of GitHub REST API
+FILES_PER_PAGE = 100
+
+_LAST_PAGE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+_WILDCARDS = re.compile(r"[*?\[]")
+
+
+class ChangedFile:
+    """A file changed by a pull request, as listed by GitHub REST API."""
+
+    __slots__ = ("filename", "status", "additions", "deletions", "previous_filename")
+
+    def __init__(self, filename: str, status: str = "modified", additions: int = 0, deletions: int = 0,
+                 previous_filename: Optional[str] = None):
+        """
+        :param filename: the path of the file, relative to the repository root
+        :param status: added, removed, modified, renamed, copied, changed or unchanged
+        :param additions: the number of added lines
+        :param deletions: the number of deleted lines
+        :param previous_filename: the path of the file before it was renamed, if it was
+        """
+        self.filename = filename
+        self.status = status
+        self.additions = additions
+        self.deletions = deletions
+        self.previous_filename = previous_filename
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> "ChangedFile":
+        """Return a file from an item of the pull request files API."""
+        return cls(item["filename"], item.get("status", "modified"), item.get("additions", 0),
+                   item.get("deletions", 0), item.get("previous_filename"))
+
+    def __repr__(self) -> str:
+        return f"ChangedFile({self.filename!r}, {self.status!r})"
+
+
+class _Node:
+    """A directory of a path trie, or a file when it has one."""
+
+    __slots__ = ("children", "file")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.file: Optional[ChangedFile] = None
+
+
+class ChangedFiles:
+    """
+    The files changed by a pull request, indexed by a trie of their path segments.
+
+    Queries walk the trie instead of every file: literal segments of a pattern are dictionary lookups, so that a query
+    only visits the directories it can match, and matching a directory of thousands of files does not depend on files
+    elsewhere. Results are in the order files were added, which is the path order of GitHub API.
+
+    Patterns are relative to the repository root, with GitHub path filter wildcards: `*` matches any characters but
+    `/`, `**` any characters including `/` (as a whole segment, zero or more directories), `?` any character but `/`
+    and `[...]` a character of a set. A pattern ending with `/` matches all files of a directory.
+    """
+
+    def __init__(self, files: Iterable[ChangedFile] = ()):
+        self._root = _Node()
+        self._files: Dict[str, ChangedFile] = {}
+        self._positions: Dict[str, int] = {}
+        for file in files:
+            self.add(file)
+
+    def add(self, file: ChangedFile):
+        """Add a file to the index, replacing a previous file of the same path."""
+        node = self._root
+        for segment in file.filename.split("/"):
+            node = node.children.setdefault(segment, _Node())
+        if node.file is None:
+            self._positions[file.filename] = len(self._positions)
+        node.file = self._files[file.filename] = file
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[ChangedFile]:
+        return iter(self._files.values())
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._positions
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickled as the list of files, much smaller than the trie and rebuilt in linear time
+        return ChangedFiles, (list(self),)
+
+    def __repr__(self) -> str:
+        return f"ChangedFiles({len(self)} files)"
+
+    def get(self, path: str) -> Optional[ChangedFile]:
+        """Return the changed file with the given path, or None if it did not change."""
+        return self._files.get(path)
+
+    def _node(self, segments: Iterable[str]) -> Optional[_Node]:
+        node: Optional[_Node] = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def under(self, directory: str) -> List[ChangedFile]:
+        """Return changed files in a directory and its subdirectories; an empty directory means the root."""
+        segments = [segment for segment in directory.split("/") if segment]
+        node = self._node(segments)
+        if node is None:
+            return []
+        return self._sorted({file.filename: file for file in _files_under(node)})
+
+    def match(self, pattern: str) -> List[ChangedFile]:
+        """Return changed files matching a glob pattern."""
+        return self._sorted(self._match(pattern))
+
+    def filter(self, patterns: Iterable[str]) -> List[ChangedFile]:
+        """
+        Return changed files matching path filters, like the paths of a workflow trigger.
+
+        Patterns apply in order: those starting with `!` exclude the files matched so far, others include files.
+        """
+        selected: Dict[str, ChangedFile] = {}
+        for pattern in patterns:
+            if pattern.startswith("!"):
+                # Only files selected so far are matched
+                regex = _regex(_normalize(pattern[1:]))
+                selected = {path: file for path, file in selected.items() if not regex.match(path)}
+            else:
+                selected.update(self._match(pattern))
+        return self._sorted(selected)
+
+    def matches(self, patterns: Iterable[str]) -> bool:
+        """Return whether any changed file matches path filters, see filter."""
+        return bool(self.filter(patterns))
+
+    def _sorted(self, files: Dict[str, ChangedFile]) -> List[ChangedFile]:
+        return [files[path] for path in sorted(files, key=self._positions.__getitem__)]
+
+    def _match(self, pattern: str) -> Dict[str, ChangedFile]:
+        """Return changed files matching a pattern, by path."""
+        segments = _normalize(pattern).split("/")
+        found: Dict[str, ChangedFile] = {}
+        # Directories matched by the segments before index, with their path
+        stack = [(self._root, "", 0)]
+        while stack:
+            node, prefix, index = stack.pop()
+            if index == len(segments):
+                if node.file:
+                    found[node.file.filename] = node.file
+                continue
+            segment = segments[index]
+            if "**" in segment:
+                # The rest of the pattern crosses directories: it is matched against paths of files in this directory
+                files = self._files.values() if node is self._root else _files_under(node)
+                if segment == "**" and index == len(segments) - 1:
+                    found.update((file.filename, file) for file in files)
+                else:
+                    regex = _regex("/".join(segments[index:]))
+                    found.update((file.filename, file) for file in files if regex.match(file.filename, len(prefix)))
+            elif _WILDCARDS.search(segment):
+                regex = _regex(segment)
+                stack.extend((child, f"{prefix}{name}/", index + 1) for name, child in node.children.items()
+                             if regex.match(name))
+            else:
+                child = node.children.get(segment)
+                if child:
+                    stack.append((child, f"{prefix}{segment}/", index + 1))
+        return found
+
+
+def _normalize(pattern: str) -> str:
+    """Return a pattern relative to the repository root, matching all files of a directory if it ends with a slash."""
+    pattern = pattern.lstrip("/")
+    if pattern.startswith("./"):
+        pattern = pattern[2:]
+    return f"{pattern}**" if pattern.endswith("/") else pattern
+
+
+def _files_under(node: _Node) -> Iterator[ChangedFile]:
+    """Yield files of the subdirectories of a node."""
+    stack = [node]
+    while stack:
+        for child in stack.pop().children.values():
+            if child.file:
+                yield child.file
+            if child.children:
+                stack.append(child)
+
+
+@functools.lru_cache(maxsize=256)
+def _regex(pattern: str) -> Pattern[str]:
+    """Return the regular expression matching whole paths matched by a glob pattern."""
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index):
+            index += 2
+            if pattern.startswith("/", index) and (index == 2 or pattern[index - 3] == "/"):
+                # Zero or more directories
+                parts.append("(?:.*/)?")
+                index += 1
+            else:
+                parts.append(".*")
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and "]" in pattern[index + 2:]:
+            end = pattern.index("]", index + 2)
+            chars = pattern[index + 1:end].replace("\\", "\\\\")
+            parts.append(f"[^{chars[1:]}]" if chars.startswith("!") else f"[{chars}]")
+            index = end
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+async def fetch_changed_files(api: "AsyncGitHubAPI", owner: str, repo_name: str, number: int, *,
+                              count: Optional[int] = None) -> ChangedFiles:
+    """
+    Fetch the files changed by a pull request, requesting pages concurrently.
+
+    When the number of changed files is known, for instance from the event payload, all pages are requested at once;
+    otherwise the first page tells how many pages follow. Pages past the expected ones are then requested one after
+    the other while they are full, in case the pull request changed in the meantime.
+    GitHub REST API lists MAX_FILES files at most.
+    :param api: the client sending requests
+    :param owner: the login of the repository owner
+    :param repo_name: the name of the repository
+    :param number: the number of the pull request
+    :param count: the number of changed files of the pull request, its changed_files property, if known
+    :raises APIError: if a request fails
+    """
+    path = f"/repos/{owner}/{repo_name}/pulls/{number}/files"
+    max_pages = MAX_FILES // FILES_PER_PAGE
+
+    async def page(page_number: int) -> List[Dict[str, Any]]:
+        return await api.get(path, params={"per_page": FILES_PER_PAGE, "page": page_number}) or []
+    if count is None:
+        first = await api.request("GET", path, params={"per_page": FILES_PER_PAGE, "page": 1})
+        match = _LAST_PAGE.search(first.headers.get("Link", ""))
+        last = min(int(match.group(1)), max_pages) if match else 1
+        pages = [first.data or [], *await asyncio.gather(*(page(index) for index in range(2, last + 1)))]
+    else:
+        last = min(max(1, -(-count // FILES_PER_PAGE)), max_pages)
+        pages = list(await asyncio.gather(*(page(index) for index in range(1, last + 1))))
+    while len(pages[-1]) == FILES_PER_PAGE and len(pages) < max_pages:
+        pages.append(await page(len(pages) + 1))
+    return ChangedFiles(ChangedFile.from_api(item) for items in pages for item in items)
@@ -0,0 +1,73 @@
+"""Define sinks used by GitHub actions to send workflow commands to the runner."""
+import io
+import sys
+from typing import Iterable, List, Optional, TextIO
+
+
+class CommandWriter:
+    """
+    Buffers workflow command lines and writes them to a text stream in batches.
+
+    Lines are joined and written with a single call when the buffer is full or when flush() is called, which is much
+    cheaper than one print() per line for actions logging thousands of lines.
+    Buffered lines are only visible in the log once flushed: anything printed directly to stdout in the meantime will
+    show up first.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, max_lines: int = 1000, max_chars: int = 64 * 1024):
+        """
+        :param stream: where to write command lines, or None to use whatever sys.stdout is at flush time
+        :param max_lines: number of buffered lines triggering a flush
+        :param max_chars: number of buffered characters triggering a flush
+        """
+        self._stream = stream
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self._lines: List[str] = []
+        self._chars = 0
+
+    @property
+    def stream(self) -> TextIO:
+        """The text stream where command lines are written."""
+        # Resolved at each flush so that redirections of sys.stdout are honored
+        return sys.stdout if self._stream is None else self._stream
+
+    def write(self, line: str):
+        """Buffer a single line, without its line terminator."""
+        self._lines.append(line)
+        self._chars += len(line) + 1
+        if len(self._lines) >= self.max_lines or self._chars >= self.max_chars:
+            self.flush()
+
+    def write_lines(self, lines: Iterable[str]):
+        """Buffer several lines, without their line terminators."""
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """Write all buffered lines to the stream at once."""
+        if self._lines:
+            stream = self.stream
+            stream.write("\n".join(self._lines) + "\n")
+            stream.flush()
+            self._lines.clear()
+            self._chars = 0
+
+    def close(self):
+        """Write all buffered lines and close the stream, unless it is stdout."""
+        self.flush()
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._stream.close()
+
+
+class MemoryCommandWriter(CommandWriter):
+    """A command writer keeping all lines in memory, mostly useful to test actions."""
+
+    def __init__(self):
+        super().__init__(io.StringIO())
+
+    @property
+    def lines(self) -> List[str]:
+        """All lines written so far, flushed or not."""
+        self.flush()
+        return self.stream.getvalue().splitlines()
@@ -2,33 +2,207 @@
 import importlib
 import os
 import sys
+import time
+from types import CoroutineType
+from typing import List, Mapping, Optional, Tuple
 
-from github_action_template.framework import ActionError, GitHubEnvironment
+from github_action_template.framework import ActionError, GitHubAction, GitHubEnvironment
+
+#: environment variable enabling profiling of actions, see profiling module
+PROFILE_VARIABLE = "ACTION_PROFILE"
+#: environment variable giving the Unix socket of an action server to run actions in, see server module
+SERVER_SOCKET_VARIABLE = "ACTION_SERVER_SOCKET"
+#: first argument running a pipeline of actions, see run
+PIPELINE_OPTION = "--pipeline"
+#: argument after PIPELINE_OPTION running next actions of a pipeline after an action fails
+CONTINUE_OPTION = "--continue-on-error"
+#: argument separating actions of a pipeline
+THEN_OPTION = "--then"
+_STEP_RESULTS = {0: "succeeded", 1: "not instantiated", 2: "failed"}
 
 
 def main() -> int:
-    """Just a wrapper to instantiate and call concrete Action implementation."""
+    """
+    Just a wrapper to instantiate and call concrete Action implementation, or a pipeline of actions, see run.
+
+    With --serve SOCKET [MODULE...] arguments, run an action server instead, see server module. When an action server
+    socket is given by ACTION_SERVER_SOCKET environment variable, the action is run by this server if it is available.
+    """
+    if sys.argv[1:2] == ["--serve"]:
+        if len(sys.argv) < 3:
+            print("::error::Missing socket path, usage: action-entrypoint --serve SOCKET [MODULE...]")
+            return 2
+        from github_action_template.server import serve  # pylint: disable=C0415
+        return serve(sys.argv[2], sys.argv[3:])
+    socket_path = os.environ.get(SERVER_SOCKET_VARIABLE)
+    if socket_path:
+        from github_action_template.server import forward  # pylint: disable=C0415
+        exit_code = forward(socket_path, sys.argv[1:], os.environ)
+        if exit_code is not None:
+            return exit_code
+        print(f"::debug::Action server {socket_path} is not available, running action in this process")
+    return run(sys.argv[1:], os.environ)
+
+
+def run(args: List[str], env: Mapping[str, str]) -> int:
+    """
+    Run the action, or the pipeline of actions, given by action-entrypoint arguments.
+
+    A pipeline is given by --pipeline [--continue-on-error] ACTION [ARG...] [--then ACTION [ARG...]]... arguments.
+    """
+    if args[:1] != [PIPELINE_OPTION]:
+        return run_action(args, env)
+    continue_on_error = args[1:2] == [CONTINUE_OPTION]
+    steps: List[Tuple[str, List[str]]] = []
+    for step_args in _split(args[2 if continue_on_error else 1:], THEN_OPTION):
+        if not step_args:
+            print(f"::error::Missing action in pipeline arguments {' '.join(args)}")
+            return 1
+        steps.append((step_args[0], step_args[1:]))
+    return run_pipeline(steps, env, continue_on_error=continue_on_error)
+
+
+def run_action(args: List[str], env: Mapping[str, str]) -> int:
+    """
+    Instantiate and run an action.
+
+    :param args: the FQ python class name of the action, then arguments passed down to the action
+    :param env: environment variables of the action
+    :return: 0 on success, 1 if the action cannot be instantiated, 2 if it fails
+    """
+    action_instance = _load_action(args[0], GitHubEnvironment(env))
+    if action_instance is None:
+        return 1
+    try:
+        exit_code = _run_loaded_action(action_instance, args[1:], env.get(PROFILE_VARIABLE))
+        action_instance.write_metrics(actions=[args[0]])
+    finally:
+        # Also writes the warning logged by write_metrics if metrics cannot be saved
+        action_instance.close_commands()
+    return exit_code
+
+
+def run_pipeline(steps: List[Tuple[str, List[str]]], env: Mapping[str, str], *, continue_on_error: bool = False) -> int:
+    """
+    Run actions one after the other in this process, then report how long each one took.
+
+    Actions share one GitHubEnvironment, so the event payload is parsed once, as well as GitHub API session and
+    outputs, see GitHubAction.continue_from.
+    :param steps: the FQ python class name and arguments of each action
+    :param env: environment variables of actions
+    :param continue_on_error: whether to run next actions after an action fails, instead of stopping
+    :return: 0 if all actions succeed, otherwise the highest exit code of an action, see run_action
+    """
+    github_env = GitHubEnvironment(env)
+    previous: Optional[GitHubAction] = None
+    exit_code = 0
+    report = []
+    try:
+        for step, (action_name, action_args) in enumerate(steps, 1):
+            if exit_code and not continue_on_error:
+                report.append(f"{action_name}: skipped")
+                continue
+            start = time.perf_counter()
+            action_instance = _load_action(action_name, github_env, previous, phase_prefix=f"{action_name}/")
+            if action_instance is None:
+                step_exit_code = 1
+            else:
+                # The same action can run several times in a pipeline, each run has its own profiles
+                step_exit_code = _run_loaded_action(action_instance, action_args, env.get(PROFILE_VARIABLE),
+                                                    phase_prefix=f"{action_name}/",
+                                                    profile_name=f"{step}-{action_name}")
+                previous = action_instance
+            exit_code = max(exit_code, step_exit_code)
+            report.append(f"{action_name}: {_STEP_RESULTS[step_exit_code]} in {time.perf_counter() - start:.3f}s")
+        print("Pipeline timing:")
+        for line in report:
+            print(f"  {line}")
+        if previous is not None:
+            previous.write_metrics(actions=[action_name for action_name, _ in steps])
+    finally:
+        # Actions of a pipeline share their environment files, see GitHubAction.continue_from; this also writes the
+        # warning logged by write_metrics if metrics cannot be saved
+        if previous is not None:
+            previous.close_commands()
+    return exit_code
+
+
+def _split(args: List[str], separator: str) -> List[List[str]]:
+    parts: List[List[str]] = [[]]
+    for arg in args:
+        if arg == separator:
+            parts.append([])
+        else:
+            parts[-1].append(arg)
+    return parts
+
+
+def _load_action(action_name: str, github_env: GitHubEnvironment, previous: Optional[GitHubAction] = None,
+                 phase_prefix: str = "") -> Optional[GitHubAction]:
+    """
+    Instantiate an action, or print an error and return None if it fails.
+
+    :param previous: the previous action of a pipeline, if any
+    :param phase_prefix: prepended to names of phases recorded in metrics
+    """
     try:
-        print(f"::debug::Loading action {sys.argv[1]}")
-        # First arg is the FQ python class name, the rest is passed down to the action
-        action_fqname = sys.argv[1].split(".")
+        print(f"::debug::Loading action {action_name}")
+        start = time.perf_counter()
+        # The FQ python class name
+        action_fqname = action_name.split(".")
         module = importlib.import_module(".".join(action_fqname[:-1]))
         class_ = getattr(module, action_fqname[-1])
-        action_instance = class_(GitHubEnvironment(os.environ))
+        loaded = time.perf_counter()
+        action_instance = class_(github_env)
+        if previous is not None:
+            action_instance.continue_from(previous)
+        action_instance.metrics.add_phase(f"{phase_prefix}load", loaded - start)
+        action_instance.metrics.add_phase(f"{phase_prefix}instantiate", time.perf_counter() - loaded)
         action_instance.debug("Action loaded successfully")
     except Exception as error:  # pylint: disable=W0703
-        print(f"::error::Cannot instantiate action '{sys.argv[1]}' because of {error.__class__.__name__}: {error}")
-        return 1
+        print(f"::error::Cannot instantiate action '{action_name}' because of {error.__class__.__name__}: {error}")
+        return None
+    return action_instance
+
 
+def _run_loaded_action(action_instance: GitHubAction, args: List[str], profile: Optional[str] = None,
+                       phase_prefix: str = "", profile_name: Optional[str] = None) -> int:
+    """
+    Run an action, and return 0 on success or 2 on failure.
+
+    :param profile: what to profile, see profiling module, or None to run the action without profiling
+    :param profile_name: file name of saved profiles, see Profiler
+    :param phase_prefix: prepended to the name of the run phase recorded in metrics
+    """
+    start = time.perf_counter()
     try:
-        action_instance.run(sys.argv[2:])
+        if profile:
+            from github_action_template.profiling import Profiler  # pylint: disable=C0415
+            with Profiler(profile, action_instance, name=profile_name):
+                _run(action_instance, args)
+        else:
+            _run(action_instance, args)
         return 0
     except ActionError as error:
-        print(f"::error::Exiting with error code because of action error: {error}")
+        message = f"Exiting with error code because of action error: {error}"
     except Exception as error:  # pylint: disable=W0703
-        print(f"::error::Unexpected error when running action: {error.__class__.__name__}: {error}")
+        message = f"Unexpected error when running action: {error.__class__.__name__}: {error}"
+    finally:
+        action_instance.metrics.add_phase(f"{phase_prefix}run", time.perf_counter() - start)
+        action_instance.debug_api_usage()
+        # Buffered commands must reach the log before the process exits, and before the error message below
+        action_instance.flush_commands()
+    print(f"::error::{action_instance.masks.scrub(message)}")
     return 2
 
 
+def _run(action_instance: GitHubAction, args: List[str]):
+    result = action_instance.run(args)
+    if isinstance(result, CoroutineType):
+        # Only actions with an async run method pay for asyncio import
+        import asyncio  # pylint: disable=C0415
+        asyncio.run(action_instance.run_coroutine(result))
+
+
 if __name__ == '__main__':
     sys.exit(main())
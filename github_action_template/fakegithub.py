@@ -0,0 +1,437 @@
+"""
+Define a local stand-in for GitHub REST and GraphQL API, to run actions offline in tests and load benchmarks.
+
+Interactions are either added by code, or recorded from the real API then saved to a fixture file, and replayed with
+configurable latency, pagination, rate limit headers and errors. Point an action to it with the environment variables
+returned by FakeGitHub.env(). It can also be run from the command line:
+
+    python -m github_action_template.fakegithub record fixture.json --port 8080
+    python -m github_action_template.fakegithub replay fixture.json --port 8080 --latency 0.05 --rate-limit 5000
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+#: where interactions are recorded from by default
+GITHUB_API_URL = "https://api.github.com"
+_PAGE_PARAMS = ("page", "per_page")
+# Request headers forwarded to GitHub in record mode, other ones describe the connection to this server
+_FORWARDED_HEADERS = ("accept", "authorization", "content-type", "user-agent", "if-none-match", "if-modified-since")
+# Response headers not recorded, as they describe the transfer of a response rather than the response itself
+_TRANSFER_HEADERS = ("connection", "content-encoding", "content-length", "transfer-encoding", "keep-alive")
+
+
+class Interaction:
+    """A request and the response to send back to it."""
+
+    __slots__ = ("method", "path", "request_body", "status", "headers", "body")
+
+    def __init__(self, method: str, path: str, body: Any = None, *, status: int = 200,
+                 headers: Optional[Dict[str, str]] = None, request_body: Any = None):
+        """
+        :param method: the request method, like GET
+        :param path: the request path, with its query string if any
+        :param body: the response body, as JSON value, or as bytes or str for other content types
+        :param status: the response status
+        :param headers: response headers
+        :param request_body: the JSON request body to match, or None to match any body
+        """
+        self.method = method.upper()
+        self.path = _normalize_path(path)
+        self.request_body = request_body
+        self.status = status
+        self.headers = dict(headers or {})
+        self.body = body
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return this interaction as a JSON object of a fixture file."""
+        body = self.body
+        text = None
+        if isinstance(body, bytes):
+            body, text = None, body.decode("utf-8", "replace")
+        elif isinstance(body, str) and not _is_json(self.headers):
+            body, text = None, body
+        return {"method": self.method, "path": self.path, "request_body": self.request_body, "status": self.status,
+                "headers": self.headers, "body": body, "text": text}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Interaction":
+        """Return an interaction from a JSON object of a fixture file."""
+        body = data.get("text") if data.get("text") is not None else data.get("body")
+        return cls(data["method"], data["path"], body, status=data.get("status", 200), headers=data.get("headers"),
+                   request_body=data.get("request_body"))
+
+
+class _Failure:
+    """Responses replacing the normal ones of requests matching a path pattern."""
+
+    __slots__ = ("pattern", "status", "message", "headers", "times")
+
+    def __init__(self, pattern: Pattern, status: int, message: str, headers: Dict[str, str], times: Optional[int]):
+        self.pattern = pattern
+        self.status = status
+        self.message = message
+        self.headers = headers
+        self.times = times
+
+
+class FakeGitHub:  # pylint: disable=R0902
+    """
+    A local HTTP server replaying GitHub API interactions, or recording them from the real API.
+
+    Interactions are matched on method, path with its query string and, if recorded, JSON request body; when several
+    interactions match, they are replayed in order, the last one being repeated. List responses matched without their
+    page and per_page query parameters are paginated like GitHub does, with Link headers.
+    URLs of the recorded API found in response bodies and headers are replaced with the URL of this server, so that
+    clients following them, like github3 does, keep on calling this server.
+    """
+
+    def __init__(self, fixture: Optional[Path] = None, *, record: bool = False, upstream: str = GITHUB_API_URL,
+                 latency: float = 0.0, page_size: Optional[int] = None, rate_limit: Optional[int] = None,
+                 rate_limit_reset: float = 3600.0, error_rate: float = 0.0, error_status: int = 502,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        :param fixture: a fixture file to load interactions from if it exists, and to save recorded ones to
+        :param record: whether to forward requests to upstream and record interactions, instead of replaying them
+        :param upstream: URL of the recorded API
+        :param latency: delay in seconds before sending each response
+        :param page_size: number of items per page of list responses when the request does not tell, or None to
+                          send whole lists to such requests
+        :param rate_limit: number of requests allowed per rate limit window, reported in X-RateLimit headers, or None
+                           for no rate limit
+        :param rate_limit_reset: duration in seconds of a rate limit window
+        :param error_rate: ratio of requests randomly failing with error_status
+        :param error_status: status of random failures
+        :param seed: seed of random failures, for reproducible runs
+        :param host: the address to listen to
+        :param port: the port to listen to, or 0 to use any free port
+        """
+        self.fixture = fixture
+        self.record = record
+        self.upstream = upstream.rstrip("/")
+        self.latency = latency
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.rate_limit_reset = rate_limit_reset
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.interactions: List[Interaction] = []
+        #: method and path of each received request
+        self.requests: List[Tuple[str, str]] = []
+        #: JSON body of each received request, None if it has no JSON body
+        self.request_bodies: List[Any] = []
+        self._random = random.Random(seed)
+        self._failures: List[_Failure] = []
+        self._replayed: Dict[int, int] = {}
+        self._used = 0
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self  # type: ignore
+        self._thread: Optional[threading.Thread] = None
+        if fixture and fixture.exists():
+            self.load(fixture)
+
+    @property
+    def url(self) -> str:
+        """The base URL of this server, to use as GitHub API URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Return environment variables pointing GitHubEnvironment.api_url and graphql_url to this server."""
+        return {"GITHUB_API_URL": self.url, "GITHUB_GRAPHQL_URL": f"{self.url}/graphql"}
+
+    def start(self) -> "FakeGitHub":
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests, and save interactions to the fixture file if recording."""
+        if self._thread:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.record and self.fixture:
+            self.save(self.fixture)
+
+    def __enter__(self) -> "FakeGitHub":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def add(self, method: str, path: str, body: Any = None, **kwargs) -> Interaction:
+        """Add an interaction to replay, see Interaction for parameters."""
+        interaction = Interaction(method, path, body, **kwargs)
+        with self._lock:
+            self.interactions.append(interaction)
+        return interaction
+
+    def fail(self, path_pattern: str, status: int = 500, message: str = "Server Error", *,
+             headers: Optional[Dict[str, str]] = None, times: Optional[int] = None):
+        """
+        Make requests whose path matches a regular expression fail.
+
+        For instance fail("/pulls", 403, "You have exceeded a secondary rate limit", headers={"Retry-After": "1"},
+        times=2) makes the next two requests to pull requests hit a secondary rate limit.
+        :param times: number of requests to fail, or None for all of them
+        """
+        with self._lock:
+            self._failures.append(_Failure(re.compile(path_pattern), status, message, dict(headers or {}), times))
+
+    def load(self, path: Path):
+        """Add interactions of a fixture file."""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        self.upstream = data.get("upstream", self.upstream).rstrip("/")
+        with self._lock:
+            self.interactions.extend(Interaction.from_dict(item) for item in data["interactions"])
+
+    def save(self, path: Path):
+        """Save interactions to a fixture file."""
+        with self._lock:
+            data = {"upstream": self.upstream, "interactions": [item.as_dict() for item in self.interactions]}
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    def respond(self, method: str, path: str, headers: Dict[str, str],
+                body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Return the status, headers and body of the response to a request.
+
+        :param method: the request method
+        :param path: the request path, with its query string
+        :param headers: the request headers, with lower case names
+        :param body: the request body
+        """
+        with self._lock:
+            self.requests.append((method, path))
+            self.request_bodies.append(_parse_json(body))
+            quota_headers, exceeded = self._consume_quota(path)
+            failure = self._failure(path)
+        if self.latency:
+            time.sleep(self.latency)
+        if failure:
+            status, response_headers, response_body = failure
+        elif exceeded:
+            status, response_headers = 403, {}
+            response_body = _json_body({"message": "API rate limit exceeded",
+                                        "documentation_url": "https://docs.github.com/rest/rate-limit"})
+        elif self.record:
+            status, response_headers, response_body = self._forward(method, path, headers, body)
+        else:
+            status, response_headers, response_body = self._replay(method, path, body)
+        return status, {**response_headers, **quota_headers}, response_body
+
+    def _consume_quota(self, path: str) -> Tuple[Dict[str, str], bool]:
+        """Count a request in the rate limit, and return rate limit headers and whether the limit is exceeded."""
+        if self.rate_limit is None:
+            return {}, False
+        now = time.time()
+        if now - self._window_start >= self.rate_limit_reset:
+            self._window_start, self._used = now, 0
+        self._used += 1
+        headers = {"X-RateLimit-Limit": str(self.rate_limit),
+                   "X-RateLimit-Remaining": str(max(0, self.rate_limit - self._used)),
+                   "X-RateLimit-Used": str(min(self._used, self.rate_limit)),
+                   "X-RateLimit-Reset": str(int(self._window_start + self.rate_limit_reset)),
+                   "X-RateLimit-Resource": "graphql" if urlsplit(path).path == "/graphql" else "core"}
+        return headers, self._used > self.rate_limit
+
+    def _failure(self, path: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """Return an injected error response for a request, if any."""
+        for failure in self._failures:
+            if failure.times != 0 and failure.pattern.search(path):
+                if failure.times is not None:
+                    failure.times -= 1
+                return failure.status, failure.headers, _json_body({"message": failure.message})
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status, {}, _json_body({"message": "Injected error"})
+        return None
+
+    def _replay(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        path = _normalize_path(path)
+        request_body = _parse_json(body)
+        interaction, paginate = self._match(method, path, request_body)
+        if interaction is None:
+            return 404, {}, _json_body({"message": f"No recorded interaction for {method} {path}"})
+        headers = {name: self._rewrite(value) for name, value in interaction.headers.items()}
+        response_body = interaction.body
+        if paginate and isinstance(response_body, list):
+            response_body = self._paginate(path, response_body, headers)
+        if isinstance(response_body, bytes):
+            return interaction.status, headers, response_body
+        if isinstance(response_body, str) and not _is_json(headers):
+            return interaction.status, headers, self._rewrite(response_body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        data = b"" if response_body is None else self._rewrite(json.dumps(response_body)).encode("utf-8")
+        return interaction.status, headers, data
+
+    def _match(self, method: str, path: str, request_body: Any) -> Tuple[Optional[Interaction], bool]:
+        """Return the interaction to replay for a request, and whether its list body must be paginated."""
+        base_path = _strip_page_params(path)
+        candidates: List[Tuple[int, Interaction, bool]] = []
+        with self._lock:
+            for exact_body in (True, False):
+                for index, item in enumerate(self.interactions):
+                    if item.method != method or (exact_body and item.request_body != request_body):
+                        continue
+                    if item.path == path:
+                        candidates.append((index, item, self.page_size is not None and base_path == path))
+                    elif item.path == base_path:
+                        candidates.append((index, item, True))
+                if candidates:
+                    break
+            if not candidates:
+                return None, False
+            key = id(candidates[0][1])
+            position = self._replayed.get(key, 0)
+            self._replayed[key] = position + 1
+        _, interaction, paginate = candidates[min(position, len(candidates) - 1)]
+        return interaction, paginate
+
+    def _paginate(self, path: str, items: List[Any], headers: Dict[str, str]) -> List[Any]:
+        """Return the requested page of items, and add a Link header to other pages."""
+        params = dict(parse_qsl(urlsplit(path).query))
+        per_page = int(params.get("per_page") or self.page_size or 30)
+        page = max(1, int(params.get("page") or 1))
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        for rel, number in (("prev", page - 1), ("next", page + 1), ("last", last), ("first", 1)):
+            if 1 <= number <= last and number != page:
+                links.append(f'<{self.url}{_with_params(path, page=number, per_page=per_page)}>; rel="{rel}"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        return items[(page - 1) * per_page:page * per_page]
+
+    def _forward(self, method: str, path: str, headers: Dict[str, str],
+                 body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request to upstream, record the interaction and return its response."""
+        forwarded = {name: value for name, value in headers.items() if name in _FORWARDED_HEADERS}
+        request = Request(self.upstream + path, data=body or None, headers=forwarded, method=method)
+        try:
+            with urlopen(request) as response:  # nosec: upstream is given by the user
+                status, response_headers, data = response.status, response.headers, response.read()
+        except HTTPError as error:
+            status, response_headers, data = error.code, error.headers, error.read()
+        recorded_headers = {name: value for name, value in response_headers.items()
+                            if name.lower() not in _TRANSFER_HEADERS and not name.lower().startswith("x-ratelimit")}
+        recorded_body = _parse_json(data) if _is_json(recorded_headers) else None
+        self.add(method, path, data if recorded_body is None else recorded_body, status=status,
+                 headers=recorded_headers, request_body=_parse_json(body))
+        if _is_json(recorded_headers):
+            data = self._rewrite(data.decode("utf-8", "replace")).encode("utf-8")
+        return status, {name: self._rewrite(value) for name, value in recorded_headers.items()}, data
+
+    def _rewrite(self, text: str) -> str:
+        return text.replace(self.upstream, self.url)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Sends requests to the FakeGitHub instance of the server."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which would wait for delayed acknowledgements otherwise
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        status, response_headers, data = self.server.fake.respond(self.command, self.path, headers, body)
+        self.send_response(status)
+        for name, value in response_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = do_HEAD = _handle
+
+
+def _normalize_path(path: str) -> str:
+    """Return a path with sorted query parameters, so that equivalent requests are matched."""
+    parts = urlsplit(path)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+def _strip_page_params(path: str) -> str:
+    parts = urlsplit(path)
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if key not in _PAGE_PARAMS])
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+def _with_params(path: str, **params: Any) -> str:
+    parts = urlsplit(_strip_page_params(path))
+    query = urlencode(sorted([*parse_qsl(parts.query, keep_blank_values=True), *params.items()]))
+    return f"{parts.path}?{query}"
+
+
+def _is_json(headers: Dict[str, str]) -> bool:
+    return any(name.lower() == "content-type" and "json" in value for name, value in headers.items())
+
+
+def _parse_json(data: bytes) -> Any:
+    if not data:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _json_body(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Record or replay GitHub API interactions until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("fixture", type=Path, help="fixture file to replay, or to save recorded interactions to")
+    parser.add_argument("--upstream", default=GITHUB_API_URL, help="URL of the API to record")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay in seconds before each response")
+    parser.add_argument("--page-size", type=int, help="default number of items per page of list responses")
+    parser.add_argument("--rate-limit", type=int, help="number of requests allowed per hour")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="ratio of requests failing randomly")
+    parser.add_argument("--seed", type=int, help="seed of random failures")
+    args = parser.parse_args(argv)
+
+    fake = FakeGitHub(args.fixture, record=args.mode == "record", upstream=args.upstream, latency=args.latency,
+                      page_size=args.page_size, rate_limit=args.rate_limit, error_rate=args.error_rate,
+                      seed=args.seed, host=args.host, port=args.port)
+    print(f"Fake GitHub API {args.mode}ing on {fake.url}, set GITHUB_API_URL={fake.url} and "
+          f"GITHUB_GRAPHQL_URL={fake.url}/graphql")
+    sys.stdout.flush()
+    with fake:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
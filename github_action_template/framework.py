@@ -1,16 +1,40 @@
 """Define a small GitHub action framework with classes like GitHubEnvironment or GitHubAction."""
+import functools
 import json
+import os
 import secrets
 import string
+import sys
+import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from github3 import GitHub, github
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from github_action_template.annotations import COMMANDS, Annotation, AnnotationCollector, CheckRunUpload
+from github_action_template.commands import CommandWriter
+from github_action_template.graphql import fetch_pull_request_context
+from github_action_template.jsonpath import JsonPath, PathLike, as_json_path, find_many
+from github_action_template.masking import MaskRegistry
+from github_action_template.metrics import Metrics
+from github_action_template.payload import load_json, select_json
+from github_action_template.pullrequest import PullRequestView
+from github_action_template.ratelimit import RateLimiter
+from github_action_template.summary import MAX_SUMMARY_BYTES, StepSummary
+
+if TYPE_CHECKING:  # pragma: no cover
+    from github3 import GitHub
+    from github3.pulls import PullRequest
+
+    from github_action_template.asyncapi import AsyncGitHubAPI
+    from github_action_template.changedfiles import ChangedFiles
+    from github_action_template.httpcache import ResponseCache
+    from github_action_template.memo import MemoCache
 
 # Don't worry this is just a string as random and unique as possible, not a security secret in any way
 _DEFAULT_TOKEN = "iop@efà@€@àfea@f@v@vekvevà@hdlizwhkl;vdciev"
 EVENT_PULL_REQUEST = "pull_request"
+_PULL_REQUEST_PATHS = [JsonPath("repository/owner/login"), JsonPath("repository/name"), JsonPath("pull_request/number")]
+_CHANGED_FILES_PATHS = [JsonPath("pull_request/head/sha"), JsonPath("pull_request/changed_files")]
 
 
 class GitHubEnvironment:  # pylint: disable=R0904
@@ -19,9 +43,13 @@ class GitHubEnvironment:  # pylint: disable=R0904
     See https://docs.github.com/en/actions/reference/environment-variables
     """
 
+    #: event payload files from this size (in bytes) are not fully loaded to find a few values in them
+    selective_payload_size = 1024 * 1024
+
     def __init__(self, env: Dict[str, str]):
         self.env = env
         self._cached_json_payload = None
+        self._cached_payload_values: Dict[str, Any] = {}
 
     def _mandatory_str(self, key) -> str:
         """Return value of an environment variable that should be defined, or raise an ActionError."""
@@ -157,6 +185,62 @@ class GitHubEnvironment:  # pylint: disable=R0904
         """
         return self._mandatory_str("GITHUB_TOKEN")
 
+    @property
+    def api_cache_dir(self) -> Optional[Path]:
+        """
+        The directory where GitHub API responses are cached, or None if the cache is disabled.
+
+        Defined by ACTION_API_CACHE_DIR environment variable, or .cache/github-api in home directory by default;
+        an empty ACTION_API_CACHE_DIR disables the cache.
+        """
+        directory = self.env.get("ACTION_API_CACHE_DIR")
+        if directory is None:
+            return self.home / ".cache" / "github-api"
+        return Path(directory) if directory else None
+
+    @property
+    def memo_cache_dir(self) -> Optional[Path]:
+        """
+        The directory where results of methods decorated with memoize are cached, or None if the cache is disabled.
+
+        Defined by ACTION_MEMO_CACHE_DIR environment variable, or .cache/github-action-memo in home directory by
+        default; an empty ACTION_MEMO_CACHE_DIR disables the cache.
+        """
+        directory = self.env.get("ACTION_MEMO_CACHE_DIR")
+        if directory is None:
+            return self.home / ".cache" / "github-action-memo"
+        return Path(directory) if directory else None
+
+    def _optional_path(self, key) -> Optional[Path]:
+        """Return value of an environment variable as a path, or None if not defined or empty."""
+        value = self.env.get(key)
+        return Path(value) if value else None
+
+    @property
+    def output_file(self) -> Optional[Path]:
+        """The path of the file where the runner collects the action's outputs, if defined."""
+        return self._optional_path("GITHUB_OUTPUT")
+
+    @property
+    def env_file(self) -> Optional[Path]:
+        """The path of the file where the runner collects environment variables for the next steps, if defined."""
+        return self._optional_path("GITHUB_ENV")
+
+    @property
+    def path_file(self) -> Optional[Path]:
+        """The path of the file where the runner collects directories to add to PATH for the next steps, if defined."""
+        return self._optional_path("GITHUB_PATH")
+
+    @property
+    def step_summary_file(self) -> Optional[Path]:
+        """The path of the file where the runner collects the markdown summary of the step, if defined."""
+        return self._optional_path("GITHUB_STEP_SUMMARY")
+
+    @property
+    def metrics_file(self) -> Optional[Path]:
+        """The path of the JSON file where action metrics are saved at exit, if defined by ACTION_METRICS_FILE."""
+        return self._optional_path("ACTION_METRICS_FILE")
+
     @property
     def event_payload(self) -> Dict[str, Any]:
         """
@@ -165,24 +249,99 @@ class GitHubEnvironment:  # pylint: disable=R0904
         :return: the result of JSON parsing as Python objects
         """
         # This is not thread safe, but actions are supposed to be run as a command-line execution.
-        if not self._cached_json_payload:
+        if self._cached_json_payload is None:
             try:
-                with self.event_path.open() as json_file:
-                    self._cached_json_payload = json.load(json_file)
+                self._cached_json_payload = load_json(self.event_path)
             except (OSError, ValueError) as error:
                 raise ActionError("Cannot get event payload data") from error
 
         return self._cached_json_payload
 
-    def event_payload_find(self, path: str, default: Optional[Any] = None) -> Optional[Any]:
+    def event_payload_find(self, path: PathLike, default: Optional[Any] = None) -> Optional[Any]:
         """
         Safely walk through event payload JSON tree to find a value for a given path.
 
-        :param path: slash-separated (case-sensitive) property names
-        :param default: optional default value if requested path does not empty or is empty
+        Unless already loaded, large payloads are not fully loaded: only the requested value is extracted.
+        :param path: slash-separated (case-sensitive) property names or list indexes, see JsonPath
+        :param default: optional default value if requested path does not exist or is null
         :return: piece of json at given path, or either None or default value if given
         """
-        return json_find(self.event_payload, path, default)
+        if self._cached_json_payload is None and self._is_large_payload():
+            return self.event_payload_select([path], default)[path]
+        return as_json_path(path).find(self.event_payload, default)
+
+    def event_payload_select(self, paths: Iterable[PathLike], default: Optional[Any] = None) -> Dict[PathLike, Any]:
+        """
+        Find values for several paths at once in the event payload.
+
+        If the whole payload is already loaded, it is walked only once for all paths. Otherwise, values are extracted
+        by a single read of the payload file that does not build the whole JSON tree, which is much faster and lighter
+        for huge payloads.
+        :param paths: slash-separated (case-sensitive) property names or list indexes, see JsonPath
+        :param default: optional default value for paths that do not exist or are null
+        :return: a dict of pieces of json by given path, or either None or default value if given
+        """
+        paths = list(paths)
+        if self._cached_json_payload is not None:
+            return find_many(self._cached_json_payload, paths, default)
+
+        # Only the leading property names of a path can be extracted from the file, the rest is found in that value
+        json_paths = {path: as_json_path(path) for path in paths}
+        prefixes = {path: json_path.keys_prefix for path, json_path in json_paths.items()}
+        if not all(prefixes.values()):
+            return find_many(self.event_payload, paths, default)
+
+        # This is not thread safe, but actions are supposed to be run as a command-line execution.
+        missing = [prefix for prefix in set(prefixes.values()) if prefix not in self._cached_payload_values]
+        if missing:
+            try:
+                values = select_json(self.event_path, missing)
+            except (OSError, ValueError) as error:
+                raise ActionError("Cannot get event payload data") from error
+            for prefix in missing:
+                self._cached_payload_values[prefix] = values.get(prefix)
+
+        found = {}
+        for path, json_path in json_paths.items():
+            value = self._cached_payload_values[prefixes[path]]
+            rest = json_path.relative_to(prefixes[path])
+            if rest:
+                found[path] = rest.find(value, default)
+            else:
+                found[path] = default if value is None else value
+        return found
+
+    def _is_large_payload(self) -> bool:
+        """Tell whether the event payload file is too large to be fully loaded just to find a few values."""
+        try:
+            return self.event_path.stat().st_size >= self.selective_payload_size
+        except OSError:
+            return False
+
+    def snapshot(self, optional: Iterable[str] = ()) -> "GitHubEnvironmentSnapshot":
+        """
+        Read and convert all GitHub environment variables at once.
+
+        This is a way to check the whole environment before doing anything, and to then read it with plain attribute
+        lookups.
+        :param optional: names of attributes whose environment variable is usually mandatory, but may be missing here;
+                         for instance "secret_token" for actions that do not use GitHub API
+        :return: an immutable snapshot of this environment
+        :raises ActionError: listing all missing or invalid environment variables
+        """
+        values = {}
+        errors = []
+        for name in GitHubEnvironmentSnapshot.__slots__:
+            try:
+                values[name] = getattr(self, name)
+            except ActionError as error:
+                if name in optional:
+                    values[name] = None
+                else:
+                    errors.append(str(error))
+        if errors:
+            raise ActionError("Invalid GitHub environment: " + ", ".join(errors))
+        return GitHubEnvironmentSnapshot(**values)
 
     def get(self, var_name: str, default: Optional[str] = None) -> Optional[str]:
         """
@@ -195,138 +354,645 @@ class GitHubEnvironment:  # pylint: disable=R0904
         return self.env.get(var_name, default)
 
 
+class GitHubEnvironmentSnapshot:  # pylint: disable=R0902
+    """
+    Immutable values of GitHub environment variables, as converted by GitHubEnvironment.
+
+    See GitHubEnvironment properties for a description of each attribute.
+    """
+
+    __slots__ = ("home", "workflow", "run_id", "run_number", "action", "actions", "actor", "repository", "event_name",
+                 "event_path", "workspace", "sha", "ref", "head_ref", "base_ref", "server_url", "api_url",
+                 "graphql_url", "secret_token", "output_file", "env_file", "path_file", "step_summary_file")
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"Cannot set {name}: GitHub environment snapshots are immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"Cannot delete {name}: GitHub environment snapshots are immutable")
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if name != "secret_token")
+        return f"GitHubEnvironmentSnapshot({values})"
+
+
+class _CommandHelper:
+    """
+    A command helper of GitHubAction, also callable on the class as when helpers were static methods.
+
+    Called on an action, the helper writes to its command writer. Called on the class, like GitHubAction.debug("..."),
+    it runs on an action of the process environment and its commands are written right away, so that code written
+    before commands were buffered keeps working; such calls do not share masks or outputs with running actions.
+    """
+
+    def __init__(self, method: Callable[..., Any]):
+        functools.update_wrapper(self, method)
+        self._method = method
+
+    def __get__(self, instance: Optional["GitHubAction"], owner: type) -> Callable[..., Any]:
+        if instance is not None:
+            return self._method.__get__(instance, owner)
+
+        @functools.wraps(self._method)
+        def call_on_class(*args: Any, **kwargs: Any) -> Any:
+            action = GitHubAction(GitHubEnvironment(os.environ))
+            try:
+                return self._method(action, *args, **kwargs)
+            finally:
+                action.close_commands()
+        return call_on_class
+
+
 class GitHubAction:
     """
     Superclass for a GitHub action to be implemented in Python.
 
     Provides a very basic framework for actions and a few utility methods.
+    The run method may also be a coroutine function, then the entrypoint runs it in an asyncio event loop.
     """
 
-    def __init__(self, github_env: GitHubEnvironment):
+    #: maximum number of concurrent requests sent with async_github_api
+    async_api_concurrency = 10
+    #: maximum total size in bytes of cached GitHub API responses, or 0 to disable the cache
+    api_cache_size = 50 * 1024 * 1024
+    #: maximum time in seconds a cached GitHub API response is kept without being used
+    api_cache_max_age = 7 * 24 * 3600
+    #: maximum total size in bytes of results cached by methods decorated with memoize, or 0 to disable the cache
+    memo_cache_size = 100 * 1024 * 1024
+    #: maximum time in seconds a memoized result is kept without being used
+    memo_cache_max_age = 7 * 24 * 3600
+    #: maximum number of lines of a dump logged by log_dump, beyond which it is truncated
+    log_dump_max_lines = 5000
+    #: maximum size in bytes of a dump logged by log_dump, beyond which it is truncated
+    log_dump_max_bytes = 512 * 1024
+    #: maximum number of annotations of each level logged by log_annotations, the runner showing only a few of them
+    annotation_commands_limit = 10
+    #: maximum size in bytes of the job summary written with summary, beyond which it is truncated
+    summary_max_bytes = MAX_SUMMARY_BYTES
+
+    def __init__(self, github_env: GitHubEnvironment, command_writer: Optional[CommandWriter] = None):
+        """
+        :param github_env: the GitHub environment this action runs in
+        :param command_writer: where to send workflow commands, or None to write them to stdout
+        """
         self.github_env = github_env
-        self._github_api: Optional[GitHub] = None
+        self.command_writer = command_writer or CommandWriter()
+        self._command_files: Dict[str, Optional[CommandWriter]] = {}
+        #: paces requests of all API clients of this action; replace it before any API use to tune it
+        self.rate_limiter = RateLimiter()
+        self._github_api: Optional["GitHub"] = None
+        self._api_cache: Optional["ResponseCache"] = None
+        self._memo_cache: Optional["MemoCache"] = None
+        self._async_github_api: Optional["AsyncGitHubAPI"] = None
+        #: outputs set by this action, and by previous actions of the same pipeline
+        self.outputs: Dict[str, str] = {}
+        #: durations and API request statistics of this run, saved to GitHubEnvironment.metrics_file at exit
+        self.metrics = Metrics()
+        #: secrets masked in logs, also replaced in messages written by this action, see add_masks
+        self.masks = MaskRegistry()
+        #: annotations collected with annotate, see log_annotations and upload_annotations
+        self.annotations = AnnotationCollector()
+        self._annotation_upload: Optional[CheckRunUpload] = None
+        self._summary: Optional[StepSummary] = None
+        self._changed_files: Optional["ChangedFiles"] = None
+
+    def continue_from(self, previous: "GitHubAction"):
+        """
+        Share the state of the previous action of a pipeline, before running this one.
+
+        Both actions then use the same GitHub API session, rate limiter, response and memo caches, environment files,
+        outputs, metrics, masks, annotations, job summary and changed files, so that this action reuses connections and
+        sees outputs set by previous actions.
+        The asynchronous API client is not shared, as it is bound to the event loop of an action.
+        """
+        self.rate_limiter = previous.rate_limiter
+        self._github_api = previous._github_api  # pylint: disable=W0212
+        self._api_cache = previous._api_cache  # pylint: disable=W0212
+        self._memo_cache = previous._memo_cache  # pylint: disable=W0212
+        self._command_files = previous._command_files  # pylint: disable=W0212
+        self.outputs = previous.outputs
+        self.metrics = previous.metrics
+        self.masks = previous.masks
+        self.annotations = previous.annotations
+        self._summary = previous._summary  # pylint: disable=W0212
+        self._changed_files = previous._changed_files  # pylint: disable=W0212
 
     @property
-    def github_api(self) -> GitHub:
+    def github_api(self) -> "GitHub":
         """
         See API documentation here https://github3py.readthedocs.io/en/master/api-reference/index.html
 
+        github3 and its dependencies are only imported on first access, so that actions not using it start faster.
         :return: a GitHub API client object, or raise an ActionError if connection fails
         """
         # This is not thread safe, but actions are supposed to be run as a command-line execution.
         if not self._github_api:
-            self._github_api = GitHub(token=self.github_env.secret_token)
+            from github_action_template.adapters import GitHubAdapter  # pylint: disable=C0415
+            # Through the module so that the lazy import below is used, and so that tests can patch it
+            self._github_api = sys.modules[__name__].GitHub(token=self.github_env.secret_token)
+            api_url = self.github_env.get("GITHUB_API_URL")
+            if api_url:
+                # For GitHub Enterprise Server, or a local stand-in like fakegithub.FakeGitHub
+                self._github_api.session.base_url = api_url.rstrip("/")
+            adapter = GitHubAdapter(self.rate_limiter, cache=self.api_cache, metrics=self.metrics)
+            adapter.mount_on(self._github_api.session)
         return self._github_api
 
-    @staticmethod
-    def set_env(name: str, value: str):
+    @property
+    def api_cache(self) -> Optional["ResponseCache"]:
+        """
+        The persistent cache of GitHub API responses used by github_api, or None if disabled.
+
+        Responses are revalidated with conditional requests so they are never stale, and most of them only cost a
+        304 Not Modified response that does not count in rate limits. Persist GitHubEnvironment.api_cache_dir between
+        runs, for instance with actions/cache, to benefit from it across runs.
+        """
+        if self._api_cache is None and self.api_cache_size > 0:
+            directory = self.github_env.api_cache_dir
+            if directory:
+                from github_action_template.httpcache import ResponseCache  # pylint: disable=C0415
+                self._api_cache = ResponseCache(directory, max_size=self.api_cache_size,
+                                                max_age=self.api_cache_max_age)
+        return self._api_cache
+
+    @property
+    def memo_cache(self) -> Optional["MemoCache"]:
+        """
+        The persistent cache of results of methods decorated with memoize, or None if disabled.
+
+        Results are stored in GitHubEnvironment.memo_cache_dir, to be persisted between runs with actions/cache.
+        """
+        if self._memo_cache is None and self.memo_cache_size > 0:
+            directory = self.github_env.memo_cache_dir
+            if directory:
+                from github_action_template.memo import DirectoryStore, MemoCache  # pylint: disable=C0415
+                self._memo_cache = MemoCache(DirectoryStore(directory, max_size=self.memo_cache_size,
+                                                            max_age=self.memo_cache_max_age))
+        return self._memo_cache
+
+    @property
+    def async_github_api(self) -> "AsyncGitHubAPI":
+        """
+        An asyncio GitHub API client, to send many requests concurrently from an async run method.
+
+        Requires aiohttp, see the 'async' extra of this package.
+        """
+        if not self._async_github_api:
+            # pylint: disable=C0415
+            from github_action_template.asyncapi import AsyncGitHubAPI
+            self._async_github_api = AsyncGitHubAPI(self.github_env.api_url, self.github_env.secret_token,
+                                                    concurrency=self.async_api_concurrency,
+                                                    rate_limiter=self.rate_limiter)
+        return self._async_github_api
+
+    async def run_coroutine(self, coroutine: Awaitable[Any]) -> Any:
+        """Await the coroutine returned by an async run method, then close asynchronous API connections."""
+        try:
+            return await coroutine
+        finally:
+            if self._async_github_api:
+                await self._async_github_api.close()
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Return a context logging what happens in it in a collapsed group, ended by its duration.
+
+        Durations are also recorded in metrics. Groups cannot be nested in logs, so neither can spans.
+        :param name: the title of the group, and the name of the span in metrics
+        """
+        name = self.masks.scrub(name)
+        self.command_writer.write(f"::group::{name}")
+        self.flush_commands()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.add_span(name, elapsed)
+            self.command_writer.write(f"{name} took {elapsed:.3f}s")
+            self.command_writer.write("::endgroup::")
+            self.flush_commands()
+
+    @property
+    def summary(self) -> StepSummary:
+        """
+        The job summary of this step, appended to GitHubEnvironment.step_summary_file as it is written.
+
+        Its size budget is summary_max_bytes, including what the file already holds. When the runner does not define
+        the file, what is written is dropped. Masked values are replaced.
+        """
+        if self._summary is None:
+            path = self.github_env.step_summary_file
+            size = path.stat().st_size if path and path.exists() else 0
+            self._summary = StepSummary(self._command_file("step_summary_file"), max_bytes=self.summary_max_bytes,
+                                        size=size, scrub=self.masks.scrub)
+        return self._summary
+
+    def write_metrics(self, **context: Any):
+        """
+        Save metrics to GitHubEnvironment.metrics_file, if defined.
+
+        :param context: values identifying the run, saved with metrics along with the repository, workflow and run
+        """
+        path = self.github_env.metrics_file
+        if not path:
+            return
+        for key, variable in (("repository", "GITHUB_REPOSITORY"), ("workflow", "GITHUB_WORKFLOW"),
+                              ("run_id", "GITHUB_RUN_ID"), ("run_number", "GITHUB_RUN_NUMBER"),
+                              ("event_name", "GITHUB_EVENT_NAME")):
+            context.setdefault(key, self.github_env.get(variable))
+        try:
+            self.metrics.write(path, **context)
+        except OSError as error:
+            self.warning(f"Cannot save metrics to {path}: {error}")
+
+    def debug_api_usage(self):
+        """Log API request counters and rate limit quota as a debug message, if any API request was sent."""
+        if self.rate_limiter.requests:
+            self.debug(self.rate_limiter.summary())
+
+    @_CommandHelper
+    def set_env(self, name: str, value: str):
         """
         Creates or updates an environment variable for any actions running next in a job.
 
         The action that creates or updates the environment variable does not have access to the new value, but all
         subsequent actions in a job will have access. Environment variables are case-sensitive and you can include
         punctuation.
+        Values are appended to the GITHUB_ENV file when the runner defines it, otherwise the deprecated set-env command
+        is used.
         """
-        print(f"::set-env name={name}::{value}")
+        env_file = self._command_file("env_file")
+        if env_file:
+            env_file.write_lines(key_value_lines(name, value))
+        else:
+            self.command_writer.write(f"::set-env name={name}::{value}")
 
-    @staticmethod
-    def set_output(name: str, value: str):
+    @_CommandHelper
+    def set_output(self, name: str, value: str):
         """
         Sets an action's output parameter.
 
         Optionally, you can also declare output parameters in an action's metadata file.
+        Values are appended to the GITHUB_OUTPUT file when the runner defines it, otherwise the deprecated set-output
+        command is used. They are also recorded in outputs, for next actions of a pipeline.
         """
-        print(f"::set-output name={name}::{value}")
+        self.outputs[name] = value
+        output_file = self._command_file("output_file")
+        if output_file:
+            output_file.write_lines(key_value_lines(name, value))
+        else:
+            self.command_writer.write(f"::set-output name={name}::{value}")
 
-    @staticmethod
-    def add_path(path: Path):
+    @_CommandHelper
+    def add_path(self, path: Path):
         """
         Prepends a directory to the system PATH variable for all subsequent actions in the current job.
 
         The currently running action cannot access the new path variable.
+        Paths are appended to the GITHUB_PATH file when the runner defines it, otherwise the deprecated add-path command
+        is used.
         """
-        print(f"::add-path::{path}")
+        path_file = self._command_file("path_file")
+        if path_file:
+            path_file.write(str(path))
+        else:
+            self.command_writer.write(f"::add-path::{path}")
 
-    @staticmethod
-    def debug(message: str):
+    @_CommandHelper
+    def debug(self, message: str):
         """
         Prints a debug message to the log.
 
         You must create a secret named ACTIONS_STEP_DEBUG with the value true to see the debug messages set by this
         command in the log.
         """
-        for line in message.splitlines():
-            print(f"::debug::{line}")
+        self.command_writer.write_lines(f"::debug::{line}" for line in self.masks.scrub(message).splitlines())
 
-    @staticmethod
-    def warning(message: str, *, file: Optional[str] = None, line: int = 0, col: int = 0):
+    @_CommandHelper
+    def warning(self, message: str, *, file: Optional[str] = None, line: int = 0, col: int = 0):
         """
         Creates a warning message and prints the message to the log.
 
         You can optionally provide a filename (file), line number (line), and column (col) number where the warning
         occurred.
         """
+        message = self.masks.scrub(message)
         if file:
-            print(f"::warning file={file},line={line},col={col}::{newlines_to_spaces(message)}")
+            self.command_writer.write(f"::warning file={file},line={line},col={col}::{newlines_to_spaces(message)}")
         else:
-            for message_line in message.splitlines():
-                print(f"::warning::{message_line}")
+            self.command_writer.write_lines(f"::warning::{message_line}" for message_line in message.splitlines())
 
-    @staticmethod
-    def error(message: str, *, file: Optional[str] = None, line: int = 0, col: int = 0):
+    @_CommandHelper
+    def error(self, message: str, *, file: Optional[str] = None, line: int = 0, col: int = 0):
         """
         Creates an error message and prints the message to the log.
 
         You can optionally provide a filename (file), line number (line), and column (col) number where the warning
         occurred.
         """
+        message = self.masks.scrub(message)
         if file:
-            print(f"::error file={file},line={line},col={col}::{newlines_to_spaces(message)}")
+            self.command_writer.write(f"::error file={file},line={line},col={col}::{newlines_to_spaces(message)}")
         else:
-            for message_line in message.splitlines():
-                print(f"::error::{message_line}")
+            self.command_writer.write_lines(f"::error::{message_line}" for message_line in message.splitlines())
 
-    @staticmethod
-    def add_mask(value: str):
+    @_CommandHelper
+    def add_mask(self, value: str):
         """
         Masking a value prevents a string or variable from being printed in the log.
 
         Each masked word separated by whitespace is replaced with the * character. You can use an environment variable
-        or string for the mask's value.
+        or string for the mask's value. See add_masks.
+        """
+        self.add_masks([value])
+
+    def add_masks(self, values: Iterable[str]):
+        """
+        Mask several values in the log, with one add-mask command per value and line not masked yet.
+
+        Masked values are also replaced in messages written by this action with log, debug, warning, error and span,
+        before they reach the runner.
+        """
+        self.command_writer.write_lines(f"::add-mask::{value}" for value in self.masks.add(values))
+
+    def log(self, message: str):
+        """
+        Print a message to the log, with masked values replaced.
+
+        Unlike print, messages are buffered with workflow commands, so their order is kept. Lines starting with :: are
+        interpreted as workflow commands, unless within without_commands.
+        """
+        self.command_writer.write_lines(self.masks.scrub(message).splitlines())
+
+    def log_dump(self, title: str, value: Any, *, path: Union[str, Path, None] = None, max_lines: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Log a value pretty-printed as JSON in a collapsed group, or save it to a file of the workspace.
+
+        The value is formatted and written line by line, so that a multi-MB payload is never formatted as a whole in
+        memory, and formatting stops once the line or byte budget is reached, a truncation marker being logged instead.
+        Strings are dumped as they are, and values not serializable to JSON with their repr. Masked values are replaced,
+        and workflow commands are not interpreted in dumps.
+        :param title: the title of the group
+        :param value: the value to dump
+        :param path: where to save the whole dump, without budget, instead of logging it; relative to the workspace
+        :raises ActionError: if path is not in the workspace
+        :param max_lines: maximum number of logged lines, log_dump_max_lines by default
+        :param max_bytes: maximum logged size in bytes, log_dump_max_bytes by default
         """
-        print(f"::add-mask::{value}")
+        lines = value.splitlines() if isinstance(value, str) else json_lines(value)
+        title = self.masks.scrub(title)
+        if path is not None:
+            dump_path = self.github_env.workspace / path
+            if self.github_env.workspace.resolve() not in dump_path.resolve().parents:
+                raise ActionError(f"Cannot dump {title} to {path}, outside of the workspace")
+            dump_path.parent.mkdir(parents=True, exist_ok=True)
+            count = size = 0
+            with dump_path.open("w", encoding="utf-8") as dump_file:
+                for line in lines:
+                    line = self.masks.scrub(line)
+                    dump_file.write(line + "\n")
+                    count += 1
+                    size += len(line.encode("utf-8")) + 1
+            self.command_writer.write(f"{title}: {count} lines ({size} bytes) saved to {dump_path}")
+            return
+        max_lines = self.log_dump_max_lines if max_lines is None else max_lines
+        max_bytes = self.log_dump_max_bytes if max_bytes is None else max_bytes
+        token = random_str()
+        self.command_writer.write(f"::group::{title}")
+        self.stop_commands(token)
+        count = size = 0
+        for line in lines:
+            line = self.masks.scrub(line)
+            line_size = len(line.encode("utf-8")) + 1
+            if count >= max_lines or size + line_size > max_bytes:
+                self.command_writer.write(f"[truncated after {count} lines ({size} bytes)]")
+                break
+            self.command_writer.write(line)
+            count += 1
+            size += line_size
+        self.start_commands(token)
+        self.command_writer.write("::endgroup::")
+
+    def annotate(self, file: str, line: int, message: str, *, level: str = "warning", end_line: Optional[int] = None,
+                 title: Optional[str] = None, col: int = 0) -> bool:
+        """
+        Collect an annotation of a file, to be logged with log_annotations or uploaded with upload_annotations.
+
+        Unlike warning and error with a file, which log an annotation right away, annotations are collected once each,
+        so that they can be sorted by file and line, and are not lost beyond the few ones the runner shows per step.
+        :param file: the file path, relative to the repository root
+        :param line: the first annotated line
+        :param message: the message, whose masked values are replaced
+        :param level: failure, warning or notice
+        :param end_line: the last annotated line, line by default
+        :param title: a short title, if any
+        :param col: the annotated column of line, or 0 for the whole line
+        :return: whether this annotation was not collected yet
+        """
+        return self.annotations.add(Annotation(file, line, self.masks.scrub(message), level=level, end_line=end_line,
+                                               title=title and self.masks.scrub(title), column=col))
+
+    def log_annotations(self, limit: Optional[int] = None):
+        """
+        Log collected annotations as workflow commands, sorted by file and line.
+
+        :param limit: maximum number of logged annotations of each level, annotation_commands_limit by default; the
+            number of other annotations is logged too
+        """
+        annotations, others = self.annotations.top(self.annotation_commands_limit if limit is None else limit)
+        for annotation in annotations:
+            properties = f"file={annotation.path},line={annotation.start_line}"
+            if annotation.end_line != annotation.start_line:
+                properties += f",endLine={annotation.end_line}"
+            properties += f",col={annotation.column}"
+            if annotation.title:
+                properties += f",title={newlines_to_spaces(annotation.title)}"
+            self.command_writer.write(f"::{COMMANDS[annotation.level]} {properties}::"
+                                      f"{newlines_to_spaces(annotation.message)}")
+        if others:
+            self.command_writer.write(f"{others} more annotations not shown")
+
+    def upload_annotations(self, name: str, *, title: Optional[str] = None, summary: Optional[str] = None,
+                           conclusion: Optional[str] = None) -> int:
+        """
+        Upload all collected annotations to a new check run of GitHubEnvironment.sha, with Checks API.
+
+        Annotations are sent in batches of 50 with the github_api session, so requests reuse its connections and rate
+        limiter. If a batch fails, calling this method again resumes the upload from this batch, on the same check run.
+        See https://docs.github.com/en/rest/checks/runs
+        :param name: the name of the check run
+        :param title: the title of the check run output, name by default
+        :param summary: the summary of the check run output, counting annotations of each level by default
+        :param conclusion: failure if there is any failure annotation by default, neutral if there is any other
+            annotation, success otherwise
+        :return: the id of the check run
+        :raises ActionError: if the commit SHA is unknown, or if a request fails
+        """
+        upload = self._annotation_upload
+        if upload is None or upload.done:
+            if not self.github_env.sha:
+                raise ActionError("Cannot upload annotations without GITHUB_SHA")
+            upload = self._annotation_upload = CheckRunUpload(
+                self.github_api.session, f"{self.github_env.api_url}/repos/{self.github_env.repository}/check-runs",
+                name, self.github_env.sha, self.annotations.sorted(), title=title, summary=summary,
+                conclusion=conclusion)
+        try:
+            return upload.run()
+        except (OSError, ValueError, KeyError) as error:
+            raise ActionError(f"Cannot upload annotations, {upload.sent} of {len(upload.batches)} batches sent, "
+                              f"call upload_annotations again to resume: {error}") from error
 
-    @staticmethod
-    def stop_commands(token: str = _DEFAULT_TOKEN):
+    @_CommandHelper
+    def stop_commands(self, token: str = _DEFAULT_TOKEN):
         """
         Stops processing any workflow commands.
 
         This special command allows you to log anything without accidentally running a workflow command. For example,
         you could stop logging to output an entire script that has comments.
         """
-        print(f"::stop-commands::{token}")
+        self.command_writer.write(f"::stop-commands::{token}")
 
-    @staticmethod
-    def start_commands(token: str = _DEFAULT_TOKEN):
+    @_CommandHelper
+    def start_commands(self, token: str = _DEFAULT_TOKEN):
         """To start workflow commands, pass the token that you used to stop workflow commands."""
-        print(f"::{token}::")
+        self.command_writer.write(f"::{token}::")
 
-    def get_pull_request_api_from_event(self) -> Optional[github.pulls.PullRequest]:
+    def _command_file(self, attr: str) -> Optional[CommandWriter]:
         """
-        Return a GitHub API client to manipulate the pull request that triggered this action.
+        Return a writer appending to the environment file given by a GitHubEnvironment attribute, or None if undefined.
+
+        Each file is opened once and kept open for the whole run.
+        """
+        if attr not in self._command_files:
+            path = getattr(self.github_env, attr)
+            self._command_files[attr] = CommandWriter(path.open("a", encoding="utf-8")) if path else None
+        return self._command_files[attr]
+
+    def flush_commands(self):
+        """Write all buffered workflow commands, so that anything printed afterwards comes after them in the log."""
+        self.command_writer.flush()
+        for command_file in self._command_files.values():
+            if command_file:
+                command_file.flush()
+
+    def close_commands(self):
+        """Write all buffered workflow commands and close environment files; no command may be sent afterwards."""
+        self.flush_commands()
+        for command_file in self._command_files.values():
+            if command_file:
+                command_file.close()
+        self._command_files.clear()
+
+    def _pull_request_from_event(self) -> Tuple[str, str, int]:
+        """
+        Return owner login, repository name and number of the pull request that triggered this action.
 
         :raises ActionError: if the event is not a Pull Request
         """
         if self.github_env.event_name != EVENT_PULL_REQUEST:
             raise ActionError("Trying to get Pull Request data but event is not a Pull Request")
+        owner, repo_name, number = self.github_env.event_payload_select(_PULL_REQUEST_PATHS).values()
+        return owner, repo_name, number
+
+    def get_pull_request_api_from_event(self) -> Optional["PullRequest"]:
+        """
+        Return a GitHub API client to manipulate the pull request that triggered this action.
 
-        owner = self.github_env.event_payload_find("repository/owner/login")
-        repo_name = self.github_env.event_payload_find("repository/name")
-        number = self.github_env.event_payload_find("pull_request/number")
-        pull_request = self.github_api.pull_request(owner, repo_name, number)
+        :raises ActionError: if the event is not a Pull Request
+        """
+        pull_request = self.github_api.pull_request(*self._pull_request_from_event())
 
         return pull_request
 
+    def get_pull_request_from_event(self) -> PullRequestView:
+        """
+        Return the pull request that triggered this action, read from the event payload.
+
+        Unlike get_pull_request_api_from_event, this does not call GitHub API until a method or a property missing from
+        the payload is used, see PullRequestView.
+        :raises ActionError: if the event is not a Pull Request
+        """
+        if self.github_env.event_name != EVENT_PULL_REQUEST:
+            raise ActionError("Trying to get Pull Request data but event is not a Pull Request")
+        return PullRequestView(self.github_env.event_payload_find("pull_request", {}),
+                               self.get_pull_request_api_from_event)
+
+    def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Execute a query with GitHub GraphQL API.
+
+        Requests are sent with the github_api session, so they reuse its connections and rate limiter.
+        See https://docs.github.com/en/graphql
+        :param query: a GraphQL query or mutation
+        :param variables: values of the query variables
+        :return: the data of the response
+        :raises ActionError: if the request fails or the response has errors
+        """
+        response = self.github_api.session.post(self.github_env.graphql_url,
+                                                json={"query": query, "variables": variables or {}})
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        errors = result.get("errors") or ([] if response.ok else [{"message": result.get("message", response.reason)}])
+        if errors:
+            messages = "; ".join(str(error.get("message", error)) for error in errors)
+            raise ActionError(f"GraphQL query failed with status {response.status_code}: {messages}")
+        return result["data"]
+
+    def get_pull_request_context(self) -> Dict[str, Any]:
+        """
+        Fetch the pull request that triggered this action, with its files, reviews, labels and checks.
+
+        All of it is fetched with a single GraphQL request for pull requests with at most 100 of each.
+        See graphql.fetch_pull_request_context for the returned data.
+        :raises ActionError: if the event is not a Pull Request, or the pull request cannot be fetched
+        """
+        try:
+            return fetch_pull_request_context(self.graphql, *self._pull_request_from_event())
+        except LookupError as error:
+            raise ActionError(f"Cannot get Pull Request data: {error}") from error
+
+    async def fetch_changed_files(self) -> "ChangedFiles":
+        """
+        Fetch the files changed by the pull request that triggered this action, indexed for path queries.
+
+        Pages of files are requested concurrently with async_github_api, see changedfiles.fetch_changed_files. The index
+        is kept for next calls and next actions of a pipeline, and stored in memo_cache by head commit SHA of the pull
+        request, so that re-runs and other workflows of the same commit do not fetch it again.
+        Requires aiohttp, see the 'async' extra of this package; synchronous run methods call get_changed_files.
+        :raises ActionError: if the event is not a Pull Request, or files cannot be fetched
+        """
+        if self._changed_files is None:
+            # pylint: disable=C0415
+            from github_action_template.changedfiles import fetch_changed_files
+            from github_action_template.memo import content_hash
+            owner, repo_name, number = self._pull_request_from_event()
+            head_sha, count = self.github_env.event_payload_select(_CHANGED_FILES_PATHS).values()
+            cache = self.memo_cache if head_sha else None
+            key = content_hash(("changed_files", owner, repo_name, number, head_sha))
+            found, changed_files = cache.get(key) if cache else (False, None)
+            if not found:
+                changed_files = await fetch_changed_files(self.async_github_api, owner, repo_name, number, count=count)
+                if cache:
+                    cache.set(key, changed_files)
+            self._changed_files = changed_files
+        return self._changed_files
+
+    def get_changed_files(self) -> "ChangedFiles":
+        """Return the files changed by the pull request that triggered this action, see fetch_changed_files."""
+        if self._changed_files is None:
+            import asyncio  # pylint: disable=C0415
+            asyncio.run(self.run_coroutine(self.fetch_changed_files()))
+        return self._changed_files
+
     def get_input(self, input_name: str, default: Optional[str] = None) -> Optional[str]:
         """
         Return the value of the action input with the given name, or if empty the given default value or None.
@@ -347,9 +1013,11 @@ class GitHubAction:
         unique = token or random_str()
         try:
             self.stop_commands(unique)
+            self.flush_commands()
             yield
         finally:
             self.start_commands(unique)
+            self.flush_commands()
 
 
 def newlines_to_spaces(text: str) -> str:
@@ -362,24 +1030,71 @@ def newlines_to_spaces(text: str) -> str:
     return text.replace("\r", "").replace("\n", " ")
 
 
+def key_value_lines(name: str, value: Any) -> List[str]:
+    """
+    Format a name and a value the way GitHub environment files like GITHUB_OUTPUT or GITHUB_ENV expect them.
+
+    Multiline values are enclosed in a heredoc-like block with a random delimiter that cannot appear in the value.
+    :param name: an output or environment variable name
+    :param value: a single or multiline value, converted to text like print does
+    :return: the lines to append to the file
+    """
+    value = str(value)
+    if "\n" not in value and "\r" not in value:
+        return [f"{name}={value}"]
+    delimiter = f"ghadelimiter_{random_str()}"
+    while delimiter in value:
+        delimiter = f"ghadelimiter_{random_str()}"
+    return [f"{name}<<{delimiter}", value, delimiter]
+
+
+def json_lines(value: Any, indent: int = 2) -> Iterator[str]:
+    """
+    Pretty-print a value as JSON, line by line, formatting it incrementally.
+
+    :param value: the value to format, whose parts not serializable to JSON are formatted with their repr
+    :param indent: number of spaces per indentation level
+    :return: an iterator on formatted lines, without line terminators
+    """
+    encoder = json.JSONEncoder(indent=indent, ensure_ascii=False, default=repr)
+    parts: List[str] = []
+    for chunk in encoder.iterencode(value):
+        if "\n" in chunk:
+            first, *middle, last = chunk.split("\n")
+            parts.append(first)
+            yield "".join(parts)
+            yield from middle
+            parts = [last]
+        else:
+            parts.append(chunk)
+    yield "".join(parts)
+
+
 def random_str(length: int = 20) -> str:
     return "".join(secrets.choice(string.ascii_letters) for _ in range(length))
 
 
+def __getattr__(name: str) -> Any:
+    """Import github3 names like GitHub on first use only, as github3 and its dependencies take a while to import."""
+    if name in ("GitHub", "github"):
+        import github3  # pylint: disable=C0415
+        value = getattr(github3, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class ActionError(Exception):
     """Superclass of all exception raised by GitHub actions."""
 
 
-def json_find(json_tree: Dict[str, Any], path: str, default: Optional[Any] = None) -> Optional[Any]:
+def json_find(json_tree: Dict[str, Any], path: PathLike, default: Optional[Any] = None) -> Optional[Any]:
     """
     Safely walk through a JSON tree to find a value in a map in a map in a map.
 
     some_json["pull_request"]["head"]["comment"] may raise KeyError if any piece of json is empty.
     json_find(some_json, "pull_request/head/comment") is safer; in case of missing data it simply returns None.
+    Paths may also go through lists, see JsonPath; string paths are only parsed once.
+    Falsy values like 0, False or "" are returned as is, only missing or null values are replaced by default.
     """
-    try:
-        for path_part in path.split("/"):
-            json_tree = json_tree[path_part]
-        return json_tree or default
-    except (KeyError, TypeError):
-        return default
+    return as_json_path(path).find(json_tree, default)
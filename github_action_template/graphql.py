@@ -0,0 +1,131 @@
+"""Define GitHub GraphQL API queries fetching a lot of data in a few requests."""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+#: executes a GraphQL query with variables, and returns its data
+Execute = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+
+_PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+
+_FILES = f"""files(first: 100, after: $filesCursor) {{
+      totalCount
+      nodes {{ path additions deletions changeType }}
+      {_PAGE_INFO}
+    }}"""
+
+_REVIEWS = f"""reviews(first: 100, after: $reviewsCursor) {{
+      totalCount
+      nodes {{ author {{ login }} state submittedAt body }}
+      {_PAGE_INFO}
+    }}"""
+
+_LABELS = f"""labels(first: 100, after: $labelsCursor) {{
+      totalCount
+      nodes {{ name color }}
+      {_PAGE_INFO}
+    }}"""
+
+_CHECKS = f"""commits(last: 1) {{
+      nodes {{
+        commit {{
+          oid
+          statusCheckRollup {{
+            state
+            contexts(first: 100, after: $checksCursor) {{
+              totalCount
+              nodes {{
+                __typename
+                ... on CheckRun {{ name status conclusion detailsUrl }}
+                ... on StatusContext {{ context state targetUrl }}
+              }}
+              {_PAGE_INFO}
+            }}
+          }}
+        }}
+      }}
+    }}"""
+
+_PULL_REQUEST_FIELDS = """id number title body state isDraft merged mergeable url createdAt updatedAt
+    author { login }
+    baseRefName baseRefOid headRefName headRefOid"""
+
+_CURSORS = "$filesCursor: String, $reviewsCursor: String, $labelsCursor: String, $checksCursor: String"
+
+#: fetches a pull request with the first 100 files, reviews, labels and checks of its head commit
+PULL_REQUEST_CONTEXT_QUERY = f"""query($owner: String!, $name: String!, $number: Int!, {_CURSORS}) {{
+  repository(owner: $owner, name: $name) {{
+    pullRequest(number: $number) {{
+    {_PULL_REQUEST_FIELDS}
+    {_FILES}
+    {_REVIEWS}
+    {_LABELS}
+    {_CHECKS}
+    }}
+  }}
+}}"""
+
+# Each paginated connection of the context: name in the result, path to the connection, query for next pages
+_CONNECTIONS: List[Tuple[str, Tuple[str, ...], str, str]] = [
+    ("files", ("files",), "filesCursor", _FILES),
+    ("reviews", ("reviews",), "reviewsCursor", _REVIEWS),
+    ("labels", ("labels",), "labelsCursor", _LABELS),
+    ("checks", ("commits", "nodes", 0, "commit", "statusCheckRollup", "contexts"), "checksCursor", _CHECKS),
+    ]
+
+
+def fetch_pull_request_context(execute: Execute, owner: str, name: str, number: int) -> Dict[str, Any]:
+    """
+    Fetch a pull request with its changed files, reviews, labels and check status in as few requests as possible.
+
+    A single request is enough for pull requests with at most 100 of each; otherwise following pages of each
+    connection are fetched with one request per page.
+    :param execute: executes a GraphQL query, see GitHubAction.graphql
+    :param owner: login of the repository owner
+    :param name: name of the repository
+    :param number: number of the pull request
+    :return: pull request fields, with "files", "reviews", "labels" and "checks" lists of all nodes, and "checkState"
+             the overall state of checks of the head commit or None if it has no check
+    """
+    variables = {"owner": owner, "name": name, "number": int(number)}
+    pull_request = _pull_request(execute(PULL_REQUEST_CONTEXT_QUERY, variables))
+
+    context = {key: value for key, value in pull_request.items() if key != "commits"}
+    rollup = _get_in(pull_request, ("commits", "nodes", 0, "commit", "statusCheckRollup"))
+    context["checkState"] = rollup["state"] if rollup else None
+    for key, path, cursor_name, fragment in _CONNECTIONS:
+        connection = _get_in(pull_request, path)
+        context[key] = _all_nodes(execute, variables, connection, path, cursor_name, fragment)
+    return context
+
+
+def _all_nodes(execute: Execute, variables: Dict[str, Any], connection: Optional[Dict[str, Any]],
+               path: Tuple, cursor_name: str, fragment: str) -> List[Any]:
+    """Return nodes of a connection, fetching its next pages if any."""
+    if not connection:
+        return []
+    nodes = list(connection["nodes"])
+    query = (f"query($owner: String!, $name: String!, $number: Int!, ${cursor_name}: String) {{\n"
+             f"  repository(owner: $owner, name: $name) {{\n    pullRequest(number: $number) {{\n    {fragment}\n"
+             f"    }}\n  }}\n}}")
+    while connection["pageInfo"]["hasNextPage"]:
+        page_variables = {**variables, cursor_name: connection["pageInfo"]["endCursor"]}
+        connection = _get_in(_pull_request(execute(query, page_variables)), path)
+        if not connection:
+            break
+        nodes.extend(connection["nodes"])
+    return nodes
+
+
+def _pull_request(data: Dict[str, Any]) -> Dict[str, Any]:
+    pull_request = _get_in(data, ("repository", "pullRequest"))
+    if not pull_request:
+        raise LookupError("Pull request not found")
+    return pull_request
+
+
+def _get_in(data: Any, path: Tuple) -> Any:
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
@@ -0,0 +1,116 @@
+"""Define a persistent cache of HTTP responses, revalidated with conditional requests."""
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional
+
+from github_action_template.cachedir import CacheDirectory
+
+
+class CacheEntry:
+    """A cached response, with its validators."""
+
+    __slots__ = ("path", "url", "status", "headers", "body")
+
+    def __init__(self, path: Path, url: str, status: int, headers: Dict[str, str], body: bytes):
+        self.path = path
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def etag(self) -> Optional[str]:
+        """The ETag header of the response, if any."""
+        return _get_header(self.headers, "ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """The Last-Modified header of the response, if any."""
+        return _get_header(self.headers, "Last-Modified")
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Return request headers asking the server to reply 304 Not Modified if this entry is still valid."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache(CacheDirectory):
+    """
+    Stores successful GET responses having an ETag or Last-Modified header in a directory, one file per URL.
+
+    Cached responses are never used as is: they are revalidated with a conditional request, and only used if the server
+    answers 304 Not Modified, which GitHub does not count in rate limits. See CacheDirectory for storage and eviction.
+    """
+
+    suffix = ".response"
+
+    def __init__(self, directory: Path, *, max_size: int = 50 * 1024 * 1024, max_age: float = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param directory: where to store responses, created on first store
+        :param max_size: maximum total size in bytes of stored responses
+        :param max_age: maximum time in seconds since an entry was last stored or used
+        :param clock: returns current time in seconds since epoch
+        """
+        super().__init__(directory, max_size=max_size, max_age=max_age, clock=clock)
+
+    def _path(self, method: str, url: str, vary: str) -> Path:
+        return self._entry_path(hashlib.sha256(f"{method} {url} {vary}".encode("utf-8")).hexdigest())
+
+    def lookup(self, method: str, url: str, vary: str = "") -> Optional[CacheEntry]:
+        """
+        Return a cached response for a request, if any.
+
+        :param method: the request method
+        :param url: the full request URL
+        :param vary: other request values changing the response content, like Accept header
+        """
+        path = self._path(method, url, vary)
+        try:
+            with path.open("rb") as entry_file:
+                meta = json.loads(entry_file.readline())
+                body = entry_file.read()
+            if meta["url"] != url:
+                return None
+            if self._expired(path):
+                self._remove(path)
+                return None
+            return CacheEntry(path, url, meta["status"], meta["headers"], body)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            # Corrupted entry, from an interrupted copy of the directory for instance
+            self._remove(path)
+            return None
+
+    def touch(self, entry: CacheEntry):
+        """Record that an entry has just been used, so that it is evicted after less recently used ones."""
+        self._touch(entry.path)
+
+    def store(self, method: str, url: str, status: int, headers: Mapping[str, str], body: bytes,
+              vary: str = "") -> bool:
+        """
+        Store a response if it can be revalidated later.
+
+        :return: True if the response was stored
+        """
+        headers = dict(headers)
+        if not _get_header(headers, "ETag") and not _get_header(headers, "Last-Modified"):
+            return False
+        meta = json.dumps({"url": url, "status": status, "headers": headers}).encode("utf-8")
+        return self._write(self._path(method, url, vary), meta + b"\n" + body)
+
+
+def _get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Return a header value from a plain dict, with a case-insensitive name."""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
@@ -0,0 +1,164 @@
+"""Define compiled paths to find values in JSON trees, such as event payloads."""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+#: a path part matching all items of a list or all values of a map
+WILDCARD = "*"
+
+_MISSING = object()
+
+
+class JsonPath:
+    """
+    A slash-separated path in a JSON tree, parsed once to be applied to any number of trees.
+
+    Each part of the path is either a property name, an index in a list (like 0 or -1; on a map this is a property
+    name), or * to go through all items of a list or all values of a map.
+    For example "pull_request/labels/0/name" or "commits/*/id".
+    """
+
+    __slots__ = ("path", "parts", "has_wildcard")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parts: Tuple[Tuple[str, Optional[int]], ...] = tuple(_compile_part(part) for part in path.split("/"))
+        self.has_wildcard = any(key == WILDCARD for key, _ in self.parts)
+
+    def __repr__(self) -> str:
+        return f"JsonPath({self.path!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, JsonPath) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    @property
+    def keys_prefix(self) -> str:
+        """The leading part of this path only made of property names, which may be empty."""
+        keys = []
+        for key, index in self.parts:
+            if key == WILDCARD or index is not None:
+                break
+            keys.append(key)
+        return "/".join(keys)
+
+    def relative_to(self, prefix: str) -> Optional["JsonPath"]:
+        """Return the rest of this path after the given prefix, or None if nothing is left."""
+        if not prefix:
+            return self
+        rest = self.path[len(prefix) + 1:]
+        return compile_path(rest) if rest else None
+
+    def find(self, json_tree: Any, default: Optional[Any] = None) -> Any:
+        """
+        Safely walk through a JSON tree to find the value at this path.
+
+        :param json_tree: a JSON tree, like the result of json.load
+        :param default: returned if there is no value, or a null value, at this path; not used with wildcards
+        :return: the value at this path, or default; with wildcards a list of all found values, possibly empty
+        """
+        if self.has_wildcard:
+            return list(_walk(json_tree, self.parts))
+        for key, index in self.parts:
+            if isinstance(json_tree, dict):
+                json_tree = json_tree.get(key)
+            elif isinstance(json_tree, list) and index is not None and -len(json_tree) <= index < len(json_tree):
+                json_tree = json_tree[index]
+            else:
+                return default
+        return default if json_tree is None else json_tree
+
+
+PathLike = Union[str, JsonPath]
+
+
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> JsonPath:
+    """Return a compiled JsonPath for a string path, reusing previous compilations."""
+    return JsonPath(path)
+
+
+def as_json_path(path: PathLike) -> JsonPath:
+    """Return the given path if already compiled, or its compiled version."""
+    return path if isinstance(path, JsonPath) else compile_path(path)
+
+
+def find_many(json_tree: Any, paths: Iterable[PathLike], default: Optional[Any] = None) -> Dict[PathLike, Any]:
+    """
+    Find values for several paths with a single walk through a JSON tree.
+
+    Common leading parts of paths are only walked once.
+    :param json_tree: a JSON tree, like the result of json.load
+    :param paths: string or compiled paths
+    :param default: used for paths without value, or with a null value; not used with wildcards
+    :return: a dict of values by given path, with the same rules as JsonPath.find
+    """
+    root = _PathNode()
+    found: Dict[PathLike, Any] = {}
+    for path in paths:
+        if path in found:
+            continue
+        json_path = as_json_path(path)
+        node = root
+        for part in json_path.parts:
+            node = node.children.setdefault(part, _PathNode())
+        node.paths.append((path, json_path.has_wildcard))
+        found[path] = [] if json_path.has_wildcard else _MISSING
+    _collect(json_tree, root, found)
+    return {path: default if value is _MISSING or value is None else value for path, value in found.items()}
+
+
+class _PathNode:
+    """A node in the tree of parts of several paths."""
+
+    __slots__ = ("children", "paths")
+
+    def __init__(self):
+        self.children: Dict[Tuple[str, Optional[int]], _PathNode] = {}
+        #: given paths ending at this node, and whether they have wildcards
+        self.paths: List[Tuple[PathLike, bool]] = []
+
+
+def _collect(value: Any, node: _PathNode, found: Dict[PathLike, Any]):
+    """Record a value for the paths ending at a node, then walk deeper for children."""
+    for path, has_wildcard in node.paths:
+        if has_wildcard:
+            found[path].append(value)
+        else:
+            found[path] = value
+    for part, child in node.children.items():
+        for child_value in _step(value, part):
+            _collect(child_value, child, found)
+
+
+def _compile_part(part: str) -> Tuple[str, Optional[int]]:
+    """Return a path part as a property name and, if it looks like a list index, its index."""
+    try:
+        return part, int(part)
+    except ValueError:
+        return part, None
+
+
+def _step(json_tree: Any, part: Tuple[str, Optional[int]]) -> Iterator[Any]:
+    """Yield values found one level down in a JSON tree for a path part."""
+    key, index = part
+    if isinstance(json_tree, dict):
+        if key == WILDCARD:
+            yield from json_tree.values()
+        elif key in json_tree:
+            yield json_tree[key]
+    elif isinstance(json_tree, list):
+        if key == WILDCARD:
+            yield from json_tree
+        elif index is not None and -len(json_tree) <= index < len(json_tree):
+            yield json_tree[index]
+
+
+def _walk(json_tree: Any, parts: Tuple[Tuple[str, Optional[int]], ...]) -> Iterator[Any]:
+    """Yield all values found in a JSON tree at the end of given path parts."""
+    if not parts:
+        yield json_tree
+        return
+    for value in _step(json_tree, parts[0]):
+        yield from _walk(value, parts[1:])
@@ -0,0 +1,127 @@
+"""Define a registry of secrets masked in action logs, which also scrubs them from lines written by the framework."""
+import re
+import threading
+from typing import Dict, Iterable, List, Pattern, Tuple
+
+#: what secrets are replaced with, like GitHub does
+MASK = "***"
+
+
+class MaskRegistry:
+    """
+    Registers secrets once, and replaces them in text.
+
+    Secrets are matched by regular expressions built from tries of secrets, so that scrubbing cost depends on the
+    length of the text and of secrets, not on their number: at each position of the text, the regular expression engine
+    only tries the few characters following the current prefix, instead of every secret.
+    Secrets registered since the last scrub are compiled into a new expression, merged with the previous ones of at most
+    the same size, like a binary counter: each secret is compiled a logarithmic number of times even when secrets are
+    registered one by one between log messages, and scrubbing uses a logarithmic number of expressions.
+    When secrets overlap or follow each other, the union of their occurrences is replaced. Registration is thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._secrets: Dict[str, None] = {}
+        self._pending: List[str] = []
+        self._segments: List[Tuple[List[str], Pattern[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._secrets
+
+    def add(self, values: Iterable[str]) -> List[str]:
+        """
+        Register secrets, ignoring blank ones and those already registered.
+
+        Multi-line values are registered line by line, as GitHub masks single lines only.
+        :return: the newly registered secrets, in registration order
+        """
+        added = []
+        with self._lock:
+            for value in values:
+                for line in value.splitlines():
+                    if line.strip() and line not in self._secrets:
+                        self._secrets[line] = None
+                        added.append(line)
+            self._pending.extend(added)
+        return added
+
+    def _patterns(self) -> List[Pattern[str]]:
+        """Return the regular expressions matching all secrets, compiling pending ones."""
+        with self._lock:
+            if self._pending:
+                words, self._pending = self._pending, []
+                while self._segments and len(self._segments[-1][0]) <= len(words):
+                    words = self._segments.pop()[0] + words
+                self._segments.append((words, re.compile(trie_regex(words))))
+            return [pattern for _, pattern in self._segments]
+
+    def scrub(self, text: str) -> str:
+        """
+        Return the given text with all registered secrets replaced by MASK.
+
+        Occurrences are searched at every position, so that overlapping secrets are found even when compiled in the
+        same expression, and overlapping or adjacent occurrences are replaced by a single MASK: no part of a secret is
+        left, however secrets were registered.
+        """
+        spans = []
+        for pattern in self._patterns():
+            match = pattern.search(text)
+            while match:
+                spans.append(match.span())
+                match = pattern.search(text, match.start() + 1)
+        if not spans:
+            return text
+        spans.sort()
+        parts = []
+        position = 0
+        merged_start, merged_end = spans[0]
+        for start, end in spans[1:]:
+            if start <= merged_end:
+                merged_end = max(merged_end, end)
+                continue
+            parts += [text[position:merged_start], MASK]
+            position = merged_end
+            merged_start, merged_end = start, end
+        parts += [text[position:merged_start], MASK, text[merged_end:]]
+        return "".join(parts)
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Return a regular expression matching any of the given words, and the longest one first.
+
+    Words are stored in a trie, then each node of the trie is turned into an alternation of the characters that may
+    follow, so that alternations hold at most one branch per character whatever the number of words.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_regex(trie)
+
+
+def _node_regex(node: Dict[str, dict]) -> str:
+    """Return the regular expression matching the suffixes stored under a trie node; "" keys mark ends of words."""
+    parts = []
+    for char, child in sorted(node.items()):
+        if not char:
+            continue
+        chars = [char]
+        # Chains of single child nodes are written as plain strings
+        while len(child) == 1 and "" not in child:
+            next_char, child = next(iter(child.items()))
+            chars.append(next_char)
+        parts.append(re.escape("".join(chars)) + _node_regex(child))
+    if not parts:
+        return ""
+    regex = parts[0] if len(parts) == 1 else f"(?:{'|'.join(parts)})"
+    if "" in node:
+        # A word ends here: longer words go first, thanks to the greedy optional group
+        regex = f"(?:{regex})?"
+    return regex
@@ -0,0 +1,245 @@
+"""
+Define a persistent memoization cache of expensive computations, to skip them when a run sees the same inputs again.
+
+Results are keyed by a content hash of the computation inputs, serialized with pickle then compressed with zlib if
+that makes them smaller, and stored by a pluggable MemoStore backend. Use the memoize decorator on GitHubAction
+methods, which store results in GitHubAction.memo_cache.
+Only restore memo directories written by workflows of the same repository, as actions/cache does: loading a pickle
+written by someone else can run arbitrary code.
+"""
+import abc
+import functools
+import hashlib
+import pickle
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path, PurePath
+from typing import Any, Callable, Optional, Tuple
+
+from github_action_template.cachedir import CacheDirectory
+
+# Format marker of serialized results, then a flag telling whether the pickle is compressed
+_MAGIC = b"GM1"
+_RAW, _COMPRESSED = b"\0", b"\1"
+#: results smaller than this size in bytes are not worth compressing
+COMPRESSION_THRESHOLD = 512
+
+
+class MemoStore(abc.ABC):
+    """A backend of MemoCache, storing serialized results by key."""
+
+    @abc.abstractmethod
+    def load(self, key: str) -> Optional[bytes]:
+        """Return the data stored with a key, or None if there is none; the entry is now the most recently used."""
+
+    @abc.abstractmethod
+    def save(self, key: str, data: bytes) -> bool:
+        """Store data with a key, and return whether it was stored."""
+
+
+class DirectoryStore(CacheDirectory, MemoStore):
+    """Stores each result in a file of a directory, see CacheDirectory for storage and eviction."""
+
+    suffix = ".memo"
+
+    def __init__(self, directory: Path, *, max_size: int = 100 * 1024 * 1024, max_age: float = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param directory: where to store results, created on first store
+        :param max_size: maximum total size in bytes of stored results
+        :param max_age: maximum time in seconds since an entry was last stored or used
+        :param clock: returns current time in seconds since epoch
+        """
+        super().__init__(directory, max_size=max_size, max_age=max_age, clock=clock)
+
+    def load(self, key: str) -> Optional[bytes]:
+        path = self._entry_path(key)
+        try:
+            if self._expired(path):
+                self._remove(path)
+                return None
+            data = path.read_bytes()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def save(self, key: str, data: bytes) -> bool:
+        return self._write(self._entry_path(key), data)
+
+
+class MemoryStore(MemoStore):
+    """Stores results in memory for the duration of a process, evicting least recently used ones beyond max_size."""
+
+    def __init__(self, max_size: int = 10 * 1024 * 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def save(self, key: str, data: bytes) -> bool:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            self._size += len(data) - (len(old) if old is not None else 0)
+            self._entries[key] = data
+            while self._size > self.max_size and self._entries:
+                self._size -= len(self._entries.popitem(last=False)[1])
+        return True
+
+
+class MemoCache:
+    """Serializes results to a MemoStore, and counts hits and misses."""
+
+    def __init__(self, store: MemoStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return whether a result is stored with a key, and this result; corrupted entries are misses."""
+        data = self.store.load(key)
+        if data is not None:
+            try:
+                value = loads(data)
+            except (ValueError, EOFError, pickle.UnpicklingError, zlib.error, AttributeError, ImportError):
+                # Written by another format version, or by a version of the code defining other classes
+                pass
+            else:
+                self.hits += 1
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any) -> bool:
+        """Store a result with a key, and return whether it was stored."""
+        return self.store.save(key, dumps(value))
+
+    def summary(self) -> str:
+        """Return hit and miss counters as a log message."""
+        return f"Memo cache hits: {self.hits}, misses: {self.misses}"
+
+
+def memoize(method: Optional[Callable[..., Any]] = None, *, by_commit: bool = True, version: str = ""):
+    """
+    Decorate a GitHubAction method so that its results are stored in GitHubAction.memo_cache and reused across runs.
+
+    Results are keyed by a content hash of the qualified method name, the version and the arguments (see
+    content_hash) and, unless by_commit is False, GitHubEnvironment.sha and ref. Results must be picklable, and are
+    returned as copies when read from the cache. The method runs as usual when the cache is disabled; exceptions are
+    not cached. Can be used with or without arguments:
+
+        @memoize
+        def analyze(self, path: Path) -> Report: ...
+
+        @memoize(by_commit=False, version="2")
+        def parse(self, content: bytes) -> Tree: ...
+
+    :param by_commit: whether results depend on the commit and ref being built, in addition to the arguments
+    :param version: changed to invalidate results of a previous implementation of the method
+    """
+    def decorate(function: Callable[..., Any]) -> Callable[..., Any]:
+        name = f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            cache = self.memo_cache
+            if cache is None:
+                return function(self, *args, **kwargs)
+            scope = (self.github_env.sha, self.github_env.ref) if by_commit else ()
+            key = content_hash((name, version, scope, args, kwargs))
+            found, value = cache.get(key)
+            if not found:
+                value = function(self, *args, **kwargs)
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorate(method) if method else decorate
+
+
+def content_hash(value: Any) -> str:
+    """
+    Return a SHA-256 hex digest of a value, stable across processes.
+
+    None, booleans, numbers, strings, bytes, tuples, lists, dicts and sets are hashed by content, dicts and sets
+    whatever their order. Paths of existing files are hashed by file content, so that changes are detected without
+    relying on modification times that a checkout does not preserve. Other values are hashed by their pickle.
+    """
+    hasher = hashlib.sha256()
+    _update(hasher, value)
+    return hasher.hexdigest()
+
+
+def _update(hasher: Any, value: Any):
+    if value is None:
+        hasher.update(b"N")
+    elif isinstance(value, bool):
+        hasher.update(b"T" if value else b"F")
+    elif isinstance(value, (int, float)):
+        _update_bytes(hasher, b"I" if isinstance(value, int) else b"R", repr(value).encode())
+    elif isinstance(value, str):
+        _update_bytes(hasher, b"S", value.encode("utf-8", "surrogatepass"))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        _update_bytes(hasher, b"B", bytes(value))
+    elif isinstance(value, PurePath):
+        _update_path(hasher, value)
+    elif isinstance(value, (tuple, list)):
+        hasher.update(b"L" + struct.pack(">Q", len(value)))
+        for item in value:
+            _update(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(b"D" + struct.pack(">Q", len(value)))
+        for key_digest, item in sorted((content_hash(key), item) for key, item in value.items()):
+            hasher.update(bytes.fromhex(key_digest))
+            _update(hasher, item)
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(b"E" + struct.pack(">Q", len(value)))
+        for digest in sorted(content_hash(item) for item in value):
+            hasher.update(bytes.fromhex(digest))
+    else:
+        _update_bytes(hasher, b"O", pickle.dumps(value, protocol=4))
+
+
+def _update_bytes(hasher: Any, tag: bytes, data: bytes):
+    # Length prefixes keep ("ab", "c") and ("a", "bc") apart
+    hasher.update(tag + struct.pack(">Q", len(data)))
+    hasher.update(data)
+
+
+def _update_path(hasher: Any, path: PurePath):
+    _update_bytes(hasher, b"P", str(path).encode("utf-8", "surrogatepass"))
+    try:
+        with open(path, "rb") as content:
+            hasher.update(b"C")
+            for chunk in iter(functools.partial(content.read, 1024 * 1024), b""):
+                hasher.update(chunk)
+    except OSError:
+        # Missing files and directories are hashed by path only
+        hasher.update(b"M")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a result: pickled, then compressed if large enough for it to pay off."""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return _MAGIC + _COMPRESSED + compressed
+    return _MAGIC + _RAW + data
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize a result serialized by dumps."""
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("Not a memoized result")
+    flag, payload = data[len(_MAGIC):len(_MAGIC) + 1], data[len(_MAGIC) + 1:]
+    return pickle.loads(zlib.decompress(payload) if flag == _COMPRESSED else payload)
@@ -0,0 +1,104 @@
+"""Define metrics of an action run: phase and span durations, and GitHub API request counts and latencies."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+#: upper bounds in seconds of the buckets of API request latency histograms, the last bucket being unbounded
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """
+    Collects durations and API request statistics of an action run, and saves them as JSON.
+
+    Phases are the steps of the entrypoint (load, instantiate and run), spans are parts of a run measured by the action
+    itself, see GitHubAction.span. Recording is thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        #: duration in seconds of each phase, in execution order
+        self.phases: Dict[str, float] = {}
+        #: number of times and total duration in seconds of each span
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.requests = 0
+        self.errors = 0
+        self.cached = 0
+        self.request_time = 0.0
+        self.by_method: Dict[str, int] = {}
+        self.by_status: Dict[str, int] = {}
+        #: number of requests per latency bucket, see LATENCY_BUCKETS
+        self.latency_counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add_phase(self, name: str, seconds: float):
+        """Record the duration of a phase, added to previous ones of the same name."""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Return a context recording its duration as a phase, even if it fails."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_span(self, name: str, seconds: float):
+        """Record the duration of a span."""
+        with self._lock:
+            span = self.spans.setdefault(name, {"count": 0, "seconds": 0.0})
+            span["count"] += 1
+            span["seconds"] += seconds
+
+    def record_request(self, method: str, status: int, seconds: float, *, from_cache: bool = False):
+        """
+        Record a GitHub API request.
+
+        :param method: the request method
+        :param status: the final response status, after retries
+        :param seconds: the duration of the request, retries included
+        :param from_cache: whether the response body comes from a cache revalidated by the server
+        """
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            self.requests += 1
+            self.errors += status >= 400
+            self.cached += from_cache
+            self.request_time += seconds
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+            self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+            self.latency_counts[bucket] += 1
+
+    def as_dict(self, **context: Any) -> Dict[str, Any]:
+        """
+        Return metrics as a JSON object.
+
+        :param context: values identifying the run, like the action name or the run id
+        """
+        with self._lock:
+            return {
+                **context,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                "spans": {name: {"count": span["count"], "seconds": round(span["seconds"], 6)}
+                          for name, span in self.spans.items()},
+                "api": {
+                    "requests": self.requests,
+                    "errors": self.errors,
+                    "cached": self.cached,
+                    "seconds": round(self.request_time, 6),
+                    "by_method": dict(self.by_method),
+                    "by_status": dict(self.by_status),
+                    "latency_histogram": {"buckets": [*LATENCY_BUCKETS, "+Inf"], "counts": list(self.latency_counts)},
+                    },
+                }
+
+    def write(self, path: Path, **context: Any):
+        """Save metrics as JSON to a file, see as_dict."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(**context), indent=2), encoding="utf-8")
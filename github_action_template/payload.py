@@ -0,0 +1,183 @@
+"""Load GitHub event payloads, either fully or by extracting only a few values from huge JSON files."""
+import importlib
+import json
+import re
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+# Optional parser modules by name, imported on first use only as they take a while to import; None if not installed
+_PARSERS: Dict[str, Any] = {}
+
+_DECODER = json.JSONDecoder()
+_WHITESPACES = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'["{}\[\]]')
+
+
+def _parser(name: str) -> Any:
+    """Return an optional parser module, or None if it is not installed."""
+    if name not in _PARSERS:
+        try:
+            _PARSERS[name] = importlib.import_module(name)
+        except ImportError:
+            _PARSERS[name] = None
+    return _PARSERS[name]
+
+
+def load_json(path: Path) -> Any:
+    """
+    Parse a whole JSON file, with orjson if installed.
+
+    :raises OSError: if the file cannot be read
+    :raises ValueError: if the file is not valid JSON
+    """
+    orjson = _parser("orjson")
+    if orjson:
+        return orjson.loads(path.read_bytes())
+    with path.open(encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def select_json(path: Path, paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    Extract values at given paths from a JSON file, without building the whole JSON tree in memory.
+
+    Only values at requested paths are decoded, everything else is skipped, and reading stops as soon as all paths
+    have been found. With ijson installed the file is streamed, otherwise it is scanned as a single string.
+    :param path: the JSON file to read
+    :param paths: slash-separated (case-sensitive) property names
+    :return: a dict of found values by path; paths that do not exist are missing from the dict
+    :raises OSError: if the file cannot be read
+    :raises ValueError: if the file is not valid JSON
+    """
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+    ijson = _parser("ijson")
+    if ijson:
+        with path.open("rb") as json_file:
+            return _select_with_ijson(ijson, json_file, paths)
+    return _select_in_text(path.read_text(encoding="utf-8"), paths)
+
+
+def _select_with_ijson(ijson, json_file, paths: List[str]) -> Dict[str, Any]:
+    """Stream JSON parsing events and only build objects found at requested paths."""
+    wanted = {path.replace("/", "."): path for path in paths}
+    found: Dict[str, Any] = {}
+    builders: Dict[str, Any] = {}
+    try:
+        for prefix, event, value in ijson.parse(json_file, use_float=True):
+            if prefix in wanted and prefix not in builders and event not in ("map_key", "end_map", "end_array"):
+                builders[prefix] = ijson.ObjectBuilder()
+            for builder_prefix, builder in list(builders.items()):
+                builder.event(event, value)
+                if builder_prefix == prefix and event not in ("start_map", "start_array", "map_key"):
+                    found[wanted[builder_prefix]] = builder.value
+                    del builders[builder_prefix]
+            if len(found) == len(wanted):
+                break
+    except ijson.JSONError as error:
+        raise ValueError(str(error)) from error
+    return found
+
+
+class _PathNode:
+    """A node in the tree of requested paths."""
+
+    __slots__ = ("children", "paths")
+
+    def __init__(self):
+        self.children: Dict[str, _PathNode] = {}
+        #: requested paths ending at this node
+        self.paths: List[str] = []
+
+
+def _select_in_text(text: str, paths: List[str]) -> Dict[str, Any]:
+    """Scan JSON text and only decode values at requested paths."""
+    root = _PathNode()
+    for path in paths:
+        node = root
+        for path_part in path.split("/"):
+            node = node.children.setdefault(path_part, _PathNode())
+        node.paths.append(path)
+
+    found: Dict[str, Any] = {}
+    try:
+        pos = _WHITESPACES.match(text, 0).end()
+        if text[pos:pos + 1] == "{":
+            _select_in_object(text, pos, root, found, len(paths))
+        else:
+            # Not an object so no path can match, but let invalid JSON raise an error
+            _DECODER.raw_decode(text, pos)
+    except IndexError as error:
+        raise ValueError("Unterminated JSON") from error
+    return found
+
+
+def _select_in_object(text: str, pos: int, node: _PathNode, found: Dict[str, Any], expected: int) -> int:
+    """Walk the JSON object starting at pos, fill found values, return the position after the object."""
+    pos = _WHITESPACES.match(text, pos + 1).end()
+    if text[pos] == "}":
+        return pos + 1
+    while True:
+        if text[pos] != '"':
+            raise ValueError(f"Expecting property name at {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _WHITESPACES.match(text, pos).end()
+        if text[pos] != ":":
+            raise ValueError(f"Expecting ':' delimiter at {pos}")
+        pos = _WHITESPACES.match(text, pos + 1).end()
+
+        child = node.children.get(key)
+        if child is None:
+            pos = _skip_value(text, pos)
+        elif child.paths:
+            value, pos = _DECODER.raw_decode(text, pos)
+            _collect(value, child, found)
+        elif text[pos] == "{":
+            pos = _select_in_object(text, pos, child, found, expected)
+        else:
+            pos = _skip_value(text, pos)
+        if len(found) == expected:
+            return pos
+
+        pos = _WHITESPACES.match(text, pos).end()
+        if text[pos] == "}":
+            return pos + 1
+        if text[pos] != ",":
+            raise ValueError(f"Expecting ',' delimiter at {pos}")
+        pos = _WHITESPACES.match(text, pos + 1).end()
+
+
+def _collect(value: Any, node: _PathNode, found: Dict[str, Any]):
+    """Record a decoded value for the paths of a node, and values for deeper paths found inside it."""
+    for node_path in node.paths:
+        found[node_path] = value
+    if isinstance(value, dict):
+        for key, child in node.children.items():
+            if key in value:
+                _collect(value[key], child, found)
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Return the position right after the JSON value starting at pos, without decoding it."""
+    char = text[pos]
+    if char == '"':
+        return scanstring(text, pos + 1)[1]
+    if char not in "{[":
+        return _DECODER.raw_decode(text, pos)[1]
+    depth = 0
+    while True:
+        match = _STRUCTURE.search(text, pos)
+        if not match:
+            raise ValueError("Unterminated JSON")
+        pos = match.end()
+        char = match.group()
+        if char == '"':
+            pos = scanstring(text, pos)[1]
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
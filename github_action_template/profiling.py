@@ -0,0 +1,134 @@
+"""
+Define a profiler of action runs, enabled by the ACTION_PROFILE environment variable.
+
+ACTION_PROFILE=cpu profiles run with cProfile, ACTION_PROFILE=memory traces its allocations with tracemalloc, and
+ACTION_PROFILE=both does both. The top hotspots are logged in collapsed groups, and full profiles are saved in the
+action-profiles directory of the workspace, to upload them as artifacts:
+- <action>.prof files can be read with `python -m pstats` or tools like snakeviz,
+- <action>.tracemalloc files can be loaded with tracemalloc.Snapshot.load,
+where <action> is the qualified class name of the action, prefixed by its step number in pipelines.
+This module is only imported when ACTION_PROFILE is set, so that runs are not slowed down otherwise.
+"""
+import cProfile
+import io
+import pstats
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from github_action_template.entrypoint import PROFILE_VARIABLE
+
+if TYPE_CHECKING:  # pragma: no cover
+    from github_action_template.framework import GitHubAction
+
+#: what is profiled for each value of PROFILE_VARIABLE: CPU and memory
+MODES = {"cpu": (True, False), "memory": (False, True), "both": (True, True)}
+#: directory of the workspace where profiles are saved
+PROFILE_DIRECTORY = "action-profiles"
+# Allocations made by the profiler itself
+_IGNORED_FRAMES = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, "<frozen importlib.*>"), tracemalloc.Filter(False, "<unknown>"))
+
+
+class Profiler:
+    """A context profiling the run of an action, then logging hotspots and saving profiles."""
+
+    def __init__(self, mode: str, action: "GitHubAction", *, name: Optional[str] = None, top: int = 20,
+                 frames: int = 10):
+        """
+        :param mode: cpu, memory or both, see PROFILE_VARIABLE
+        :param action: the profiled action, whose workspace receives profiles and whose log receives hotspots
+        :param name: file name of saved profiles without extension, the qualified class name of the action by default
+        :param top: number of hotspots to log
+        :param frames: number of frames of allocation tracebacks kept by tracemalloc
+        """
+        self.mode = mode.strip().lower()
+        self.action = action
+        action_class = action.__class__
+        self.name = name or f"{action_class.__module__}.{action_class.__qualname__}"
+        self.top = top
+        self.frames = frames
+        self.cpu, self.memory = MODES.get(self.mode, (False, False))
+        self._profile: Optional[cProfile.Profile] = None
+
+    @property
+    def output_dir(self) -> Path:
+        """Where profiles are saved."""
+        return self.action.github_env.workspace / PROFILE_DIRECTORY
+
+    def _path(self, suffix: str) -> Path:
+        return self.output_dir / f"{self.name}{suffix}"
+
+    def __enter__(self) -> "Profiler":
+        if not self.cpu and not self.memory:
+            self.action.warning(f"Ignoring unknown {PROFILE_VARIABLE} value '{self.mode}', expecting one of "
+                                f"{', '.join(MODES)}")
+        if self.memory:
+            tracemalloc.start(self.frames)
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.cpu and not self.memory:
+            return
+        if self._profile:
+            self._profile.disable()
+        snapshot, peak = None, 0
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if self._profile:
+            self._log_group(f"CPU profile: top {self.top} functions by cumulative time", self._cpu_report())
+        if snapshot:
+            self._log_group(f"Memory profile: top {self.top} allocation lines, peak {_size(peak)}",
+                            self._memory_report(snapshot))
+
+    def _cpu_report(self) -> List[str]:
+        path = self._path(".prof")
+        saved = self._save(self._profile.dump_stats, path)
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        # Skip the header repeating what the group title says
+        lines = output.getvalue().strip().splitlines()
+        start = next((index for index, line in enumerate(lines) if line.lstrip().startswith("ncalls")), 0)
+        if not saved:
+            return lines[start:]
+        return [*lines[start:], "", f"Full profile saved to {path}, read it with: python -m pstats {path}"]
+
+    def _memory_report(self, snapshot: tracemalloc.Snapshot) -> List[str]:
+        path = self._path(".tracemalloc")
+        saved = self._save(snapshot.dump, path)
+        statistics = snapshot.statistics("lineno")
+        lines = [f"{_size(stat.size):>10} in {stat.count:>7} blocks: {stat.traceback[0].filename}:"
+                 f"{stat.traceback[0].lineno}" for stat in statistics[:self.top]]
+        if not saved:
+            return lines
+        return [*lines, "", f"Full snapshot saved to {path}, load it with tracemalloc.Snapshot.load"]
+
+    def _save(self, save: Callable[[str], None], path: Path) -> bool:
+        """Save a profile with a dump function, and return whether it was saved; a failure does not fail the run."""
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            save(str(path))
+        except OSError as error:
+            self.action.warning(f"Cannot save profile to {path}: {error}")
+            return False
+        return True
+
+    def _log_group(self, title: str, lines: List[str]):
+        writer = self.action.command_writer
+        writer.write(f"::group::{title}")
+        writer.write_lines(lines)
+        writer.write("::endgroup::")
+
+
+def _size(size: float) -> str:
+    """Return a human readable size in bytes."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
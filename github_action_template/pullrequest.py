@@ -0,0 +1,107 @@
+"""Define a view of a pull request built from an event payload, without GitHub API calls."""
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from github3.pulls import PullRequest
+
+# github3 attributes named differently from payload properties
+_RENAMED = {
+    "additions_count": "additions",
+    "changed_files_count": "changed_files",
+    "comments_count": "comments",
+    "commits_count": "commits",
+    "deletions_count": "deletions",
+    "links": "_links",
+    "review_comments_count": "review_comments",
+    }
+# Payload properties named like github3 methods, the methods win
+_SHADOWED = frozenset(("commits", "review_comments"))
+
+
+class PayloadObject:
+    """Attribute access to a JSON object of an event payload, like pull_request.head.sha."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return _convert(name, self._data[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the underlying JSON object."""
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"PayloadObject({self._data!r})"
+
+
+class PullRequestView:
+    """
+    A pull request read from the event payload, that behaves much like a github3 PullRequest.
+
+    Properties present in the payload, like number, title, body, state, draft, user.login or head.sha, are read without
+    any API call; dates are converted to datetime objects like github3 does. Anything else, like methods files(),
+    commits() or create_comment(), or properties missing from the payload, is delegated to the full github3
+    PullRequest, fetched from GitHub API on first need only.
+    """
+
+    def __init__(self, data: Dict[str, Any], fetch: Callable[[], "PullRequest"]):
+        """
+        :param data: the pull_request property of the event payload
+        :param fetch: returns the github3 PullRequest, with an API call
+        """
+        self._data = data
+        self._fetch = fetch
+        self._pull_request: Optional["PullRequest"] = None
+
+    @property
+    def pull_request(self) -> "PullRequest":
+        """The full github3 PullRequest, fetched on first access."""
+        if self._pull_request is None:
+            self._pull_request = self._fetch()
+        return self._pull_request
+
+    @property
+    def fetched(self) -> bool:
+        """Tell whether the full github3 PullRequest has already been fetched."""
+        return self._pull_request is not None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the pull request JSON object from the payload."""
+        return self._data
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        key = _RENAMED.get(name, name)
+        if key in self._data and name not in _SHADOWED:
+            return _convert(key, self._data[key])
+        return getattr(self.pull_request, name)
+
+    def __repr__(self) -> str:
+        return f"<PullRequestView [#{self._data.get('number')}]>"
+
+
+def _convert(key: str, value: Any) -> Any:
+    """Convert a JSON value to what github3 would provide."""
+    if isinstance(value, dict):
+        return PayloadObject(value)
+    if isinstance(value, list):
+        return [PayloadObject(item) if isinstance(item, dict) else item for item in value]
+    if key.endswith("_at") and isinstance(value, str):
+        try:
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return value
+    return value
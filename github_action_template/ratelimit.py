@@ -0,0 +1,139 @@
+"""Define a scheduler pacing GitHub API requests according to GitHub rate limits."""
+import random
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+#: HTTP statuses GitHub uses when a rate limit is exceeded
+RATE_LIMIT_STATUSES = (403, 429)
+
+
+class RateLimiter:  # pylint: disable=R0902
+    """
+    Paces API requests with a token bucket, and tracks GitHub rate limit quota from response headers.
+
+    It is shared by all API clients of an action so that they all respect the same limits:
+    - requests are spread to at most `rate` per second, after an initial burst of `burst` requests,
+    - when the primary quota (X-RateLimit-Remaining) is exhausted, requests wait until it is reset (X-RateLimit-Reset)
+      if that is not later than `max_wait` seconds,
+    - responses telling that a secondary rate limit is exceeded are retried up to `max_retries` times, after the
+      Retry-After delay if given or else after an exponential delay with jitter.
+    It is thread-safe, and delays are computed but not waited for so that it can be used by asyncio clients too.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, *, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0, max_wait: float = 900.0, clock: Callable[[], float] = time.time):
+        """
+        :param rate: maximum average number of requests per second
+        :param burst: maximum number of requests sent without pacing
+        :param max_retries: maximum number of retries of a request exceeding a secondary rate limit
+        :param base_delay: delay in seconds before a first retry without Retry-After header, doubled for each retry
+        :param max_delay: maximum delay in seconds before a retry without Retry-After header
+        :param max_wait: maximum delay in seconds to wait for a primary rate limit reset
+        :param clock: returns current time in seconds since epoch
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        #: last known primary quota values from response headers, or None if unknown yet
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None
+        #: counters
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def reserve(self) -> float:
+        """
+        Book a slot for a new request.
+
+        :return: the delay in seconds to wait before sending the request
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if self.remaining is not None:
+                if self.remaining <= 0 and self.reset is not None and 0 < self.reset - now <= self.max_wait:
+                    delay = max(delay, self.reset - now)
+                # Concurrent requests would not see the quota decrease before their response otherwise
+                self.remaining -= 1
+            self.requests += 1
+            self._count_wait(delay)
+            return delay
+
+    def update(self, status: int, headers: Mapping[str, str], body: str = "", attempt: int = 0) -> Optional[float]:
+        """
+        Update quota from response headers, and tell whether the request should be retried.
+
+        :param status: the response HTTP status
+        :param headers: the response headers, with case-insensitive names
+        :param body: the response body text, if already available, to detect secondary rate limits
+        :param attempt: number of retries already done for this request
+        :return: None if the response should be used, or else the delay in seconds to wait before a retry
+        """
+        with self._lock:
+            self._update_quota(headers)
+            if status not in RATE_LIMIT_STATUSES or attempt >= self.max_retries:
+                return None
+            retry_after = _to_float(headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = retry_after + random.uniform(0, 1)
+            elif status == 429 or "secondary rate limit" in body.lower():
+                exponential = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay = random.uniform(exponential / 2, exponential)
+            elif self.remaining == 0 and self.reset is not None and 0 < self.reset - self._clock() <= self.max_wait:
+                delay = self.reset - self._clock() + random.uniform(0, 1)
+            else:
+                # A plain permission error
+                return None
+            self.retries += 1
+            self._count_wait(delay)
+            return delay
+
+    def _update_quota(self, headers: Mapping[str, str]):
+        """Record primary quota values from response headers, if present."""
+        limit = _to_float(headers.get("X-RateLimit-Limit"))
+        remaining = _to_float(headers.get("X-RateLimit-Remaining"))
+        reset = _to_float(headers.get("X-RateLimit-Reset"))
+        if limit is not None:
+            self.limit = int(limit)
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset is not None:
+            self.reset = reset
+
+    def _count_wait(self, delay: float):
+        if delay > 0:
+            self.throttled += 1
+            self.waited += delay
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return counters and last known quota values."""
+        return {"requests": self.requests, "retries": self.retries, "throttled": self.throttled,
+                "waited": round(self.waited, 3), "limit": self.limit, "remaining": self.remaining,
+                "reset": self.reset}
+
+    def summary(self) -> str:
+        """Return a human-readable summary of counters, for logs."""
+        quota = f"{self.remaining}/{self.limit}" if self.limit is not None else "unknown"
+        return (f"API requests: {self.requests}, retries: {self.retries}, throttled: {self.throttled} "
+                f"({self.waited:.1f}s), remaining quota: {quota}")
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
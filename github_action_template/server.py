@@ -0,0 +1,185 @@
+"""
+Define a long-lived server running actions, to avoid interpreter start and imports on each run.
+
+On self-hosted runners running the same actions many times, start a server once, for instance with
+``action-entrypoint --serve /run/action.sock my_action.action``, then set ACTION_SERVER_SOCKET environment variable of
+jobs to the socket path: action-entrypoint then only forwards its arguments and environment to the server, and relays
+its output and exit code.
+
+Actions are run one at a time, each with its own environment, arguments (also in sys.argv), working directory and
+GitHubEnvironment; only imported modules and connections to GitHub are kept from a run to the next one. Actions must
+therefore not keep run state in module or class attributes.
+"""
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO
+
+
+class _FrameWriter(io.TextIOBase):
+    """A text stream sending what is written to it as frames of a stream name, like stdout."""
+
+    def __init__(self, output: BinaryIO, name: str):
+        super().__init__()
+        self._output = output
+        self._name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            _send_frame(self._output, {self._name: text})
+        return len(text)
+
+
+class _InvocationHandler(socketserver.StreamRequestHandler):
+    """Runs the action of an invocation request, and sends its output and exit code back."""
+
+    server: "ActionServer"
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            args, env = list(request["argv"]), dict(request["env"])
+            if request.get("event_path"):
+                env["GITHUB_EVENT_PATH"] = request["event_path"]
+        except (ValueError, KeyError, TypeError) as error:
+            _send_frame(self.wfile, {"stdout": f"::error::Invalid action server request: {error}\n", "exit": 1})
+            return
+        exit_code = self.server.invoke(args, env, request.get("cwd"), _FrameWriter(self.wfile, "stdout"),
+                                       _FrameWriter(self.wfile, "stderr"))
+        _send_frame(self.wfile, {"exit": exit_code})
+
+
+class ActionServer(socketserver.UnixStreamServer):
+    """
+    Runs actions requested over a Unix socket, in this process.
+
+    The socket is only accessible to the user running the server, as requests carry tokens.
+    """
+
+    def __init__(self, socket_path: str, preload: Iterable[str] = ()):
+        """
+        :param socket_path: path of the Unix socket to listen to, replaced if it exists
+        :param preload: modules to import right away, like action modules
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        # Created with owner permissions only, so that other users can never connect, even right after bind
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _InvocationHandler)
+        finally:
+            os.umask(umask)
+        self.socket_path = socket_path
+        # pylint: disable=C0415
+        from github_action_template.adapters import GitHubAdapter
+        from github_action_template.framework import GitHub  # noqa: F401
+        GitHubAdapter.share_connections()
+        for module in preload:
+            importlib.import_module(module)
+
+    def invoke(self, args: List[str], env: Dict[str, str], cwd: Optional[str], stdout: TextIO, stderr: TextIO) -> int:
+        """
+        Run an action like action-entrypoint would, in the given environment and working directory.
+
+        :return: the exit code of action-entrypoint
+        """
+        # Imported here as the entrypoint imports this module
+        from github_action_template.entrypoint import run  # pylint: disable=C0415
+        with _process_state(args, env, cwd), redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                exit_code = run(args, env)
+            except SystemExit as exit_:
+                exit_code = exit_.code if isinstance(exit_.code, int) else int(exit_.code is not None)
+            except Exception as error:  # pylint: disable=W0703
+                print(f"::error::Action server failed to run action: {error.__class__.__name__}: {error}")
+                exit_code = 1
+            sys.stdout.flush()
+        return exit_code
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def _process_state(args: List[str], env: Mapping[str, str], cwd: Optional[str]) -> Iterator[None]:
+    """Replace process arguments, environment variables and working directory for the duration of an action run."""
+    saved_argv, saved_env, saved_cwd = sys.argv, dict(os.environ), os.getcwd()
+    sys.argv = [*saved_argv[:1], *args]
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        if cwd:
+            os.chdir(cwd)
+        yield
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+def serve(socket_path: str, preload: Iterable[str] = ()) -> int:
+    """Run an action server until interrupted, and return the exit code of action-entrypoint --serve."""
+    with ActionServer(socket_path, preload) as server:
+        print(f"Action server listening on {socket_path}")
+        sys.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def forward(socket_path: str, args: List[str], env: Mapping[str, str], stdout: Optional[TextIO] = None,
+            stderr: Optional[TextIO] = None) -> Optional[int]:
+    """
+    Run an action in an action server, relaying its output.
+
+    :param socket_path: the Unix socket of the server
+    :param args: arguments of action-entrypoint, the FQ python class name of the action first
+    :param env: environment variables of the action
+    :param stdout: where to write the output of the action, or None for sys.stdout
+    :param stderr: where to write the error output of the action, or None for sys.stderr
+    :return: the exit code of the action, or None if the server is not available
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    event_path = env.get("GITHUB_EVENT_PATH")
+    request = {"argv": list(args), "env": dict(env), "cwd": os.getcwd(),
+               "event_path": os.path.abspath(event_path) if event_path else None}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    with client, client.makefile("rwb") as stream:
+        _send_frame(stream, request)
+        for line in stream:
+            frame = json.loads(line)
+            if "stdout" in frame:
+                stdout.write(frame["stdout"])
+            if "stderr" in frame:
+                stderr.write(frame["stderr"])
+            if "exit" in frame:
+                stdout.flush()
+                return frame["exit"]
+    stdout.write("::error::Action server closed the connection before the end of the action\n")
+    return 2
+
+
+def _send_frame(output: BinaryIO, frame: Dict[str, Any]):
+    output.write(json.dumps(frame).encode("utf-8") + b"\n")
+    output.flush()
@@ -0,0 +1,157 @@
+"""Define a writer of job summaries, appending markdown to the GITHUB_STEP_SUMMARY file as it is produced."""
+import html
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from github_action_template.commands import CommandWriter
+
+#: maximum size in bytes of the summary of a step, beyond which GitHub rejects it
+MAX_SUMMARY_BYTES = 1024 * 1024
+TRUNCATION_MARKER = "*Summary truncated: size budget reached.*"
+
+
+class StepSummary:
+    """
+    Appends markdown to a job summary, in bounded memory.
+
+    Content is written line by line through a CommandWriter, so it is flushed to the file in batches instead of being
+    held in memory until the end, and tables are streamed row by row. Once the size budget is reached, a truncation
+    marker is written and any further content is dropped, except the closing tags of open sections, which are reserved
+    in the budget so that the summary remains valid markdown.
+    """
+
+    def __init__(self, writer: Optional[CommandWriter], *, max_bytes: int = MAX_SUMMARY_BYTES, size: int = 0,
+                 scrub: Callable[[str], str] = str):
+        """
+        :param writer: where to write markdown lines, or None to drop them when there is no summary file
+        :param max_bytes: size budget in bytes of the whole summary
+        :param size: size in bytes of the summary already written, if any
+        :param scrub: called on text before it is written, to replace masked values
+        """
+        self.writer = writer
+        self.max_bytes = max_bytes
+        #: size in bytes of the summary, including what is still buffered
+        self.size = size
+        #: whether some content was dropped because of the size budget
+        self.truncated = False
+        self.scrub = scrub
+        self._closing: List[str] = []
+        self._reserved = len(TRUNCATION_MARKER.encode("utf-8")) + 2
+
+    def write_lines(self, lines: Iterable[str]) -> bool:
+        """
+        Write markdown lines, whose text is not escaped, unless the size budget is reached.
+
+        :return: whether lines were written, all of them or none
+        """
+        lines = [self.scrub(line) for line in lines]
+        size = sum(len(line.encode("utf-8")) + 1 for line in lines)
+        if self.truncated or self.size + size + self._reserved > self.max_bytes:
+            self._truncate()
+            return False
+        self._write(lines, size)
+        return True
+
+    def _write(self, lines: List[str], size: int):
+        self.size += size
+        if self.writer:
+            self.writer.write_lines(lines)
+
+    def _truncate(self):
+        if not self.truncated:
+            self.truncated = True
+            self._write(["", TRUNCATION_MARKER], len(TRUNCATION_MARKER.encode("utf-8")) + 2)
+
+    def text(self, markdown: str) -> bool:
+        """Write a markdown paragraph, followed by an empty line."""
+        return self.write_lines([*markdown.splitlines(), ""])
+
+    def heading(self, text: str, level: int = 2) -> bool:
+        """Write a heading, followed by an empty line."""
+        return self.write_lines([f"{'#' * level} {_single_line(text)}", ""])
+
+    @contextmanager
+    def section(self, title: str, *, expanded: bool = False) -> Iterator["StepSummary"]:
+        """
+        Return a context writing what is written in it in a collapsible section.
+
+        :param title: the plain text title of the section
+        :param expanded: whether the section is expanded by default
+        """
+        closing = ["</details>", ""]
+        opened = self.write_lines([f"<details{' open' if expanded else ''}><summary>{html.escape(title)}</summary>",
+                                   ""])
+        closing_size = sum(len(line) + 1 for line in closing)
+        if opened:
+            self._reserved += closing_size
+        try:
+            yield self
+        finally:
+            if opened:
+                self._reserved -= closing_size
+                self._write(closing, closing_size)
+
+    @contextmanager
+    def table(self, headers: Sequence[Any]) -> Iterator["SummaryTable"]:
+        """
+        Return a context writing a markdown table row by row, see SummaryTable.
+
+        :param headers: the column titles
+        """
+        table = SummaryTable(self, headers)
+        try:
+            yield table
+        finally:
+            table.close()
+
+    def flush(self):
+        """Write buffered lines to the summary file."""
+        if self.writer:
+            self.writer.flush()
+
+
+class SummaryTable:
+    """A markdown table of a StepSummary, whose rows are written as soon as they are added."""
+
+    def __init__(self, summary: StepSummary, headers: Sequence[Any]):
+        self.summary = summary
+        #: number of rows written, and of rows dropped because of the size budget
+        self.rows = 0
+        self.dropped = 0
+        self._started = summary.write_lines(["", _row(headers), "|" + "---|" * len(headers)])
+
+    def add_row(self, cells: Sequence[Any]) -> bool:
+        """
+        Write a row, whose cells are converted to text and escaped.
+
+        :return: whether the row was written, False meaning the size budget is reached and next rows can be skipped
+        """
+        if self._started and self.summary.write_lines([_row(cells)]):
+            self.rows += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]) -> int:
+        """Write rows as they are iterated, stopping once the size budget is reached, and return the number written."""
+        written = 0
+        for cells in rows:
+            if not self.add_row(cells):
+                break
+            written += 1
+        return written
+
+    def close(self):
+        """End the table."""
+        if self._started:
+            self.summary.write_lines([""])
+
+
+def _single_line(text: Any) -> str:
+    return str(text).replace("\r", "").replace("\n", " ")
+
+
+def _row(cells: Sequence[Any]) -> str:
+    escaped = (html.escape(str(cell), quote=False).replace("|", "\\|").replace("\r", "").replace("\n", "<br>")
+               for cell in cells)
+    return f"| {' | '.join(escaped)} |"
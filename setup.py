@@ -37,9 +37,13 @@ setup(
         "Topic :: Software Development :: Build Tools",
         "Topic :: Software Development :: Version Control :: Git",
         ],
-    packages=find_packages(exclude=("tests",)),
+    packages=find_packages(exclude=("tests", "benchmarks")),
     python_requires='>=3.8',
     install_requires=["github3.py>=1.3.0"],
+    extras_require={
+        "async": ["aiohttp"],
+        "fast": ["orjson", "ijson"],
+        },
     entry_points={
         'console_scripts': ['action-entrypoint=github_action_template.entrypoint:main'],
         }
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock, patch
+
+from requests import PreparedRequest, Request, Response, Session
+
+from github_action_template.adapters import GitHubAdapter
+from github_action_template.httpcache import ResponseCache
+from github_action_template.metrics import Metrics
+from github_action_template.ratelimit import RateLimiter
+
+
+def _response(status: int, headers=None, body: bytes = b"") -> Response:
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+@patch("github_action_template.adapters.HTTPAdapter.send")
+def test_github_adapter_retries_rate_limited_requests(mock_send):
+    sleep = MagicMock()
+    mock_send.side_effect = [
+        _response(429, {"Retry-After": "3"}),
+        _response(403, {}, b'{"message": "You have exceeded a secondary rate limit"}'),
+        _response(200, {"X-RateLimit-Remaining": "10"}, b"{}"),
+        ]
+    limiter = RateLimiter(rate=1000, base_delay=0.5)
+    adapter = GitHubAdapter(limiter, sleep=sleep)
+    request = PreparedRequest()
+
+    assert adapter.send(request, timeout=5).status_code == 200
+    assert mock_send.call_count == 3
+    mock_send.assert_called_with(request, timeout=5)
+    assert sleep.call_count == 2
+    assert 3 <= sleep.call_args_list[0][0][0] <= 4
+    assert 0.5 <= sleep.call_args_list[1][0][0] <= 1
+    assert limiter.requests == 3
+    assert limiter.retries == 2
+    assert limiter.remaining == 10
+
+
+@patch("github_action_template.adapters.HTTPAdapter.send")
+def test_github_adapter_without_rate_limiter(mock_send):
+    mock_send.return_value = _response(429)
+    adapter = GitHubAdapter()
+    assert adapter.send(PreparedRequest()).status_code == 429
+    assert mock_send.call_count == 1
+
+
+def test_github_adapter_mount_on():
+    session = Session()
+    adapter = GitHubAdapter()
+    adapter.mount_on(session)
+    assert session.get_adapter("https://api.github.com/repos") is adapter
+    assert session.get_adapter("http://localhost/repos") is adapter
+
+
+@patch("github_action_template.adapters.HTTPAdapter.send")
+def test_github_adapter_revalidates_cached_responses(mock_send, tmp_path):
+    cache = ResponseCache(tmp_path)
+    adapter = GitHubAdapter(cache=cache)
+    mock_send.side_effect = [
+        _response(200, {"ETag": '"v1"', "Content-Type": "application/json; charset=utf-8", "Content-Encoding": "gzip",
+                        "X-RateLimit-Remaining": "10"}, b'{"x": 1}'),
+        _response(304, {"ETag": '"v1"', "X-RateLimit-Remaining": "9"}),
+        _response(200, {"ETag": '"v2"'}, b'{"x": 2}'),
+        ]
+
+    request = Request("GET", "https://api.github.com/x", headers={"Accept": "application/json"}).prepare()
+    response = adapter.send(request)
+    assert response.json() == {"x": 1}
+    assert not getattr(response, "from_cache", False)
+    assert "If-None-Match" not in mock_send.call_args[0][0].headers
+
+    request = Request("GET", "https://api.github.com/x", headers={"Accept": "application/json"}).prepare()
+    response = adapter.send(request)
+    assert mock_send.call_args[0][0].headers["If-None-Match"] == '"v1"'
+    assert response.from_cache
+    assert response.status_code == 200
+    assert response.json() == {"x": 1}
+    assert response.headers["X-RateLimit-Remaining"] == "9"
+    assert "Content-Encoding" not in response.headers
+    assert response.encoding == "utf-8"
+    assert response.request is request
+
+    request = Request("GET", "https://api.github.com/x", headers={"Accept": "application/json"}).prepare()
+    assert adapter.send(request).json() == {"x": 2}
+    assert cache.lookup("GET", "https://api.github.com/x", "application/json").etag == '"v2"'
+
+
+@patch("github_action_template.adapters.HTTPAdapter.send")
+def test_github_adapter_only_caches_get_requests(mock_send, tmp_path):
+    adapter = GitHubAdapter(cache=ResponseCache(tmp_path))
+    mock_send.return_value = _response(200, {"ETag": '"v1"'}, b"{}")
+    adapter.send(Request("POST", "https://api.github.com/x", json={}).prepare())
+    adapter.send(Request("GET", "https://api.github.com/x").prepare(), stream=True)
+    assert not list(tmp_path.iterdir())
+
+
+def test_github_adapter_shares_connections(monkeypatch):
+    monkeypatch.setattr(GitHubAdapter, "shared_pool_manager", None)
+    own_pools = GitHubAdapter().poolmanager
+    shared_pools = GitHubAdapter.share_connections()
+    adapter = GitHubAdapter()
+
+    assert own_pools is not shared_pools
+    assert adapter.poolmanager is shared_pools
+    assert GitHubAdapter.share_connections() is shared_pools
+    with patch.object(shared_pools, "clear") as mock_clear:
+        adapter.close()
+    mock_clear.assert_not_called()
+
+
+@patch("github_action_template.adapters.HTTPAdapter.send")
+def test_github_adapter_records_metrics(mock_send):
+    mock_send.side_effect = [_response(200), _response(404)]
+    metrics = Metrics()
+    adapter = GitHubAdapter(metrics=metrics)
+    request = PreparedRequest()
+    request.method = "GET"
+
+    adapter.send(request)
+    adapter.send(request)
+
+    assert metrics.requests == 2
+    assert metrics.errors == 1
+    assert metrics.by_status == {"200": 1, "404": 1}
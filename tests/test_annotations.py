@@ -0,0 +1,90 @@
+import pytest
+
+from github_action_template.annotations import Annotation, AnnotationCollector
+from github_action_template.commands import MemoryCommandWriter
+from github_action_template.fakegithub import FakeGitHub
+from github_action_template.framework import ActionError, GitHubAction, GitHubEnvironment
+
+CHECK_RUNS = "/repos/octocat/hello-world/check-runs"
+
+
+def test_annotation_collector_dedupes_and_sorts():
+    collector = AnnotationCollector()
+
+    assert collector.add(Annotation("b.py", 3, "Unused import"))
+    assert collector.add(Annotation("a.py", 10, "Syntax error", level="failure"))
+    assert collector.add(Annotation("a.py", 2, "Line too long"))
+    assert not collector.add(Annotation("b.py", 3, "Unused import"))
+
+    assert [(annotation.path, annotation.start_line) for annotation in collector.sorted()] == \
+        [("a.py", 2), ("a.py", 10), ("b.py", 3)]
+    assert collector.top(1) == ([Annotation("a.py", 2, "Line too long"),
+                                 Annotation("a.py", 10, "Syntax error", level="failure")], 1)
+
+
+def test_annotation_as_check_annotation():
+    assert Annotation("a.py", 2, "Too long", title="E501", column=121).as_check_annotation() == {
+        "path": "a.py", "start_line": 2, "end_line": 2, "annotation_level": "warning", "message": "Too long",
+        "title": "E501", "start_column": 121, "end_column": 121}
+    assert "start_column" not in Annotation("a.py", 2, "Block", end_line=4, column=1).as_check_annotation()
+    with pytest.raises(ValueError):
+        Annotation("a.py", 1, "Unknown level", level="error")
+
+
+def _action(fake: FakeGitHub, count: int) -> GitHubAction:
+    action = GitHubAction(GitHubEnvironment({"GITHUB_TOKEN": "token", "GITHUB_REPOSITORY": "octocat/hello-world",
+                                             "GITHUB_SHA": "6113728f", "ACTION_API_CACHE_DIR": "", **fake.env()}),
+                          MemoryCommandWriter())
+    for index in range(count):
+        action.annotate(f"src/file{index % 7}.py", index + 1, f"Finding {index}",
+                        level="failure" if index == 0 else "warning")
+    return action
+
+
+def test_upload_annotations_in_batches():
+    with FakeGitHub() as fake:
+        fake.add("POST", CHECK_RUNS, {"id": 7}, status=201)
+        fake.add("PATCH", f"{CHECK_RUNS}/7", {"id": 7})
+        action = _action(fake, 120)
+
+        assert action.upload_annotations("Lint") == 7
+
+        assert fake.requests == [("POST", CHECK_RUNS), ("PATCH", f"{CHECK_RUNS}/7"), ("PATCH", f"{CHECK_RUNS}/7")]
+        create, _, complete = fake.request_bodies
+        assert create["name"] == "Lint"
+        assert create["head_sha"] == "6113728f"
+        assert create["status"] == "in_progress"
+        assert create["output"]["summary"] == "1 failure, 119 warnings, 0 notices"
+        assert [len(body["output"]["annotations"]) for body in fake.request_bodies] == [50, 50, 20]
+        assert complete["status"] == "completed"
+        assert complete["conclusion"] == "failure"
+        uploaded = {annotation["message"] for body in fake.request_bodies
+                    for annotation in body["output"]["annotations"]}
+        assert len(uploaded) == 120
+        assert action.metrics.by_method == {"POST": 1, "PATCH": 2}
+
+
+def test_upload_annotations_resumes_after_failed_batch():
+    with FakeGitHub() as fake:
+        fake.add("POST", CHECK_RUNS, {"id": 7}, status=201)
+        fake.add("PATCH", f"{CHECK_RUNS}/7", {"id": 7})
+        fake.fail(f"{CHECK_RUNS}/7$", 502, times=1)
+        action = _action(fake, 60)
+
+        with pytest.raises(ActionError, match="1 of 2 batches sent"):
+            action.upload_annotations("Lint")
+        assert action.upload_annotations("Lint") == 7
+
+        assert fake.requests == [("POST", CHECK_RUNS), ("PATCH", f"{CHECK_RUNS}/7"), ("PATCH", f"{CHECK_RUNS}/7")]
+        assert len(fake.request_bodies[2]["output"]["annotations"]) == 10
+
+
+def test_upload_without_annotations_completes_check_run():
+    with FakeGitHub() as fake:
+        fake.add("POST", CHECK_RUNS, {"id": 8}, status=201)
+
+        assert _action(fake, 0).upload_annotations("Lint", summary="Nothing to report") == 8
+
+        assert fake.request_bodies[0]["status"] == "completed"
+        assert fake.request_bodies[0]["conclusion"] == "success"
+        assert fake.request_bodies[0]["output"] == {"title": "Lint", "summary": "Nothing to report", "annotations": []}
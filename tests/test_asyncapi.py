@@ -0,0 +1,174 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from github_action_template.asyncapi import APIError, AsyncGitHubAPI
+from github_action_template.framework import GitHubAction, GitHubEnvironment
+from github_action_template.ratelimit import RateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """A tiny stand-in for GitHub API."""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        server.requests.append((self.command, self.path, self.headers.get("Authorization")))
+        if self.path.startswith("/items"):
+            page = int(parse_qs(urlsplit(self.path).query).get("page", ["1"])[0])
+            headers = {"Link": f'<http://localhost:{server.server_port}/items?page={page + 1}>; rel="next"'} \
+                if page < 3 else {}
+            self._send(200, [page * 10, page * 10 + 1], headers)
+        elif self.path.startswith("/slow"):
+            with server.lock:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            time.sleep(0.05)
+            with server.lock:
+                server.in_flight -= 1
+            self._send(200, {"slow": True})
+        elif self.path.startswith("/limited"):
+            server.limited += 1
+            if server.limited < 3:
+                self._send(429, {"message": "You have exceeded a secondary rate limit"})
+            else:
+                self._send(200, {"ok": True}, {"X-RateLimit-Remaining": "42"})
+        elif self.path.startswith("/always-limited"):
+            self._send(429, {"message": "You have exceeded a secondary rate limit"})
+        elif self.path.startswith("/text"):
+            data = b"plain text"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send(404, {"message": "Not Found"})
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.requests.append((self.command, self.path, json.loads(self.rfile.read(length))))
+        if self.path == "/empty":
+            self.send_response(204)
+            self.end_headers()
+        else:
+            self._send(201, {"created": True})
+
+
+@pytest.fixture
+def api_server():
+    server = ThreadingHTTPServer(("localhost", 0), _Handler)
+    server.requests = []
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = server.limited = 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_github_api_requests(api_server):
+    async def scenario():
+        async with AsyncGitHubAPI(f"http://localhost:{api_server.server_port}/", "TOKEN") as api:
+            assert await api.get("/slow") == {"slow": True}
+            assert await api.post("empty", json={"x": 1}) is None
+            assert await api.post("/other", json={"y": 2}) == {"created": True}
+            assert await api.get("/text") == "plain text"
+            with pytest.raises(APIError) as error:
+                await api.get("/missing")
+            assert error.value.status == 404
+            assert "Not Found" in str(error.value)
+
+    asyncio.run(scenario())
+    assert api_server.requests == [
+        ("GET", "/slow", "token TOKEN"),
+        ("POST", "/empty", {"x": 1}),
+        ("POST", "/other", {"y": 2}),
+        ("GET", "/text", "token TOKEN"),
+        ("GET", "/missing", "token TOKEN"),
+        ]
+
+
+def test_async_github_api_paginate(api_server):
+    async def scenario():
+        async with AsyncGitHubAPI(f"http://localhost:{api_server.server_port}") as api:
+            return [item async for item in api.paginate("/items", per_page=2)]
+
+    assert asyncio.run(scenario()) == [10, 11, 20, 21, 30, 31]
+    assert [path for _, path, _ in api_server.requests] == ["/items?per_page=2", "/items?page=2", "/items?page=3"]
+    assert api_server.requests[0][2] is None
+
+
+def test_async_github_api_concurrency(api_server):
+    async def scenario():
+        async with AsyncGitHubAPI(f"http://localhost:{api_server.server_port}", concurrency=3) as api:
+            await asyncio.gather(*(api.get("/slow") for _ in range(10)))
+
+    asyncio.run(scenario())
+    assert api_server.max_in_flight == 3
+
+
+def test_async_github_api_connection_error():
+    async def scenario():
+        async with AsyncGitHubAPI("http://localhost:1") as api:
+            await api.get("/anything")
+
+    with pytest.raises(APIError) as error:
+        asyncio.run(scenario())
+    assert error.value.status is None
+
+
+def test_github_action_async_github_api(api_server):
+    github_env = MagicMock(spec=GitHubEnvironment)
+    github_env.api_url = f"http://localhost:{api_server.server_port}"
+    github_env.secret_token = "hush"
+
+    class AsyncAction(GitHubAction):
+        async_api_concurrency = 2
+
+        async def run(self, args):
+            return await self.async_github_api.get("/slow")
+
+    action = AsyncAction(github_env)
+    assert asyncio.run(action.run_coroutine(action.run([]))) == {"slow": True}
+    assert action.async_github_api is action.async_github_api
+    assert action.async_github_api.concurrency == 2
+    assert action.async_github_api._session is None
+    assert api_server.requests == [("GET", "/slow", "token hush")]
+
+
+def test_async_github_api_rate_limiter(api_server):
+    limiter = RateLimiter(rate=1000, max_retries=2, base_delay=0.01)
+
+    async def scenario():
+        async with AsyncGitHubAPI(f"http://localhost:{api_server.server_port}", rate_limiter=limiter) as api:
+            assert await api.get("/limited") == {"ok": True}
+            with pytest.raises(APIError) as error:
+                await api.get("/always-limited")
+            assert error.value.status == 429
+
+    asyncio.run(scenario())
+    assert [path for _, path, _ in api_server.requests] == ["/limited"] * 3 + ["/always-limited"] * 3
+    assert limiter.requests == 6
+    assert limiter.retries == 4
+    # Last known quota minus requests sent since then
+    assert limiter.remaining == 39
@@ -0,0 +1,39 @@
+import json
+from unittest.mock import patch
+
+from benchmarks.run_benchmarks import compare, main, write_payload
+
+
+def test_write_payload(tmp_path):
+    path = write_payload(tmp_path / "event.json", 100 * 1024)
+    assert 95 * 1024 < path.stat().st_size <= 100 * 1024
+    assert json.loads(path.read_text())["pull_request"]["number"] == 42
+
+
+def test_benchmarks_save_results(tmp_path):
+    output = tmp_path / "results.json"
+
+    assert main(["--quick", "--filter", "without_commands", "--output", str(output)]) == 0
+
+    results = json.loads(output.read_text())
+    assert results["quick"] is True
+    assert set(results["results"]) == {"without_commands/generated_token", "without_commands/given_token"}
+    assert results["results"]["without_commands/given_token"]["median"] > 0
+    assert main(["--quick", "--filter", "without_commands/given", "--compare", str(output)]) in (0, 1)
+
+
+def test_benchmarks_skip_setup_of_unselected_benchmarks():
+    with patch("benchmarks.run_benchmarks.write_payload") as write, \
+            patch("benchmarks.run_benchmarks.FakeGitHub") as fake:
+        assert main(["--quick", "--filter", "without_commands"]) == 0
+    write.assert_not_called()
+    fake.assert_not_called()
+
+
+def test_compare():
+    baseline = {"results": {"fast": {"unit": "s", "median": 1.0}, "memory": {"unit": "bytes", "value": 100},
+                            "removed": {"unit": "s", "median": 1.0}}}
+    results = {"results": {"fast": {"unit": "s", "median": 1.1}, "memory": {"unit": "bytes", "value": 200},
+                           "added": {"unit": "s", "median": 1.0}}}
+
+    assert compare(results, baseline) == ["memory: 200 bytes vs 100 (2.00x)"]
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import pickle
+from pathlib import Path
+
+import pytest
+
+from github_action_template.asyncapi import AsyncGitHubAPI
+from github_action_template.changedfiles import ChangedFile, ChangedFiles, fetch_changed_files
+from github_action_template.fakegithub import FakeGitHub
+from github_action_template.framework import ActionError, GitHubAction, GitHubEnvironment
+
+PATHS = ["README.md", "docs/index.md", "docs/api/framework.md", "src/app/main.py", "src/app/util.py",
+         "src/lib/deep/nested/module.py", "src/lib/deep/data.json", "tests/test_main.py", "setup.py"]
+FILES_PATH = "/repos/octocat/hello-world/pulls/42/files"
+
+
+def _names(files):
+    return [file.filename for file in files]
+
+
+@pytest.fixture
+def changed_files() -> ChangedFiles:
+    return ChangedFiles(ChangedFile(path) for path in PATHS)
+
+
+def test_changed_files_lookup(changed_files: ChangedFiles):
+    assert len(changed_files) == len(PATHS)
+    assert _names(changed_files) == PATHS
+    assert "docs/index.md" in changed_files
+    assert "docs" not in changed_files
+    assert changed_files.get("setup.py").status == "modified"
+    assert changed_files.get("missing.py") is None
+
+    changed_files.add(ChangedFile("setup.py", "removed"))
+    assert len(changed_files) == len(PATHS)
+    assert changed_files.get("setup.py").status == "removed"
+
+
+def test_changed_files_under(changed_files: ChangedFiles):
+    assert _names(changed_files.under("src/app")) == ["src/app/main.py", "src/app/util.py"]
+    assert _names(changed_files.under("/docs/")) == ["docs/index.md", "docs/api/framework.md"]
+    assert _names(changed_files.under("")) == PATHS
+    assert changed_files.under("src/ap") == []
+    assert changed_files.under("README.md") == []
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("README.md", ["README.md"]),
+    ("*.md", ["README.md"]),
+    ("**.md", ["README.md", "docs/index.md", "docs/api/framework.md"]),
+    ("**/*.md", ["README.md", "docs/index.md", "docs/api/framework.md"]),
+    ("docs/*", ["docs/index.md"]),
+    ("docs/**", ["docs/index.md", "docs/api/framework.md"]),
+    ("docs/", ["docs/index.md", "docs/api/framework.md"]),
+    ("src/**/*.py", ["src/app/main.py", "src/app/util.py", "src/lib/deep/nested/module.py"]),
+    ("src/*/deep/**", ["src/lib/deep/nested/module.py", "src/lib/deep/data.json"]),
+    ("src/lib/**/data.json", ["src/lib/deep/data.json"]),
+    ("src/app/[mu]*.py", ["src/app/main.py", "src/app/util.py"]),
+    ("src/app/[!m]*.py", ["src/app/util.py"]),
+    ("src/app/?ain.py", ["src/app/main.py"]),
+    ("src/**/deep/**.json", ["src/lib/deep/data.json"]),
+    ("**/test_*.py", ["tests/test_main.py"]),
+    ("**/tests/**", ["tests/test_main.py"]),
+    ("src/**/main.py", ["src/app/main.py"]),
+    ("./setup.py", ["setup.py"]),
+    ("**", PATHS),
+    ("src", []),
+    ("src/*.py", []),
+    ])
+def test_changed_files_match(changed_files: ChangedFiles, pattern: str, expected):
+    assert _names(changed_files.match(pattern)) == expected
+
+
+def test_changed_files_filter(changed_files: ChangedFiles):
+    assert _names(changed_files.filter(["src/**", "!**/deep/**", "docs/api/**"])) == [
+        "docs/api/framework.md", "src/app/main.py", "src/app/util.py"]
+    assert _names(changed_files.filter(["!src/**", "src/app/main.py"])) == ["src/app/main.py"]
+    assert changed_files.matches(["**.py", "!src/**", "!tests/**"])
+    assert not changed_files.matches(["**.py", "!src/**", "!tests/**", "!setup.py"])
+    assert not changed_files.matches([])
+
+
+def test_changed_files_pickle(changed_files: ChangedFiles):
+    changed_files.add(ChangedFile("docs/new.md", "renamed", 1, 2, "docs/old.md"))
+    loaded = pickle.loads(pickle.dumps(changed_files))
+    assert _names(loaded) == _names(changed_files)
+    assert _names(loaded.match("docs/*.md")) == ["docs/index.md", "docs/new.md"]
+    renamed = loaded.get("docs/new.md")
+    assert (renamed.status, renamed.additions, renamed.deletions, renamed.previous_filename) == \
+        ("renamed", 1, 2, "docs/old.md")
+
+
+def _files(count: int):
+    return [{"filename": f"src/module{index:04}.py", "status": "added", "additions": index, "deletions": 0}
+            for index in range(count)]
+
+
+@pytest.mark.parametrize("count, given, requests", [
+    (250, 250, 3),
+    (250, None, 3),
+    (0, 0, 1),
+    (0, None, 1),
+    # The pull request changed since the event: pages past the expected ones are fetched while full
+    (250, 150, 3),
+    (3500, 3500, 30),
+    ])
+def test_fetch_changed_files(count: int, given, requests: int):
+    with FakeGitHub() as fake:
+        fake.add("GET", FILES_PATH, _files(count))
+
+        async def fetch():
+            async with AsyncGitHubAPI(fake.url, "token") as api:
+                return await fetch_changed_files(api, "octocat", "hello-world", 42, count=given)
+        changed_files = asyncio.run(fetch())
+
+        assert len(changed_files) == min(count, 3000)
+        assert _names(changed_files) == [item["filename"] for item in _files(min(count, 3000))]
+        assert len(fake.requests) == requests
+
+
+def _action(fake: FakeGitHub, tmp_path: Path, payload) -> GitHubAction:
+    event_path = tmp_path / "event.json"
+    event_path.write_text(json.dumps({**payload, "repository": {"name": "hello-world", "owner": {"login": "octocat"}}}))
+    return GitHubAction(GitHubEnvironment({"GITHUB_TOKEN": "token", "GITHUB_EVENT_NAME": "pull_request",
+                                           "GITHUB_EVENT_PATH": str(event_path), "ACTION_API_CACHE_DIR": "",
+                                           "ACTION_MEMO_CACHE_DIR": str(tmp_path / "memo"), **fake.env()}))
+
+
+def test_get_changed_files_caches_index_by_head_sha(tmp_path: Path):
+    payload = {"pull_request": {"number": 42, "changed_files": 150, "head": {"sha": "6113728f"}}}
+    with FakeGitHub() as fake:
+        fake.add("GET", FILES_PATH, _files(150))
+        action = _action(fake, tmp_path, payload)
+        changed_files = action.get_changed_files()
+        assert len(changed_files) == 150
+        assert action.get_changed_files() is changed_files
+        next_action = GitHubAction(action.github_env)
+        next_action.continue_from(action)
+        assert next_action.get_changed_files() is changed_files
+        assert len(fake.requests) == 2
+
+        # Another run for the same head commit reads the index from the memo cache
+        assert _names(_action(fake, tmp_path, payload).get_changed_files()) == _names(changed_files)
+        assert len(fake.requests) == 2
+        payload["pull_request"]["head"]["sha"] = "84cd5cbd"
+        assert len(_action(fake, tmp_path, payload).get_changed_files()) == 150
+        assert len(fake.requests) == 4
+
+
+def test_get_changed_files_requires_pull_request(tmp_path: Path):
+    with FakeGitHub() as fake:
+        action = _action(fake, tmp_path, {})
+        action.github_env.env["GITHUB_EVENT_NAME"] = "push"
+        with pytest.raises(ActionError):
+            action.get_changed_files()
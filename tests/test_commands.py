@@ -0,0 +1,60 @@
+import io
+
+from github_action_template.commands import CommandWriter, MemoryCommandWriter
+
+
+def test_command_writer_buffers_until_flush():
+    stream = io.StringIO()
+    writer = CommandWriter(stream)
+    writer.write("::debug::XXX")
+    writer.write_lines(["::debug::YYY", "::debug::ZZZ"])
+    assert stream.getvalue() == ""
+    writer.flush()
+    assert stream.getvalue() == "::debug::XXX\n::debug::YYY\n::debug::ZZZ\n"
+    writer.flush()
+    assert stream.getvalue() == "::debug::XXX\n::debug::YYY\n::debug::ZZZ\n"
+
+
+def test_command_writer_flushes_when_full():
+    stream = io.StringIO()
+    writer = CommandWriter(stream, max_lines=2)
+    writer.write("A")
+    assert stream.getvalue() == ""
+    writer.write("B")
+    assert stream.getvalue() == "A\nB\n"
+
+    stream = io.StringIO()
+    writer = CommandWriter(stream, max_chars=10)
+    writer.write("AAAA")
+    assert stream.getvalue() == ""
+    writer.write("BBBB")
+    assert stream.getvalue() == "AAAA\nBBBB\n"
+
+
+def test_command_writer_uses_current_stdout(capsys):
+    writer = CommandWriter()
+    writer.write("XXX")
+    writer.flush()
+    assert capsys.readouterr().out == "XXX\n"
+
+
+def test_memory_command_writer():
+    writer = MemoryCommandWriter()
+    assert writer.lines == []
+    writer.write("XXX")
+    assert writer.lines == ["XXX"]
+    writer.write_lines(["YYY", "ZZZ"])
+    assert writer.lines == ["XXX", "YYY", "ZZZ"]
+
+
+def test_command_writer_close(capsys):
+    stream = io.StringIO()
+    writer = CommandWriter(stream)
+    writer.write("XXX")
+    writer.close()
+    assert stream.closed
+
+    writer = CommandWriter()
+    writer.write("XXX")
+    writer.close()
+    assert capsys.readouterr().out == "XXX\n"
@@ -1,7 +1,17 @@
-from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from github_action_template.entrypoint import main
-from github_action_template.framework import ActionError
+from github_action_template.entrypoint import main, run
+from github_action_template.framework import ActionError, GitHubAction, GitHubEnvironment
+
+#: maximum time in microseconds spent in package modules imported by action-entrypoint console script
+ENTRYPOINT_IMPORT_BUDGET_US = 150_000
+#: modules that only actions using them should pay for
+HEAVY_MODULES = {"aiohttp", "asyncio", "github3", "ijson", "orjson", "requests", "urllib3"}
 
 
 @patch("github_action_template.entrypoint.sys")
@@ -18,6 +28,8 @@ def test_main_should_call_action(mock_env, mock_importlib, mock_os, mock_sys):
     mock_importlib.import_module.assert_called_with("pkg.action")
     mock_importlib.import_module.return_value.Class.assert_called_with(mock_env.return_value)
     mock_importlib.import_module.return_value.Class.return_value.run.assert_called_with(["x", "y"])
+    mock_importlib.import_module.return_value.Class.return_value.debug_api_usage.assert_called_once_with()
+    mock_importlib.import_module.return_value.Class.return_value.flush_commands.assert_called_once_with()
 
 
 @patch("github_action_template.entrypoint.sys")
@@ -47,6 +59,7 @@ def test_main_should_return_two_on_failure(mock_env, mock_importlib, mock_os, mo
 
     mock_env.assert_called_with(mock_os.environ)
     mock_importlib.import_module.return_value.Class.return_value.run.assert_called_with(["x", "y"])
+    mock_importlib.import_module.return_value.Class.return_value.flush_commands.assert_called_once_with()
 
 
 @patch("github_action_template.entrypoint.sys")
@@ -61,3 +74,240 @@ def test_main_should_return_two_on_runtime_error(mock_env, mock_importlib, mock_
     assert main() == 2
 
     mock_env.assert_called_with(mock_os.environ)
+
+
+@patch("github_action_template.entrypoint.sys")
+@patch("github_action_template.entrypoint.os")
+@patch("github_action_template.entrypoint.importlib")
+@patch("github_action_template.entrypoint.GitHubEnvironment")
+def test_main_should_run_async_action(mock_env, mock_importlib, mock_os, mock_sys):
+    class AsyncAction(GitHubAction):
+        async def run(self, args):
+            self.set_env("ARGS", ",".join(args))
+
+    mock_os.environ = {}
+    mock_importlib.import_module.return_value.Class = AsyncAction
+    mock_sys.argv = ["entrypoint.sh", "pkg.action.Class", "x", "y"]
+    mock_env.return_value = GitHubEnvironment({})
+
+    with patch.object(AsyncAction, "set_env") as mock_set_env:
+        assert main() == 0
+    mock_set_env.assert_called_with("ARGS", "x,y")
+
+
+@patch("github_action_template.entrypoint.sys")
+@patch("github_action_template.entrypoint.os")
+@patch("github_action_template.entrypoint.importlib")
+@patch("github_action_template.entrypoint.GitHubEnvironment")
+def test_main_should_return_two_on_async_failure(mock_env, mock_importlib, mock_os, mock_sys):
+    class AsyncAction(GitHubAction):
+        async def run(self, args):
+            raise ActionError("Failure")
+
+    mock_os.environ = {}
+    mock_importlib.import_module.return_value.Class = AsyncAction
+    mock_sys.argv = ["entrypoint.sh", "pkg.action.Class"]
+    mock_env.return_value = GitHubEnvironment({})
+
+    assert main() == 2
+
+
+def test_entrypoint_import_cost():
+    # The console script when installed in this environment, otherwise the module it runs, with arguments going
+    # through main until the action fails to load
+    script = Path(sys.executable).with_name("action-entrypoint")
+    command = [str(script)] if script.exists() else [sys.executable, "-m", "github_action_template.entrypoint"]
+    completed = subprocess.run([*command, "tests.missing.Action"], capture_output=True, text=True,
+                               env={**os.environ, "PYTHONPROFILEIMPORTTIME": "1"}, check=False)
+    assert completed.returncode == 1
+    assert "::error::Cannot instantiate action 'tests.missing.Action'" in completed.stdout
+    self_times = {}
+    for line in completed.stderr.splitlines():
+        self_time, _, module = line.split("|")
+        self_time = self_time.rpartition(":")[2].strip()
+        if self_time.isdigit():
+            self_times[module.strip()] = int(self_time)
+
+    assert not HEAVY_MODULES & set(self_times)
+    # Own time of package modules, as cumulative time includes the standard library and varies with the load of hosts
+    assert sum(time for module, time in self_times.items()
+               if module.split(".")[0] == "github_action_template") < ENTRYPOINT_IMPORT_BUDGET_US
+
+
+@patch("github_action_template.entrypoint.sys")
+@patch("github_action_template.entrypoint.os")
+@patch("github_action_template.entrypoint.run_action")
+@patch("github_action_template.server.forward")
+def test_main_should_forward_to_action_server(mock_forward, mock_run_action, mock_os, mock_sys):
+    mock_os.environ = {"ACTION_SERVER_SOCKET": "/run/action.sock"}
+    mock_sys.argv = ["entrypoint.sh", "pkg.action.Class", "x"]
+    mock_forward.return_value = 2
+
+    assert main() == 2
+    mock_forward.assert_called_with("/run/action.sock", ["pkg.action.Class", "x"], mock_os.environ)
+    mock_run_action.assert_not_called()
+
+    mock_forward.return_value = None
+    assert main() == mock_run_action.return_value
+    mock_run_action.assert_called_with(["pkg.action.Class", "x"], mock_os.environ)
+
+
+@patch("github_action_template.entrypoint.sys")
+@patch("github_action_template.server.serve")
+def test_main_should_require_server_socket(mock_serve, mock_sys, capsys):
+    mock_sys.argv = ["entrypoint.sh", "--serve"]
+
+    assert main() == 2
+    assert capsys.readouterr().out.startswith("::error::Missing socket path, usage: action-entrypoint --serve SOCKET")
+    mock_serve.assert_not_called()
+
+    mock_sys.argv = ["entrypoint.sh", "--serve", "/run/action.sock", "pkg.action"]
+    assert main() == mock_serve.return_value
+    mock_serve.assert_called_with("/run/action.sock", ["pkg.action"])
+
+
+class ProducerAction(GitHubAction):
+    def run(self, args):
+        self.github_env.event_payload_find("pull_request/number")
+        self.set_output("produced", ",".join(args))
+
+
+class ConsumerAction(GitHubAction):
+    def run(self, args):
+        if "produced" not in self.outputs:
+            raise ActionError("Nothing produced")
+        self.set_output("consumed", self.outputs["produced"])
+
+
+def test_run_pipeline_shares_environment_and_outputs(capsys):
+    with patch("github_action_template.framework.load_json", return_value={}) as mock_load_json:
+        assert run(["--pipeline", "tests.test_entrypoint.ProducerAction", "a", "b",
+                    "--then", "tests.test_entrypoint.ConsumerAction"], {}) == 0
+
+    mock_load_json.assert_called_once()
+    output = capsys.readouterr().out
+    assert "::set-output name=consumed::a,b\n" in output
+    assert "  tests.test_entrypoint.ProducerAction: succeeded in " in output
+    assert "  tests.test_entrypoint.ConsumerAction: succeeded in " in output
+
+
+def test_run_closes_environment_files(tmp_path):
+    output_path = tmp_path / "output"
+    env = {"GITHUB_OUTPUT": str(output_path)}
+    with patch("github_action_template.framework.load_json", return_value={}), \
+            patch.object(GitHubAction, "close_commands", autospec=True,
+                         side_effect=GitHubAction.close_commands) as mock_close_commands:
+        assert run(["tests.test_entrypoint.ProducerAction", "a"], env) == 0
+        assert run(["--pipeline", "tests.test_entrypoint.ProducerAction", "b",
+                    "--then", "tests.test_entrypoint.ConsumerAction"], env) == 0
+
+    assert mock_close_commands.call_count == 2
+    assert output_path.read_text() == "produced=a\nproduced=b\nconsumed=b\n"
+    assert not mock_close_commands.call_args[0][0]._command_files
+
+
+def test_run_pipeline_stops_on_first_error(capsys):
+    assert run(["--pipeline", "tests.test_entrypoint.ConsumerAction", "--then", "tests.test_entrypoint.ProducerAction"],
+               {}) == 2
+
+    output = capsys.readouterr().out
+    assert "::error::Exiting with error code because of action error: Nothing produced\n" in output
+    assert "  tests.test_entrypoint.ProducerAction: skipped\n" in output
+    assert "::set-output name=produced::" not in output
+
+
+@patch("github_action_template.framework.load_json", MagicMock(return_value={}))
+def test_run_pipeline_may_continue_on_error(capsys):
+    assert run(["--pipeline", "--continue-on-error", "tests.test_entrypoint.MissingAction",
+                "--then", "tests.test_entrypoint.ConsumerAction", "--then", "tests.test_entrypoint.ProducerAction"],
+               {}) == 2
+
+    output = capsys.readouterr().out
+    assert "  tests.test_entrypoint.MissingAction: not instantiated in " in output
+    assert "  tests.test_entrypoint.ConsumerAction: failed in " in output
+    assert "::set-output name=produced::\n" in output
+
+
+def test_run_pipeline_requires_actions(capsys):
+    assert run(["--pipeline", "tests.test_entrypoint.ProducerAction", "--then"], {}) == 1
+    assert capsys.readouterr().out.startswith("::error::Missing action in pipeline arguments")
+
+
+class SlowAction(GitHubAction):
+    def run(self, args):
+        self.outputs["data"] = ",".join(str(index) for index in range(10000))
+
+
+def test_run_action_with_profiling(tmp_path, capsys):
+    assert run(["tests.test_entrypoint.SlowAction"], {"ACTION_PROFILE": "both", "GITHUB_WORKSPACE": str(tmp_path)}) == 0
+
+    output = capsys.readouterr().out
+    assert "::group::CPU profile: top 20 functions by cumulative time\n" in output
+    assert "test_entrypoint.py" in output
+    assert "::group::Memory profile: top 20 allocation lines, peak " in output
+    assert output.count("::endgroup::") == 2
+    profiles = {path.name for path in (tmp_path / "action-profiles").iterdir()}
+    assert profiles == {"tests.test_entrypoint.SlowAction.prof", "tests.test_entrypoint.SlowAction.tracemalloc"}
+
+
+def test_run_pipeline_with_profiling_keeps_profiles_of_each_step(tmp_path):
+    assert run(["--pipeline", "tests.test_entrypoint.SlowAction", "--then", "tests.test_entrypoint.SlowAction"],
+               {"ACTION_PROFILE": "cpu", "GITHUB_WORKSPACE": str(tmp_path)}) == 0
+
+    profiles = {path.name for path in (tmp_path / "action-profiles").iterdir()}
+    assert profiles == {"1-tests.test_entrypoint.SlowAction.prof", "2-tests.test_entrypoint.SlowAction.prof"}
+
+
+def test_run_action_with_profiling_warns_when_profiles_cannot_be_saved(tmp_path, capsys):
+    workspace = tmp_path / "workspace"
+    workspace.write_text("Not a directory")
+    env = {"ACTION_PROFILE": "both", "GITHUB_WORKSPACE": str(workspace)}
+    assert run(["tests.test_entrypoint.SlowAction"], env) == 0
+
+    output = capsys.readouterr().out
+    assert output.count(f"::warning::Cannot save profile to {workspace / 'action-profiles'}") == 2
+    assert "::group::CPU profile: top 20 functions by cumulative time\n" in output
+    assert "::group::Memory profile: top 20 allocation lines, peak " in output
+    assert "Full profile saved" not in output
+
+
+def test_run_action_with_unknown_profiling(tmp_path, capsys):
+    assert run(["tests.test_entrypoint.SlowAction"], {"ACTION_PROFILE": "disk", "GITHUB_WORKSPACE": str(tmp_path)}) == 0
+
+    assert "::warning::Ignoring unknown ACTION_PROFILE value 'disk', expecting one of cpu, memory, both\n" in \
+        capsys.readouterr().out
+    assert not (tmp_path / "action-profiles").exists()
+
+
+def test_run_action_without_profiling(tmp_path):
+    sys.modules.pop("github_action_template.profiling", None)
+    assert run(["tests.test_entrypoint.SlowAction"], {"GITHUB_WORKSPACE": str(tmp_path)}) == 0
+    assert "github_action_template.profiling" not in sys.modules
+
+
+def test_run_writes_metrics(tmp_path):
+    path = tmp_path / "metrics.json"
+    with patch("github_action_template.framework.load_json", return_value={}):
+        assert run(["--pipeline", "tests.test_entrypoint.ProducerAction",
+                    "--then", "tests.test_entrypoint.ConsumerAction"], {"ACTION_METRICS_FILE": str(path)}) == 0
+
+    metrics = json.loads(path.read_text())
+    assert metrics["actions"] == ["tests.test_entrypoint.ProducerAction", "tests.test_entrypoint.ConsumerAction"]
+    assert list(metrics["phases"]) == [f"tests.test_entrypoint.{name}Action/{phase}"
+                                       for name in ("Producer", "Consumer") for phase in ("load", "instantiate", "run")]
+
+    assert run(["tests.test_entrypoint.SlowAction"], {"ACTION_METRICS_FILE": str(path)}) == 0
+    assert list(json.loads(path.read_text())["phases"]) == ["load", "instantiate", "run"]
+
+
+def test_run_warns_when_metrics_cannot_be_saved(tmp_path, capsys):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    env = {"ACTION_METRICS_FILE": str(not_a_directory / "metrics.json")}
+
+    assert run(["tests.test_entrypoint.SlowAction"], env) == 0
+    assert f"::warning::Cannot save metrics to {not_a_directory / 'metrics.json'}: " in capsys.readouterr().out
+    with patch("github_action_template.framework.load_json", return_value={}):
+        assert run(["--pipeline", "tests.test_entrypoint.ProducerAction",
+                    "--then", "tests.test_entrypoint.ConsumerAction"], env) == 0
+    assert "::warning::Cannot save metrics to " in capsys.readouterr().out
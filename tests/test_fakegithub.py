@@ -0,0 +1,116 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from github_action_template.fakegithub import FakeGitHub
+from github_action_template.framework import ActionError, GitHubAction, GitHubEnvironment
+
+FIXTURE = Path(__file__).parent / "fixtures" / "fakegithub.json"
+
+
+def _action(fake: FakeGitHub, tmp_path: Path) -> GitHubAction:
+    event_path = tmp_path / "event.json"
+    event_path.write_text(json.dumps({"pull_request": {"number": 42},
+                                      "repository": {"name": "hello-world", "owner": {"login": "octocat"}}}))
+    return GitHubAction(GitHubEnvironment({"GITHUB_TOKEN": "token", "GITHUB_EVENT_NAME": "pull_request",
+                                           "GITHUB_EVENT_PATH": str(event_path), "ACTION_API_CACHE_DIR": "",
+                                           **fake.env()}))
+
+
+def test_fake_github_replays_fixture_with_github3(tmp_path):
+    with FakeGitHub(FIXTURE, page_size=3) as fake:
+        pull_request = _action(fake, tmp_path).get_pull_request_api_from_event()
+
+        assert pull_request.title == "Update the README"
+        assert pull_request.url == f"{fake.url}/repos/octocat/hello-world/pulls/42"
+        assert [file.filename for file in pull_request.files()] == [f"docs/page{index}.md" for index in range(1, 8)]
+        assert fake.requests == [("GET", "/repos/octocat/hello-world/pulls/42"),
+                                 ("GET", "/repos/octocat/hello-world/pulls/42/files?per_page=100")]
+
+
+def test_fake_github_paginates_lists():
+    with FakeGitHub(page_size=2) as fake:
+        fake.add("GET", "/items?state=open", list(range(5)))
+
+        first = requests.get(f"{fake.url}/items?state=open")
+        last = requests.get(first.links["last"]["url"])
+
+        assert first.json() == [0, 1]
+        assert requests.get(first.links["next"]["url"]).json() == [2, 3]
+        assert last.json() == [4]
+        assert "next" not in last.links
+        assert requests.get(f"{fake.url}/items?state=open&per_page=10").json() == list(range(5))
+
+
+def test_fake_github_replays_interactions_in_order():
+    with FakeGitHub() as fake:
+        fake.add("GET", "/status", {"state": "pending"})
+        fake.add("GET", "/status", {"state": "success"})
+
+        assert [requests.get(f"{fake.url}/status").json()["state"] for _ in range(3)] == \
+            ["pending", "success", "success"]
+        assert requests.get(f"{fake.url}/missing").status_code == 404
+
+
+def test_fake_github_rate_limit():
+    with FakeGitHub(rate_limit=2) as fake:
+        fake.add("GET", "/user", {"login": "octocat"})
+
+        responses = [requests.get(f"{fake.url}/user") for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200, 200, 403]
+        assert [response.headers["X-RateLimit-Remaining"] for response in responses] == ["1", "0", "0"]
+        assert responses[2].json()["message"] == "API rate limit exceeded"
+
+
+def test_fake_github_injected_errors_are_retried(tmp_path):
+    with FakeGitHub(FIXTURE) as fake:
+        fake.fail("/pulls/42$", 403, "You have exceeded a secondary rate limit", headers={"Retry-After": "0"},
+                  times=2)
+        action = _action(fake, tmp_path)
+
+        assert action.get_pull_request_api_from_event().number == 42
+        assert len(fake.requests) == 3
+        assert action.rate_limiter.retries == 2
+
+
+def test_fake_github_random_errors_and_latency():
+    with FakeGitHub(latency=0.05, error_rate=1.0, error_status=503, seed=1) as fake:
+        fake.add("GET", "/user", {"login": "octocat"})
+
+        start = time.perf_counter()
+        response = requests.get(f"{fake.url}/user")
+
+        assert response.status_code == 503
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_fake_github_graphql(tmp_path):
+    with FakeGitHub() as fake:
+        fake.add("POST", "/graphql", {"data": {"viewer": {"login": "octocat"}}},
+                 request_body={"query": "{ viewer { login } }", "variables": {}})
+        fake.add("POST", "/graphql", {"errors": [{"message": "Unknown query"}]})
+        action = _action(fake, tmp_path)
+
+        assert action.graphql("{ viewer { login } }") == {"viewer": {"login": "octocat"}}
+        with pytest.raises(ActionError, match="Unknown query"):
+            action.graphql("{ unknown }")
+
+
+def test_fake_github_records_and_replays(tmp_path):
+    fixture = tmp_path / "recorded.json"
+    with FakeGitHub(FIXTURE) as upstream:
+        with FakeGitHub(fixture, record=True, upstream=upstream.url) as recorder:
+            recorded = requests.get(f"{recorder.url}/repos/octocat/hello-world/pulls/42",
+                                    headers={"Authorization": "token secret"})
+            assert recorded.json()["url"] == f"{recorder.url}/repos/octocat/hello-world/pulls/42"
+
+    assert "secret" not in fixture.read_text()
+    with FakeGitHub(fixture) as fake:
+        replayed = requests.get(f"{fake.url}/repos/octocat/hello-world/pulls/42")
+        assert replayed.json()["title"] == "Update the README"
+        assert replayed.json()["url"] == f"{fake.url}/repos/octocat/hello-world/pulls/42"
+        assert replayed.headers["ETag"] == '"0123456789abcdef"'
@@ -1,13 +1,14 @@
 import json
 import string
 from pathlib import Path
-from typing import Dict, Tuple, Union
-from unittest.mock import MagicMock, call, patch
+from typing import Dict, List, Tuple, Union
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from github_action_template.commands import MemoryCommandWriter
 from github_action_template.framework import (ActionError, GitHubAction, GitHubEnvironment, _DEFAULT_TOKEN, json_find,
-                                              newlines_to_spaces, random_str, )
+                                              key_value_lines, newlines_to_spaces, random_str, )
 
 
 @pytest.fixture
@@ -31,6 +32,17 @@ def test_github_action_api(mock_github):
     action = GitHubAction(github_env)
     assert action.github_api == mock_github.return_value
     mock_github.assert_called_with(token=github_env.secret_token)
+    assert mock_github.return_value.session.mount.call_count == 2
+
+
+def test_github_action_debug_api_usage():
+    writer = MemoryCommandWriter()
+    action = GitHubAction(MagicMock(spec=GitHubEnvironment), writer)
+    action.debug_api_usage()
+    assert writer.lines == []
+    action.rate_limiter.reserve()
+    action.debug_api_usage()
+    assert writer.lines == ["::debug::API requests: 1, retries: 0, throttled: 0 (0.0s), remaining quota: unknown"]
 
 
 @pytest.mark.parametrize("command, args, kwargs, printed", [
@@ -51,30 +63,97 @@ def test_github_action_api(mock_github):
     ("start_commands", tuple(), {}, f"::{_DEFAULT_TOKEN}::"),
     ])
 def test_github_action_command(command: str, args: Tuple[str], kwargs: Dict[str, Union[str, int]], printed: str):
-    with patch("github_action_template.framework.print") as mock_print:
-        github_env = MagicMock(spec=GitHubEnvironment)
-        action = GitHubAction(github_env)
-        callable_command = getattr(action, command)
-        callable_command(*args, **kwargs)
-        mock_print.assert_called_with(printed)
+    github_env = GitHubEnvironment({})
+    writer = MemoryCommandWriter()
+    action = GitHubAction(github_env, writer)
+    callable_command = getattr(action, command)
+    callable_command(*args, **kwargs)
+    assert writer.lines == [printed]
 
 
 @pytest.mark.parametrize("command, kwargs, printed", [
-    ("debug", {}, (call("::debug::XXX"), call("::debug::YYY"), call("::debug::ZZZ"))),
-    ("warning", {}, (call("::warning::XXX"), call("::warning::YYY"), call("::warning::ZZZ"))),
-    ("warning", {"file": "FILE"}, (call("::warning file=FILE,line=0,col=0::XXX YYY ZZZ"),)),
-    ("warning", {"file": "FILE", "line": 3, "col": 4}, (call("::warning file=FILE,line=3,col=4::XXX YYY ZZZ"),)),
-    ("error", {}, (call("::error::XXX"), call("::error::YYY"), call("::error::ZZZ"))),
-    ("error", {"file": "FILE"}, (call("::error file=FILE,line=0,col=0::XXX YYY ZZZ"),)),
-    ("error", {"file": "FILE", "line": 3, "col": 4}, (call("::error file=FILE,line=3,col=4::XXX YYY ZZZ"),)),
+    ("debug", {}, ["::debug::XXX", "::debug::YYY", "::debug::ZZZ"]),
+    ("warning", {}, ["::warning::XXX", "::warning::YYY", "::warning::ZZZ"]),
+    ("warning", {"file": "FILE"}, ["::warning file=FILE,line=0,col=0::XXX YYY ZZZ"]),
+    ("warning", {"file": "FILE", "line": 3, "col": 4}, ["::warning file=FILE,line=3,col=4::XXX YYY ZZZ"]),
+    ("error", {}, ["::error::XXX", "::error::YYY", "::error::ZZZ"]),
+    ("error", {"file": "FILE"}, ["::error file=FILE,line=0,col=0::XXX YYY ZZZ"]),
+    ("error", {"file": "FILE", "line": 3, "col": 4}, ["::error file=FILE,line=3,col=4::XXX YYY ZZZ"]),
     ])
-def test_github_action_command_with_newline(command: str, kwargs: Dict[str, Union[str, int]], printed: str):
-    with patch("github_action_template.framework.print") as mock_print:
-        github_env = MagicMock(spec=GitHubEnvironment)
-        action = GitHubAction(github_env)
-        callable_command = getattr(action, command)
-        callable_command("XXX\nYYY\nZZZ", **kwargs)
-        mock_print.assert_has_calls(printed)
+def test_github_action_command_with_newline(command: str, kwargs: Dict[str, Union[str, int]], printed: List[str]):
+    github_env = MagicMock(spec=GitHubEnvironment)
+    writer = MemoryCommandWriter()
+    action = GitHubAction(github_env, writer)
+    callable_command = getattr(action, command)
+    callable_command("XXX\nYYY\nZZZ", **kwargs)
+    assert writer.lines == printed
+
+
+@pytest.mark.parametrize("command, key, name", [
+    ("set_output", "GITHUB_OUTPUT", "output"),
+    ("set_env", "GITHUB_ENV", "env"),
+    ])
+def test_github_action_command_file(tmp_path, command: str, key: str, name: str):
+    command_file = tmp_path / name
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({key: str(command_file)}), writer)
+    callable_command = getattr(action, command)
+    with patch("github_action_template.framework.random_str", return_value="DELIM"):
+        callable_command("XXX", "YYY")
+        callable_command("MULTI", "line1\nline2")
+    assert not command_file.read_text()
+    action.flush_commands()
+    assert command_file.read_text() == "XXX=YYY\nMULTI<<ghadelimiter_DELIM\nline1\nline2\nghadelimiter_DELIM\n"
+    callable_command("ZZZ", "")
+    callable_command("COUNT", 3)
+    action.close_commands()
+    assert command_file.read_text().endswith("ghadelimiter_DELIM\nZZZ=\nCOUNT=3\n")
+    assert writer.lines == []
+
+
+def test_github_action_commands_called_on_class(tmp_path, monkeypatch, capsys):
+    output_file = tmp_path / "output"
+    monkeypatch.setenv("GITHUB_OUTPUT", str(output_file))
+    monkeypatch.delenv("GITHUB_PATH", raising=False)
+
+    GitHubAction.debug("first\nsecond")
+    GitHubAction.warning("Deprecated", file="a.py", line=3)
+    GitHubAction.add_mask("secret")
+    GitHubAction.stop_commands("TOKEN")
+    GitHubAction.start_commands("TOKEN")
+    GitHubAction.add_path(Path("/some/bin"))
+    GitHubAction.set_output("result", 42)
+
+    assert capsys.readouterr().out.splitlines() == [
+        "::debug::first", "::debug::second", "::warning file=a.py,line=3,col=0::Deprecated", "::add-mask::secret",
+        "::stop-commands::TOKEN", "::TOKEN::", f"::add-path::{Path('/some/bin')}"]
+    assert output_file.read_text() == "result=42\n"
+    assert GitHubAction.debug.__doc__ == GitHubAction(GitHubEnvironment({})).debug.__doc__
+
+
+def test_github_action_add_path_file(tmp_path):
+    path_file = tmp_path / "path"
+    action = GitHubAction(GitHubEnvironment({"GITHUB_PATH": str(path_file)}))
+    action.add_path(Path("/some/bin"))
+    action.add_path(Path("/other/bin"))
+    action.close_commands()
+    assert path_file.read_text() == f"{Path('/some/bin')}\n{Path('/other/bin')}\n"
+
+
+def test_github_action_command_writer_defaults_to_stdout(capsys):
+    action = GitHubAction(MagicMock(spec=GitHubEnvironment))
+    action.debug("XXX")
+    assert capsys.readouterr().out == ""
+    action.flush_commands()
+    assert capsys.readouterr().out == "::debug::XXX\n"
+
+
+def test_github_action_without_commands_flushes_at_boundaries(capsys):
+    action = GitHubAction(MagicMock(spec=GitHubEnvironment))
+    action.debug("before")
+    with action.without_commands("TOKEN"):
+        print("::debug::not a command")
+    assert capsys.readouterr().out == "::debug::before\n::stop-commands::TOKEN\n::debug::not a command\n::TOKEN::\n"
 
 
 def test_github_action_get_pull_request_api_from_event_not_a_pr():
@@ -101,6 +180,60 @@ def test_github_action_get_pull_request_api_from_event(mock_github):
     mock_github.return_value.pull_request.assert_called_with("alogin", "repo_name", "1")
 
 
+@patch("github_action_template.framework.GitHub")
+def test_github_action_graphql(mock_github):
+    github_env = GitHubEnvironment({"GITHUB_TOKEN": "TOKEN", "GITHUB_GRAPHQL_URL": "https://api/graphql"})
+    post = mock_github.return_value.session.post
+    post.return_value.json.return_value = {"data": {"viewer": {"login": "me"}}}
+    action = GitHubAction(github_env)
+
+    assert action.graphql("query { viewer { login } }") == {"viewer": {"login": "me"}}
+    post.assert_called_with("https://api/graphql", json={"query": "query { viewer { login } }", "variables": {}})
+
+    post.return_value.json.return_value = {"data": None, "errors": [{"message": "Bad"}, {"message": "Worse"}]}
+    with pytest.raises(ActionError, match="Bad; Worse"):
+        action.graphql("query { viewer { login } }", {"x": 1})
+
+    post.return_value.ok = False
+    post.return_value.json.side_effect = ValueError()
+    post.return_value.reason = "Bad Gateway"
+    with pytest.raises(ActionError, match="Bad Gateway"):
+        action.graphql("query { viewer { login } }")
+
+
+@patch("github_action_template.framework.fetch_pull_request_context")
+def test_github_action_get_pull_request_context(mock_fetch):
+    github_env = GitHubEnvironment({"GITHUB_EVENT_NAME": "pull_request"})
+    github_env._cached_json_payload = {"repository": {"owner": {"login": "alogin"}, "name": "repo_name"},
+                                       "pull_request": {"number": 1}}
+    action = GitHubAction(github_env)
+    assert action.get_pull_request_context() is mock_fetch.return_value
+    mock_fetch.assert_called_with(action.graphql, "alogin", "repo_name", 1)
+
+    mock_fetch.side_effect = LookupError("Pull request not found")
+    with pytest.raises(ActionError):
+        action.get_pull_request_context()
+
+    with pytest.raises(ActionError):
+        GitHubAction(MagicMock(spec=GitHubEnvironment)).get_pull_request_context()
+
+
+@patch("github_action_template.framework.GitHub")
+def test_github_action_get_pull_request_from_event(mock_github):
+    github_env = GitHubEnvironment({"GITHUB_EVENT_NAME": "pull_request", "GITHUB_TOKEN": "TOKEN"})
+    github_env._cached_json_payload = {"repository": {"owner": {"login": "alogin"}, "name": "repo_name"},
+                                       "pull_request": {"number": 1, "title": "Title"}}
+    action = GitHubAction(github_env)
+    pull_request = action.get_pull_request_from_event()
+    assert pull_request.title == "Title"
+    mock_github.assert_not_called()
+    assert pull_request.mergeable is mock_github.return_value.pull_request.return_value.mergeable
+    mock_github.return_value.pull_request.assert_called_once_with("alogin", "repo_name", 1)
+
+    with pytest.raises(ActionError):
+        GitHubAction(MagicMock(spec=GitHubEnvironment)).get_pull_request_from_event()
+
+
 def test_github_action_init():
     github_env = MagicMock(spec=GitHubEnvironment)
     action = GitHubAction(github_env)
@@ -130,6 +263,62 @@ def test_github_environment_event_payload_find(event_json_file: Path):
     assert github_env.event_payload_find("key/notthere", "default") == "default"
 
 
+def test_github_environment_event_payload_empty_is_cached(event_json_file: Path):
+    event_json_file.write_text("{}")
+    github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
+    assert github_env.event_payload == {}
+    event_json_file.unlink()
+    assert github_env.event_payload == {}
+    event_json_file.write_text("{}")
+
+
+def test_github_environment_event_payload_select(event_json_file: Path):
+    github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
+    with patch("github_action_template.framework.load_json") as mock_load_json:
+        assert github_env.event_payload_select(["key/subkey", "key/notthere"], "default") == {
+            "key/subkey": "value",
+            "key/notthere": "default",
+            }
+        mock_load_json.assert_not_called()
+    with patch("github_action_template.framework.select_json") as mock_select_json:
+        assert github_env.event_payload_select(["key/subkey"]) == {"key/subkey": "value"}
+        mock_select_json.assert_not_called()
+    assert github_env.event_payload == {"key": {"subkey": "value"}}
+    assert github_env.event_payload_select(["key", "nothere"]) == {"key": {"subkey": "value"}, "nothere": None}
+
+
+def test_github_environment_event_payload_find_large(event_json_file: Path):
+    github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
+    github_env.selective_payload_size = 1
+    with patch("github_action_template.framework.load_json") as mock_load_json:
+        assert github_env.event_payload_find("key/subkey") == "value"
+        assert github_env.event_payload_find("key/notthere", "default") == "default"
+        mock_load_json.assert_not_called()
+
+
+def test_github_environment_event_payload_select_large(tmp_path: Path):
+    event_json_file = tmp_path / "event.json"
+    event_json_file.write_text(json.dumps({"commits": [{"id": "a"}, {"id": "b"}], "head": {"sha": "123"}, "zero": 0}))
+    github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
+    with patch("github_action_template.framework.load_json") as mock_load_json:
+        assert github_env.event_payload_select(["commits/*/id", "commits/1/id", "head/sha", "zero", "nothere"], -1) == {
+            "commits/*/id": ["a", "b"],
+            "commits/1/id": "b",
+            "head/sha": "123",
+            "zero": 0,
+            "nothere": -1,
+            }
+        mock_load_json.assert_not_called()
+    assert github_env.event_payload_select(["*/sha"]) == {"*/sha": ["123"]}
+
+
+def test_github_environment_event_payload_select_may_raise(event_json_file: Path):
+    event_json_file.write_text("THIS IS NOT A VALID JSON")
+    github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
+    with pytest.raises(ActionError):
+        github_env.event_payload_select(["key"])
+
+
 def test_github_environment_event_payload_may_raise(event_json_file: Path):
     event_json_file.write_text("THIS IS NOT A VALID JSON")
     github_env = GitHubEnvironment({"GITHUB_EVENT_PATH": str(event_json_file)})
@@ -184,6 +373,15 @@ def test_github_environment_run_number():
         assert not GitHubEnvironment({"GITHUB_RUN_NUMBER": "SPAM"}).run_number
 
 
+def test_key_value_lines():
+    assert key_value_lines("name", "value") == ["name=value"]
+    assert key_value_lines("name", "") == ["name="]
+    assert key_value_lines("count", 3) == ["count=3"]
+    with patch("github_action_template.framework.random_str", side_effect=["AAA", "BBB"]):
+        lines = key_value_lines("name", "1 ghadelimiter_AAA\n2")
+    assert lines == ["name<<ghadelimiter_BBB", "1 ghadelimiter_AAA\n2", "ghadelimiter_BBB"]
+
+
 def test_json_find():
     data = {"color": "blue",
             "empty": None,
@@ -203,6 +401,16 @@ def test_json_find():
     assert json_find(data, "team/goal") == "john"
     assert not json_find(data, "team/goal/age")
     assert json_find(data, "list") == ["sugar", "coffee", "cigarettes"]
+    assert json_find(data, "list/1") == "coffee"
+    assert json_find(data, "list/3", "default") == "default"
+
+
+def test_json_find_falsy_values():
+    data = {"zero": 0, "false": False, "empty": "", "none": None}
+    assert json_find(data, "zero", "default") == 0
+    assert json_find(data, "false", "default") is False
+    assert json_find(data, "empty", "default") == ""
+    assert json_find(data, "none", "default") == "default"
 
 
 def test_newlines_to_spaces():
@@ -217,3 +425,235 @@ def test_random_str(mock_choice):
     mock_choice.side_effect = list(string.ascii_lowercase)
     assert random_str() == "abcdefghijklmnopqrst"
     assert random_str(5) == "uvwxy"
+
+
+def test_github_environment_command_files():
+    github_env = GitHubEnvironment({"GITHUB_OUTPUT": "/o", "GITHUB_ENV": "/e", "GITHUB_PATH": "/p",
+                                    "GITHUB_STEP_SUMMARY": "/s"})
+    assert github_env.output_file == Path("/o")
+    assert github_env.env_file == Path("/e")
+    assert github_env.path_file == Path("/p")
+    assert github_env.step_summary_file == Path("/s")
+    github_env = GitHubEnvironment({"GITHUB_OUTPUT": ""})
+    assert github_env.output_file is None
+    assert github_env.env_file is None
+    assert github_env.path_file is None
+    assert github_env.step_summary_file is None
+
+
+def test_github_environment_snapshot():
+    env = {key: "xxx" for key in ("GITHUB_WORKFLOW", "GITHUB_RUN_ID", "GITHUB_ACTION", "GITHUB_ACTOR",
+                                  "GITHUB_REPOSITORY", "GITHUB_EVENT_NAME", "GITHUB_SERVER_URL", "GITHUB_API_URL",
+                                  "GITHUB_GRAPHQL_URL", "GITHUB_TOKEN")}
+    env.update({"GITHUB_RUN_NUMBER": "15", "GITHUB_WORKSPACE": "/somewhere", "GITHUB_SHA": "123abc"})
+    snapshot = GitHubEnvironment(env).snapshot()
+    assert snapshot.workflow == "xxx"
+    assert snapshot.run_number == 15
+    assert snapshot.workspace == Path("/somewhere")
+    assert snapshot.home == Path(".")
+    assert snapshot.sha == "123abc"
+    assert snapshot.ref is None
+    assert snapshot.output_file is None
+    assert not snapshot.actions
+    assert "xxx" in repr(snapshot) and "secret_token" not in repr(snapshot)
+    with pytest.raises(AttributeError):
+        snapshot.sha = "other"
+    with pytest.raises(AttributeError):
+        del snapshot.sha
+    with pytest.raises(AttributeError):
+        snapshot.other = "other"
+
+    del env["GITHUB_TOKEN"]
+    assert GitHubEnvironment(env).snapshot(optional=["secret_token"]).secret_token is None
+
+
+def test_github_environment_snapshot_reports_all_errors():
+    with pytest.raises(ActionError) as error:
+        GitHubEnvironment({"GITHUB_WORKFLOW": "xxx", "GITHUB_RUN_NUMBER": "SPAM"}).snapshot()
+    message = str(error.value)
+    assert "GITHUB_WORKFLOW" not in message
+    assert "GITHUB_RUN_ID" in message
+    assert "GITHUB_TOKEN" in message
+    assert "run number" in message
+
+
+def test_github_environment_api_cache_dir():
+    assert GitHubEnvironment({"HOME": "/home"}).api_cache_dir == Path("/home/.cache/github-api")
+    assert GitHubEnvironment({"ACTION_API_CACHE_DIR": "/cache"}).api_cache_dir == Path("/cache")
+    assert GitHubEnvironment({"ACTION_API_CACHE_DIR": ""}).api_cache_dir is None
+
+
+def test_github_action_api_cache():
+    action = GitHubAction(GitHubEnvironment({"ACTION_API_CACHE_DIR": "/cache"}))
+    assert action.api_cache.directory == Path("/cache")
+    assert action.api_cache is action.api_cache
+    assert GitHubAction(GitHubEnvironment({"ACTION_API_CACHE_DIR": ""})).api_cache is None
+
+    class NoCacheAction(GitHubAction):
+        api_cache_size = 0
+
+    assert NoCacheAction(GitHubEnvironment({"ACTION_API_CACHE_DIR": "/cache"})).api_cache is None
+
+
+def test_github_environment_memo_cache_dir():
+    assert GitHubEnvironment({"HOME": "/home"}).memo_cache_dir == Path("/home/.cache/github-action-memo")
+    assert GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": "/memo"}).memo_cache_dir == Path("/memo")
+    assert GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": ""}).memo_cache_dir is None
+
+
+def test_github_action_memo_cache():
+    action = GitHubAction(GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": "/memo"}))
+    assert action.memo_cache.store.directory == Path("/memo")
+    assert action.memo_cache is action.memo_cache
+    assert GitHubAction(GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": ""})).memo_cache is None
+
+    class NoCacheAction(GitHubAction):
+        memo_cache_size = 0
+
+    assert NoCacheAction(GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": "/memo"})).memo_cache is None
+
+
+def test_continue_from_shares_api_and_outputs():
+    env = GitHubEnvironment({})
+    previous = GitHubAction(env, MemoryCommandWriter())
+    previous._github_api = MagicMock()
+    previous._memo_cache = MagicMock()
+    previous.set_output("name", "value")
+    action = GitHubAction(env, MemoryCommandWriter())
+
+    action.continue_from(previous)
+
+    assert action.github_api is previous.github_api
+    assert action.memo_cache is previous.memo_cache
+    assert action.rate_limiter is previous.rate_limiter
+    assert action.outputs == {"name": "value"}
+
+
+def test_span_logs_group_and_records_duration():
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({}), writer)
+
+    with action.span("Fetch data"):
+        action.debug("inside")
+
+    assert writer.lines[0] == "::group::Fetch data"
+    assert writer.lines[1] == "::debug::inside"
+    assert writer.lines[2].startswith("Fetch data took ")
+    assert writer.lines[3] == "::endgroup::"
+    assert action.metrics.spans["Fetch data"]["count"] == 1
+
+
+def test_write_metrics(tmp_path):
+    path = tmp_path / "metrics.json"
+    action = GitHubAction(GitHubEnvironment({"ACTION_METRICS_FILE": str(path), "GITHUB_RUN_ID": "42"}),
+                          MemoryCommandWriter())
+    action.metrics.add_phase("run", 1)
+
+    action.write_metrics(actions=["pkg.Action"])
+
+    metrics = json.loads(path.read_text())
+    assert metrics["actions"] == ["pkg.Action"]
+    assert metrics["run_id"] == "42"
+    assert metrics["phases"] == {"run": 1}
+
+
+def test_write_metrics_without_file():
+    action = GitHubAction(GitHubEnvironment({}), MemoryCommandWriter())
+    action.write_metrics()
+    assert action.command_writer.lines == []
+
+
+def test_add_masks_dedupes_and_scrubs_messages():
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({}), writer)
+
+    action.add_masks(["token1", "multi\nline", "token1"])
+    action.add_mask("token1")
+    action.debug("Using token1")
+    action.warning("line of multi", file="FILE")
+    action.log("token1 and token12")
+
+    assert writer.lines == ["::add-mask::token1", "::add-mask::multi", "::add-mask::line", "::debug::Using ***",
+                            "::warning file=FILE,line=0,col=0::*** of ***", "*** and ***2"]
+
+
+def test_log_dump_truncates_to_budgets():
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({}), writer)
+    action.add_mask("secret")
+
+    with patch("github_action_template.framework.random_str", return_value="TOKEN"):
+        action.log_dump("Payload", {"token": "secret", "items": [1, 2, 3]}, max_lines=4)
+        action.log_dump("Text", "::error::not a command\nsecond line", max_bytes=30)
+
+    assert writer.lines[1:] == [
+        "::group::Payload", "::stop-commands::TOKEN", "{", '  "token": "***",', '  "items": [', "    1,",
+        "[truncated after 4 lines (40 bytes)]", "::TOKEN::", "::endgroup::",
+        "::group::Text", "::stop-commands::TOKEN", "::error::not a command", "[truncated after 1 lines (23 bytes)]",
+        "::TOKEN::", "::endgroup::"]
+
+
+def test_log_dump_to_file(tmp_path):
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({"GITHUB_WORKSPACE": str(tmp_path)}), writer)
+    value = {"numbers": list(range(10)), "object": Path("a")}
+
+    action.log_dump("Payload", value, path="dumps/payload.json", max_lines=1)
+
+    dump = (tmp_path / "dumps" / "payload.json").read_text()
+    assert json.loads(dump) == {"numbers": list(range(10)), "object": repr(Path("a"))}
+    assert writer.lines == [f"Payload: 15 lines ({len(dump)} bytes) saved to {tmp_path / 'dumps' / 'payload.json'}"]
+
+
+@pytest.mark.parametrize("path", ["../payload.json", "dumps/../../payload.json", "/tmp/payload.json", "."])
+def test_log_dump_to_file_outside_of_workspace(tmp_path, path):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    action = GitHubAction(GitHubEnvironment({"GITHUB_WORKSPACE": str(workspace)}), MemoryCommandWriter())
+
+    with pytest.raises(ActionError):
+        action.log_dump("Payload", {"a": 1}, path=path)
+    assert [file.name for file in tmp_path.iterdir()] == ["workspace"]
+
+
+def test_annotate_and_log_annotations():
+    writer = MemoryCommandWriter()
+    action = GitHubAction(GitHubEnvironment({}), writer)
+    action.add_mask("secret")
+
+    assert action.annotate("b.py", 3, "Unused import")
+    assert not action.annotate("b.py", 3, "Unused import")
+    action.annotate("a.py", 5, "Leaked secret\nhere", level="failure", end_line=6, title="S105")
+    action.annotate("a.py", 1, "Missing docstring", level="notice", col=2)
+    action.annotate("a.py", 2, "Line too long")
+    action.log_annotations(limit=1)
+
+    assert writer.lines[1:] == ["::notice file=a.py,line=1,col=2::Missing docstring",
+                                "::warning file=a.py,line=2,col=0::Line too long",
+                                "::error file=a.py,line=5,endLine=6,col=0,title=S105::Leaked *** here",
+                                "1 more annotations not shown"]
+
+
+def test_upload_annotations_without_sha():
+    action = GitHubAction(GitHubEnvironment({}), MemoryCommandWriter())
+    with pytest.raises(ActionError, match="GITHUB_SHA"):
+        action.upload_annotations("Lint")
+
+
+def test_summary_appends_to_step_summary_file(tmp_path):
+    summary_file = tmp_path / "summary.md"
+    summary_file.write_text("# Previous\n")
+    action = GitHubAction(GitHubEnvironment({"GITHUB_STEP_SUMMARY": str(summary_file)}), MemoryCommandWriter())
+    action.add_mask("secret")
+
+    action.summary.heading("Report with secret")
+    action.flush_commands()
+
+    assert summary_file.read_text() == "# Previous\n## Report with ***\n\n"
+    assert action.summary.size == len(summary_file.read_text())
+
+
+def test_summary_without_step_summary_file():
+    action = GitHubAction(GitHubEnvironment({}), MemoryCommandWriter())
+    assert action.summary.text("Dropped")
+    assert action.command_writer.lines == []
@@ -0,0 +1,71 @@
+import pytest
+
+from github_action_template.graphql import PULL_REQUEST_CONTEXT_QUERY, fetch_pull_request_context
+
+
+def _connection(nodes, cursor=None):
+    return {"totalCount": 3, "nodes": nodes, "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}}
+
+
+def _data(**pull_request):
+    return {"repository": {"pullRequest": pull_request}}
+
+
+def test_fetch_pull_request_context_single_request():
+    calls = []
+
+    def execute(query, variables):
+        calls.append((query, variables))
+        return _data(number=1, title="Title",
+                     files=_connection([{"path": "a.py"}]),
+                     reviews=_connection([]),
+                     labels=_connection([{"name": "bug"}]),
+                     commits={"nodes": [{"commit": {"oid": "123", "statusCheckRollup": {
+                         "state": "SUCCESS", "contexts": _connection([{"name": "build"}])}}}]})
+
+    context = fetch_pull_request_context(execute, "owner", "repo", "1")
+    assert calls == [(PULL_REQUEST_CONTEXT_QUERY, {"owner": "owner", "name": "repo", "number": 1})]
+    assert context == {"number": 1, "title": "Title", "files": [{"path": "a.py"}], "reviews": [],
+                       "labels": [{"name": "bug"}], "checks": [{"name": "build"}], "checkState": "SUCCESS"}
+
+
+def test_fetch_pull_request_context_paginates():
+    calls = []
+
+    def execute(query, variables):
+        calls.append(variables)
+        if "filesCursor" not in variables and "checksCursor" not in variables:
+            return _data(number=1,
+                         files=_connection([{"path": "a.py"}], "F1"),
+                         reviews=None,
+                         labels=_connection([]),
+                         commits={"nodes": [{"commit": {"oid": "123", "statusCheckRollup": {
+                             "state": "PENDING", "contexts": _connection([{"name": "build"}], "C1")}}}]})
+        if variables.get("filesCursor") == "F1":
+            assert "files(first: 100, after: $filesCursor)" in query and "reviews" not in query
+            return _data(files=_connection([{"path": "b.py"}], "F2"))
+        if variables.get("filesCursor") == "F2":
+            return _data(files=_connection([{"path": "c.py"}]))
+        assert variables.get("checksCursor") == "C1"
+        return _data(commits={"nodes": [{"commit": {"statusCheckRollup": {
+            "contexts": _connection([{"context": "lint"}])}}}]})
+
+    context = fetch_pull_request_context(execute, "owner", "repo", 1)
+    assert len(calls) == 4
+    assert context["files"] == [{"path": "a.py"}, {"path": "b.py"}, {"path": "c.py"}]
+    assert context["reviews"] == []
+    assert context["checks"] == [{"name": "build"}, {"context": "lint"}]
+    assert context["checkState"] == "PENDING"
+
+
+def test_fetch_pull_request_context_without_checks():
+    context = fetch_pull_request_context(lambda query, variables: _data(
+        number=1, files=_connection([]), reviews=_connection([]), labels=_connection([]),
+        commits={"nodes": [{"commit": {"oid": "123", "statusCheckRollup": None}}]}), "owner", "repo", 1)
+    assert context["checks"] == []
+    assert context["checkState"] is None
+
+
+def test_fetch_pull_request_context_not_found():
+    with pytest.raises(LookupError):
+        fetch_pull_request_context(lambda query, variables: {"repository": {"pullRequest": None}}, "owner", "repo", 1)
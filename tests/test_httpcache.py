@@ -0,0 +1,85 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from github_action_template.httpcache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_response_cache_store_and_lookup(tmp_path: Path):
+    cache = ResponseCache(tmp_path / "cache")
+    assert cache.lookup("GET", "https://api/x") is None
+    assert not cache.store("GET", "https://api/x", 200, {"Content-Type": "application/json"}, b"{}")
+    assert not (tmp_path / "cache").exists()
+
+    assert cache.store("GET", "https://api/x", 200, {"etag": 'W/"123"'}, b'{"x": 1}')
+    assert cache.store("GET", "https://api/y", 200, {"Last-Modified": "Mon, 01 Jan 2024"}, b'[]', vary="json")
+    entry = cache.lookup("GET", "https://api/x")
+    assert (entry.url, entry.status, entry.body) == ("https://api/x", 200, b'{"x": 1}')
+    assert entry.etag == 'W/"123"'
+    assert entry.last_modified is None
+    assert entry.conditional_headers() == {"If-None-Match": 'W/"123"'}
+    assert cache.lookup("GET", "https://api/y") is None
+    entry = cache.lookup("GET", "https://api/y", vary="json")
+    assert entry.conditional_headers() == {"If-Modified-Since": "Mon, 01 Jan 2024"}
+    assert cache.lookup("POST", "https://api/x") is None
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+
+def test_response_cache_removes_temporary_file_on_failure(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    with patch("github_action_template.cachedir.os.replace", side_effect=OSError("No space left on device")):
+        assert not cache.store("GET", "https://api/x", 200, {"ETag": "1"}, b"{}")
+    assert not list(tmp_path.iterdir())
+    assert cache.store("GET", "https://api/x", 200, {"ETag": "1"}, b"{}")
+
+
+def test_response_cache_ignores_corrupted_entries(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    cache.store("GET", "https://api/x", 200, {"ETag": "1"}, b"{}")
+    entry = cache.lookup("GET", "https://api/x")
+    entry.path.write_bytes(b"garbage")
+    assert cache.lookup("GET", "https://api/x") is None
+    assert not entry.path.exists()
+
+
+def test_response_cache_evicts_old_entries(tmp_path: Path):
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path, max_age=100, clock=clock)
+    cache.store("GET", "https://api/x", 200, {"ETag": "1"}, b"{}")
+    cache.store("GET", "https://api/y", 200, {"ETag": "1"}, b"{}")
+    entry = cache.lookup("GET", "https://api/x")
+    os.utime(entry.path, (clock.now, clock.now))
+    clock.now += 50
+    cache.touch(entry)
+    clock.now += 51
+    assert cache.lookup("GET", "https://api/x") is not None
+    cache.prune()
+    assert cache.lookup("GET", "https://api/x") is not None
+    assert len(list(tmp_path.iterdir())) == 1
+    clock.now += 101
+    assert cache.lookup("GET", "https://api/x") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_response_cache_evicts_least_recently_used_entries(tmp_path: Path):
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path, max_size=400, clock=clock)
+    for index in range(3):
+        cache.store("GET", f"https://api/{index}", 200, {"ETag": str(index)}, b"x" * 50)
+        entry = cache.lookup("GET", f"https://api/{index}")
+        os.utime(entry.path, (clock.now - 30 + index, clock.now - 30 + index))
+    cache.touch(cache.lookup("GET", "https://api/0"))
+    cache.store("GET", "https://api/3", 200, {"ETag": "3"}, b"x" * 50)
+    assert cache.lookup("GET", "https://api/0") is not None
+    assert cache.lookup("GET", "https://api/1") is None
+    assert cache.lookup("GET", "https://api/2") is not None
+    assert cache.lookup("GET", "https://api/3") is not None
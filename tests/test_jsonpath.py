@@ -0,0 +1,91 @@
+import pytest
+
+from github_action_template.jsonpath import JsonPath, as_json_path, compile_path, find_many
+
+DATA = {
+    "number": 0,
+    "draft": False,
+    "title": "",
+    "nothing": None,
+    "commits": [{"id": "a", "author": {"name": "bob"}}, {"id": "b"}, {"id": None}],
+    "labels": [{"name": "bug"}, {"name": "urgent"}],
+    "head": {"sha": "123abc", "ref": "feature"},
+    "10": "ten",
+    }
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("number", 0),
+    ("draft", False),
+    ("title", ""),
+    ("nothing", "default"),
+    ("notthere", "default"),
+    ("head/sha", "123abc"),
+    ("head/sha/notthere", "default"),
+    ("labels/0/name", "bug"),
+    ("labels/-1/name", "urgent"),
+    ("labels/2/name", "default"),
+    ("labels/name", "default"),
+    ("10", "ten"),
+    ("commits/0/author/name", "bob"),
+    ("commits/*/id", ["a", "b", None]),
+    ("commits/*/author/name", ["bob"]),
+    ("labels/*/name", ["bug", "urgent"]),
+    ("head/*", ["123abc", "feature"]),
+    ("notthere/*", []),
+    ])
+def test_json_path_find(path: str, expected):
+    assert JsonPath(path).find(DATA, "default") == expected
+
+
+def test_json_path_find_default_is_none():
+    assert JsonPath("notthere").find(DATA) is None
+    assert JsonPath("number/notthere").find(DATA) is None
+
+
+def test_json_path_compile():
+    assert compile_path("head/sha") is compile_path("head/sha")
+    assert as_json_path("head/sha") == JsonPath("head/sha")
+    json_path = JsonPath("head/sha")
+    assert as_json_path(json_path) is json_path
+    assert json_path != "head/sha"
+    assert hash(json_path) == hash(JsonPath("head/sha"))
+    assert repr(json_path) == "JsonPath('head/sha')"
+
+
+@pytest.mark.parametrize("path, prefix, rest", [
+    ("head/sha", "head/sha", None),
+    ("commits/*/id", "commits", "*/id"),
+    ("labels/0/name", "labels", "0/name"),
+    ("*/name", "", "*/name"),
+    ])
+def test_json_path_keys_prefix(path: str, prefix: str, rest: str):
+    json_path = JsonPath(path)
+    assert json_path.keys_prefix == prefix
+    relative = json_path.relative_to(prefix)
+    assert (relative.path if relative else None) == rest
+
+
+def test_find_many():
+    compiled = JsonPath("labels/0/name")
+    assert find_many(DATA, [
+        "number",
+        "head/sha",
+        "head/ref",
+        "head",
+        "nothing",
+        "notthere/deeper",
+        "commits/*/id",
+        "commits/*/id",
+        compiled,
+        ], "default") == {
+        "number": 0,
+        "head/sha": "123abc",
+        "head/ref": "feature",
+        "head": {"sha": "123abc", "ref": "feature"},
+        "nothing": "default",
+        "notthere/deeper": "default",
+        "commits/*/id": ["a", "b", None],
+        compiled: "bug",
+        }
+    assert find_many(DATA, []) == {}
@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from github_action_template.masking import MaskRegistry, trie_regex
+
+
+def test_mask_registry_add():
+    masks = MaskRegistry()
+
+    assert masks.add(["secret", "", "  ", "two\nlines", "secret"]) == ["secret", "two", "lines"]
+    assert masks.add(["secret"]) == []
+    assert len(masks) == 3
+    assert "two" in masks
+
+
+def test_mask_registry_scrub():
+    masks = MaskRegistry()
+    assert masks.scrub("nothing to hide") == "nothing to hide"
+
+    masks.add(["abc", "abcdef", "a.c", "xyz"])
+
+    assert masks.scrub("abcdefg abcd aXc a.c xyzxyz") == "***g ***d aXc *** ***"
+    masks.add(["hidden"])
+    assert masks.scrub("hidden abc") == "*** ***"
+
+
+def test_mask_registry_scrub_overlapping_secrets_of_a_batch():
+    together = MaskRegistry()
+    together.add(["abc", "cde"])
+    separately = MaskRegistry()
+    separately.add(["abc"])
+    separately.scrub("")
+    separately.add(["cde"])
+
+    for masks in (together, separately):
+        assert masks.scrub("xabcdex") == "x***x"
+        assert masks.scrub("abcde cdeabc") == "*** ***"
+
+
+@pytest.mark.parametrize("words", [
+    ["a"],
+    ["ab", "ac", "b"],
+    ["abc", "ab", "a"],
+    ["token-1", "token-12", "token-2", "(", "?*"],
+    ])
+def test_trie_regex_matches_longest_word(words):
+    pattern = re.compile(trie_regex(words))
+    for word in words:
+        assert pattern.fullmatch(word)
+        assert pattern.match(word + "~").group() == word
+    assert not pattern.fullmatch("".join(words) + "~")
+
+
+def test_mask_registry_scrub_secrets_registered_one_by_one():
+    masks = MaskRegistry()
+    secrets = ["abc", "bcdef", "xyz", "abcdef", "12", "123", "1"]
+    for secret in secrets:
+        masks.add([secret])
+        assert masks.scrub(secret) == "***"
+
+    assert len(masks._segments) == 3
+    assert masks.scrub("abcdefg xyzxyz 1234 a") == "***g *** ***4 a"
@@ -0,0 +1,189 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from github_action_template.framework import GitHubAction, GitHubEnvironment
+from github_action_template.memo import (COMPRESSION_THRESHOLD, DirectoryStore, MemoCache, MemoryStore, MemoStore,
+                                         content_hash, dumps, loads, memoize)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingAction(GitHubAction):
+    def __init__(self, github_env: GitHubEnvironment):
+        super().__init__(github_env)
+        self.calls = 0
+
+    @memoize
+    def square(self, value: int) -> int:
+        self.calls += 1
+        return value * value
+
+    @memoize(by_commit=False, version="2")
+    def line_count(self, path: Path) -> int:
+        self.calls += 1
+        return len(path.read_text().splitlines())
+
+    @memoize
+    def fail(self):
+        self.calls += 1
+        raise ValueError("failed")
+
+
+def test_content_hash_is_stable_and_order_independent(tmp_path: Path):
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({1, 2, 3}) == content_hash({3, 1, 2})
+    assert content_hash(("ab", "c")) != content_hash(("a", "bc"))
+    assert content_hash(1) != content_hash("1") != content_hash(True)
+    assert content_hash(1) != content_hash(1.0)
+    assert content_hash([1]) == content_hash((1,))
+    assert content_hash(None) != content_hash(())
+    assert len(content_hash(object)) == 64
+
+    file = tmp_path / "file.txt"
+    file.write_text("a")
+    first = content_hash(file)
+    os.utime(file, (0, 0))
+    assert content_hash(file) == first
+    file.write_text("b")
+    assert content_hash(file) != first
+    assert content_hash(tmp_path / "missing") != content_hash(tmp_path / "other")
+
+
+def test_dumps_compresses_large_results_only():
+    assert loads(dumps(None)) is None
+    small = {"a": [1, 2]}
+    assert loads(dumps(small)) == small
+    large = ["same line"] * COMPRESSION_THRESHOLD
+    data = dumps(large)
+    assert len(data) < COMPRESSION_THRESHOLD
+    assert loads(data) == large
+
+
+def test_memo_cache_ignores_corrupted_entries():
+    cache = MemoCache(MemoryStore())
+    cache.store.save("key", b"garbage")
+    assert cache.get("key") == (False, None)
+    cache.store.save("key", dumps(1)[:-1])
+    assert cache.get("key") == (False, None)
+    assert cache.set("key", None)
+    assert cache.get("key") == (True, None)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.summary() == "Memo cache hits: 1, misses: 2"
+
+
+def test_directory_store_writes_atomically(tmp_path: Path):
+    store = DirectoryStore(tmp_path / "memo")
+    assert store.load("key") is None
+    assert store.save("key", b"data")
+    assert store.save("key", b"other")
+    assert store.load("key") == b"other"
+    assert [path.name for path in (tmp_path / "memo").iterdir()] == ["key.memo"]
+    assert not DirectoryStore(tmp_path / "memo" / "key.memo" / "sub").save("key", b"data")
+
+
+def test_directory_store_removes_temporary_file_on_failure(tmp_path: Path):
+    store = DirectoryStore(tmp_path)
+    with patch("github_action_template.cachedir.os.replace", side_effect=OSError("No space left on device")):
+        assert not store.save("key", b"data")
+    assert not list(tmp_path.iterdir())
+    assert store.load("key") is None
+
+
+def test_memo_store_requires_load_and_save():
+    with pytest.raises(TypeError):
+        MemoStore()
+
+
+def test_directory_store_evicts_least_recently_used_and_old_entries(tmp_path: Path):
+    clock = FakeClock()
+    store = DirectoryStore(tmp_path, max_size=10, max_age=100, clock=clock)
+    store.save("a", b"1234")
+    os.utime(tmp_path / "a.memo", (clock.now, clock.now))
+    clock.now += 1
+    store.save("b", b"1234")
+    os.utime(tmp_path / "b.memo", (clock.now, clock.now))
+    clock.now += 1
+    assert store.load("a") == b"1234"
+    store.save("c", b"1234")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.memo", "c.memo"]
+
+    clock.now += 101
+    assert store.load("a") is None
+    assert not (tmp_path / "a.memo").exists()
+    store.prune()
+    assert not list(tmp_path.iterdir())
+
+
+def test_memory_store_evicts_least_recently_used_entries():
+    store = MemoryStore(max_size=10)
+    store.save("a", b"1234")
+    store.save("b", b"1234")
+    assert store.load("a") == b"1234"
+    store.save("c", b"1234")
+    assert store.load("b") is None
+    assert store.load("a") == store.load("c") == b"1234"
+    store.save("a", b"12345678")
+    assert store.load("c") is None
+
+
+def test_memoize_keys_results_by_arguments_and_commit(tmp_path: Path):
+    env = {"ACTION_MEMO_CACHE_DIR": str(tmp_path), "GITHUB_SHA": "6113728f", "GITHUB_REF": "refs/heads/main"}
+    action = CountingAction(GitHubEnvironment(env))
+    assert action.square(3) == action.square(3) == 9
+    assert action.calls == 1
+    assert action.square(4) == 16
+    assert action.calls == 2
+
+    # Another run of the same commit reads the results of the previous one
+    next_run = CountingAction(GitHubEnvironment(env))
+    assert next_run.square(3) == 9
+    assert next_run.calls == 0
+    assert (next_run.memo_cache.hits, next_run.memo_cache.misses) == (1, 0)
+
+    other_commit = CountingAction(GitHubEnvironment({**env, "GITHUB_SHA": "84cd5cbd"}))
+    assert other_commit.square(3) == 9
+    assert other_commit.calls == 1
+    other_ref = CountingAction(GitHubEnvironment({**env, "GITHUB_REF": "refs/heads/other"}))
+    assert other_ref.square(3) == 9
+    assert other_ref.calls == 1
+
+
+def test_memoize_by_content(tmp_path: Path):
+    env = {"ACTION_MEMO_CACHE_DIR": str(tmp_path / "memo"), "GITHUB_SHA": "6113728f"}
+    file = tmp_path / "file.txt"
+    file.write_text("a\nb\n")
+    action = CountingAction(GitHubEnvironment(env))
+    assert action.line_count(file) == 2
+    other_commit = CountingAction(GitHubEnvironment({**env, "GITHUB_SHA": "84cd5cbd"}))
+    assert other_commit.line_count(file) == 2
+    assert other_commit.calls == 0
+    file.write_text("a\n")
+    assert other_commit.line_count(file) == 1
+    assert other_commit.calls == 1
+
+
+def test_memoize_without_cache_or_on_errors():
+    action = CountingAction(GitHubEnvironment({"ACTION_MEMO_CACHE_DIR": ""}))
+    assert action.memo_cache is None
+    assert action.square(3) == action.square(3) == 9
+    assert action.calls == 2
+    assert action.square.__name__ == "square"
+
+    action = CountingAction(GitHubEnvironment({}))
+    action._memo_cache = MemoCache(MemoryStore())
+    for _ in range(2):
+        try:
+            action.fail()
+        except ValueError:
+            pass
+    assert action.calls == 2
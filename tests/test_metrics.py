@@ -0,0 +1,44 @@
+import json
+
+from github_action_template.metrics import LATENCY_BUCKETS, Metrics
+
+
+def test_metrics_record_requests():
+    metrics = Metrics()
+    metrics.record_request("GET", 200, 0.01)
+    metrics.record_request("GET", 304, 0.2, from_cache=True)
+    metrics.record_request("POST", 502, 30)
+
+    api = metrics.as_dict()["api"]
+
+    assert api["requests"] == 3
+    assert api["errors"] == 1
+    assert api["cached"] == 1
+    assert api["seconds"] == 30.21
+    assert api["by_method"] == {"GET": 2, "POST": 1}
+    assert api["by_status"] == {"200": 1, "304": 1, "502": 1}
+    assert api["latency_histogram"]["buckets"] == [*LATENCY_BUCKETS, "+Inf"]
+    assert api["latency_histogram"]["counts"] == [1, 0, 1, 0, 0, 0, 0, 0, 1]
+
+
+def test_metrics_phases_and_spans():
+    metrics = Metrics()
+    with metrics.phase("run"):
+        pass
+    metrics.add_phase("load", 1.5)
+    metrics.add_phase("load", 0.5)
+    metrics.add_span("fetch", 1)
+    metrics.add_span("fetch", 2)
+
+    result = metrics.as_dict(action="pkg.Action")
+
+    assert result["action"] == "pkg.Action"
+    assert list(result["phases"]) == ["run", "load"]
+    assert result["phases"]["load"] == 2
+    assert result["spans"] == {"fetch": {"count": 2, "seconds": 3}}
+
+
+def test_metrics_write(tmp_path):
+    path = tmp_path / "metrics" / "run.json"
+    Metrics().write(path, run_id="42")
+    assert json.loads(path.read_text())["run_id"] == "42"
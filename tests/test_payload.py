@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from github_action_template import payload
+from github_action_template.payload import load_json, select_json
+
+DATA = {
+    "action": "opened",
+    "number": 0,
+    "pull_request": {
+        "body": "some \"quoted\" text with {braces} and [brackets]",
+        "commits": [{"id": "a"}, {"id": "b", "nested": [[], {}]}],
+        "draft": False,
+        "head": {"sha": "123abc", "ref": "feature"},
+        "empty": {},
+        },
+    "repository": {"name": "repo_name", "owner": {"login": "alogin"}, "size": 1.5, "topics": None},
+    }
+
+
+@pytest.fixture(params=["ijson", "scan"])
+def parser(request, monkeypatch):
+    if request.param == "scan":
+        monkeypatch.setitem(payload._PARSERS, "ijson", None)
+    elif payload._parser("ijson") is None:
+        pytest.skip("ijson is not installed")
+    yield request.param
+
+
+@pytest.fixture
+def json_file(tmp_path) -> Path:
+    json_file = tmp_path / "event.json"
+    json_file.write_text(json.dumps(DATA, indent=2))
+    return json_file
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_load_json(json_file: Path, monkeypatch, use_orjson: bool):
+    if not use_orjson:
+        monkeypatch.setitem(payload._PARSERS, "orjson", None)
+    elif payload._parser("orjson") is None:
+        pytest.skip("orjson is not installed")
+    assert load_json(json_file) == DATA
+    json_file.write_text("NOT JSON")
+    with pytest.raises(ValueError):
+        load_json(json_file)
+
+
+def test_select_json(json_file: Path, parser: str):
+    assert select_json(json_file, []) == {}
+    assert select_json(json_file, [
+        "repository/owner/login",
+        "repository/name",
+        "pull_request/number",
+        "pull_request/head",
+        "pull_request/head/sha",
+        "pull_request/draft",
+        "pull_request/empty",
+        "pull_request/commits",
+        "pull_request/body/nothere",
+        "repository/topics",
+        "repository/size",
+        "number",
+        ]) == {
+        "repository/owner/login": "alogin",
+        "repository/name": "repo_name",
+        "pull_request/head": {"sha": "123abc", "ref": "feature"},
+        "pull_request/head/sha": "123abc",
+        "pull_request/draft": False,
+        "pull_request/empty": {},
+        "pull_request/commits": [{"id": "a"}, {"id": "b", "nested": [[], {}]}],
+        "repository/topics": None,
+        "repository/size": 1.5,
+        "number": 0,
+        }
+
+
+def test_select_json_stops_when_all_found(json_file: Path, parser: str):
+    json_file.write_text('{"action": "opened", "number": 1, "garbage": [{{{')
+    assert select_json(json_file, ["number", "action"]) == {"action": "opened", "number": 1}
+
+
+@pytest.mark.parametrize("text", ['{"action": "opened", "number": [1, 2', '{"action" "opened"}', "NOT JSON", ""])
+def test_select_json_may_raise(json_file: Path, parser: str, text: str):
+    json_file.write_text(text)
+    with pytest.raises(ValueError):
+        select_json(json_file, ["number"])
+
+
+def test_select_json_missing_file(tmp_path: Path, parser: str):
+    with pytest.raises(OSError):
+        select_json(tmp_path / "missing.json", ["number"])
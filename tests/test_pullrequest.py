@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from github_action_template.pullrequest import PayloadObject, PullRequestView
+
+DATA = {
+    "number": 12,
+    "title": "Title",
+    "draft": False,
+    "commits": 3,
+    "additions": 10,
+    "created_at": "2021-01-02T03:04:05Z",
+    "closed_at": None,
+    "merged_at": "not a date",
+    "_links": {"html": {"href": "https://github.com/x"}},
+    "user": {"login": "octocat"},
+    "head": {"sha": "123abc", "ref": "feature"},
+    "labels": [{"name": "bug"}, "other"],
+    }
+
+
+def test_pull_request_view_reads_payload():
+    fetch = MagicMock()
+    view = PullRequestView(DATA, fetch)
+    assert view.number == 12
+    assert view.title == "Title"
+    assert view.draft is False
+    assert view.commits_count == 3
+    assert view.additions_count == 10
+    assert view.created_at == datetime(2021, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert view.closed_at is None
+    assert view.merged_at == "not a date"
+    assert view.links.html.href == "https://github.com/x"
+    assert view.user.login == "octocat"
+    assert view.head.sha == "123abc"
+    assert view.head["ref"] == "feature"
+    assert view.head.as_dict() == {"sha": "123abc", "ref": "feature"}
+    assert view.labels[0].name == "bug"
+    assert view.labels[1] == "other"
+    assert view.as_dict() is DATA
+    assert repr(view) == "<PullRequestView [#12]>"
+    assert not view.fetched
+    fetch.assert_not_called()
+    with pytest.raises(AttributeError):
+        assert view.head.nothere
+    with pytest.raises(AttributeError):
+        assert view._private
+
+
+def test_pull_request_view_fetches_once():
+    fetch = MagicMock()
+    view = PullRequestView(DATA, fetch)
+    assert view.mergeable is fetch.return_value.mergeable
+    assert view.commits() is fetch.return_value.commits.return_value
+    assert view.files() is fetch.return_value.files.return_value
+    assert view.pull_request is fetch.return_value
+    assert view.fetched
+    fetch.assert_called_once_with()
+
+
+def test_payload_object():
+    payload_object = PayloadObject({"a": {"b": 1}})
+    assert payload_object.a.b == 1
+    assert repr(payload_object) == "PayloadObject({'a': {'b': 1}})"
@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import pytest
+
+from github_action_template.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter_token_bucket():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    assert [limiter.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    clock.now += 10
+    assert limiter.reserve() == 0
+    assert limiter.requests == 6
+    assert limiter.throttled == 2
+    assert limiter.waited == 1.5
+
+
+def test_rate_limiter_waits_for_quota_reset():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1000, burst=1000, clock=clock, max_wait=100)
+    assert limiter.update(200, {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "2",
+                                "X-RateLimit-Reset": "1050"}) is None
+    assert (limiter.limit, limiter.remaining, limiter.reset) == (5000, 2, 1050)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 50
+    limiter.update(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2000"})
+    assert limiter.reserve() == 0
+
+
+@patch("github_action_template.ratelimit.random.uniform", side_effect=lambda low, high: high)
+def test_rate_limiter_retries(_):
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, base_delay=2, max_delay=5, max_retries=3)
+    assert limiter.update(200, {}) is None
+    assert limiter.update(404, {}) is None
+    assert limiter.update(403, {}, "Resource not accessible by integration") is None
+    assert limiter.update(403, {"Retry-After": "30"}) == 31
+    assert limiter.update(429, {}, attempt=0) == 2
+    assert limiter.update(403, {}, "You have exceeded a Secondary Rate Limit", attempt=1) == 4
+    assert limiter.update(429, {}, attempt=2) == 5
+    assert limiter.update(429, {}, attempt=3) is None
+    assert limiter.update(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1010"}) == 11
+    assert limiter.update(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "99999"}) is None
+    assert limiter.retries == 5
+    assert limiter.waited == pytest.approx(53)
+
+
+def test_rate_limiter_stats():
+    limiter = RateLimiter(clock=FakeClock())
+    assert limiter.summary() == "API requests: 0, retries: 0, throttled: 0 (0.0s), remaining quota: unknown"
+    limiter.reserve()
+    limiter.update(200, {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "x"})
+    assert limiter.summary() == "API requests: 1, retries: 0, throttled: 0 (0.0s), remaining quota: 4999/5000"
+    assert limiter.stats() == {"requests": 1, "retries": 0, "throttled": 0, "waited": 0, "limit": 5000,
+                               "remaining": 4999, "reset": None}
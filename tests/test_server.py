@@ -0,0 +1,103 @@
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+
+import pytest
+
+from github_action_template.adapters import GitHubAdapter
+from github_action_template.framework import ActionError, GitHubAction
+from github_action_template.server import ActionServer, forward
+
+
+class EchoAction(GitHubAction):
+    def run(self, args):
+        self.set_output("token", self.github_env.secret_token)
+        self.set_output("args", ",".join(args))
+        self.set_output("variable", os.environ.get("ECHO_VARIABLE", ""))
+        self.set_output("number", str(self.github_env.event_payload_find("pull_request/number")))
+        self.set_output("argv", ",".join(sys.argv[1:]))
+
+
+class FailingAction(GitHubAction):
+    def run(self, args):
+        raise ActionError("Failure")
+
+
+class ExitingAction(GitHubAction):
+    def run(self, args):
+        raise SystemExit(3)
+
+
+@pytest.fixture
+def server_socket(tmp_path, monkeypatch):
+    monkeypatch.setattr(GitHubAdapter, "shared_pool_manager", None)
+    socket_path = str(tmp_path / "action.sock")
+    server = ActionServer(socket_path, ["tests.test_server"])
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _forward(socket_path, args, env):
+    stdout = io.StringIO()
+    return forward(socket_path, args, env, stdout=stdout), stdout.getvalue()
+
+
+def test_action_server_runs_actions_in_isolation(server_socket, tmp_path):
+    os.environ.pop("ECHO_VARIABLE", None)
+    argv = list(sys.argv)
+    for number in (1, 2):
+        event_path = tmp_path / f"event{number}.json"
+        event_path.write_text(json.dumps({"pull_request": {"number": number}}))
+        env = {"GITHUB_TOKEN": f"token{number}", "GITHUB_EVENT_PATH": str(event_path), "ECHO_VARIABLE": str(number)}
+
+        exit_code, output = _forward(server_socket, ["tests.test_server.EchoAction", "a", str(number)], env)
+
+        assert exit_code == 0
+        assert f"::set-output name=token::token{number}\n" in output
+        assert f"::set-output name=args::a,{number}\n" in output
+        assert f"::set-output name=variable::{number}\n" in output
+        assert f"::set-output name=number::{number}\n" in output
+        assert f"::set-output name=argv::tests.test_server.EchoAction,a,{number}\n" in output
+    assert "ECHO_VARIABLE" not in os.environ
+    assert sys.argv == argv
+    assert GitHubAdapter.shared_pool_manager is not None
+
+
+def test_action_server_socket_is_private(server_socket):
+    assert stat.S_IMODE(os.stat(server_socket).st_mode) == 0o600
+
+
+def test_action_server_socket_is_created_private(tmp_path, monkeypatch):
+    modes = []
+
+    def bind(server):
+        socket.socket.bind(server.socket, server.server_address)
+        modes.append(stat.S_IMODE(os.stat(server.server_address).st_mode))
+    monkeypatch.setattr(ActionServer, "server_bind", bind)
+    umask = os.umask(0o022)
+    try:
+        ActionServer(str(tmp_path / "action.sock")).server_close()
+        assert os.umask(0o022) == 0o022
+    finally:
+        os.umask(umask)
+    assert modes == [0o600]
+
+
+def test_action_server_keeps_exit_codes(server_socket):
+    assert _forward(server_socket, ["tests.test_server.MissingAction"], {})[0] == 1
+    exit_code, output = _forward(server_socket, ["tests.test_server.FailingAction"], {})
+    assert exit_code == 2
+    assert output.endswith("::error::Exiting with error code because of action error: Failure\n")
+    assert _forward(server_socket, ["tests.test_server.ExitingAction"], {})[0] == 3
+
+
+def test_forward_without_server(tmp_path):
+    assert forward(str(tmp_path / "missing.sock"), ["tests.test_server.EchoAction"], {}) is None
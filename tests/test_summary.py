@@ -0,0 +1,52 @@
+from github_action_template.commands import MemoryCommandWriter
+from github_action_template.summary import TRUNCATION_MARKER, StepSummary
+
+
+def test_step_summary_markdown():
+    writer = MemoryCommandWriter()
+    summary = StepSummary(writer)
+
+    summary.heading("Lint\nreport")
+    with summary.section("Details <all>", expanded=True):
+        summary.text("Some **findings**")
+        with summary.table(["File", "Message"]) as table:
+            table.add_row(["a.py", "Use a | b\nor <c>"])
+            assert table.add_rows([["b.py", 1], ["c.py", None]]) == 2
+
+    assert writer.lines == ["## Lint report", "",
+                            "<details open><summary>Details &lt;all&gt;</summary>", "",
+                            "Some **findings**", "",
+                            "", "| File | Message |", "|---|---|",
+                            "| a.py | Use a \\| b<br>or &lt;c&gt; |", "| b.py | 1 |", "| c.py | None |", "",
+                            "</details>", ""]
+    assert table.rows == 3
+    assert summary.size == sum(len(line) + 1 for line in writer.lines)
+
+
+def test_step_summary_budget_truncates_and_closes_sections():
+    writer = MemoryCommandWriter()
+    summary = StepSummary(writer, max_bytes=300, size=100, scrub=lambda text: text.replace("secret", "***"))
+
+    with summary.section("Rows"):
+        with summary.table(["Index", "Value"]) as table:
+            written = table.add_rows([index, "secret"] for index in range(1000))
+
+    assert summary.truncated
+    assert 0 < written == table.rows < 20
+    assert table.dropped == 1
+    assert writer.lines[-4:] == ["", TRUNCATION_MARKER, "</details>", ""]
+    assert "| 0 | *** |" in writer.lines
+    assert summary.size <= 300
+    assert not summary.text("Too late")
+
+
+def test_step_summary_memory_is_bounded():
+    writer = MemoryCommandWriter()
+    writer.max_lines = 100
+    summary = StepSummary(writer, max_bytes=10 ** 9)
+
+    with summary.table(["Index"]) as table:
+        table.add_rows([index] for index in range(1000))
+
+    assert len(writer._lines) < 100
+    assert len(writer.lines) == 1000 + 4